@@ -0,0 +1,234 @@
+"""
+Async variants of the functions in Crud.py.
+
+Each function takes either an AsyncSession or a Session (see
+database.get_request_db) and runs the matching Crud implementation through
+database.run_db, so the query logic lives in one place. Password hashing is
+CPU-bound and runs on the bounded hashing pool (app.core.hashing_pool).
+
+With an AsyncSession, run_db runs the Crud function on the event loop, so
+work that is not a query (cache round trips, building or querying the
+search index, validating import rows) is split out and run through
+cache_io or the threadpool instead.
+"""
+import asyncio
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+from database import run_db
+from app.CRUD import Crud
+from app.core.cache import cache_io, product_cache
+from app.core.cart_store import cart_store, read_persisted
+from app.core.search import product_search
+from app.core.hashing_pool import hash_password_async, verify_password_async
+from app.schemas.Product import Product_Create_Schema, Product_Update_Schema
+from app.schemas.User import UserCreateSchema
+
+
+# ==================== PRODUCT FUNCTIONS ====================
+
+# Single-flight for search index rebuilds on this event loop (the threaded
+# path uses product_search.rebuild_lock)
+_search_rebuild_lock = asyncio.Lock()
+
+
+async def create_Product(db, product: Product_Create_Schema):
+    """Create a new product"""
+    return await run_db(db, Crud.create_Product, product)
+
+
+async def get_products_page(db, **filters):
+    """Get one page of products using keyset pagination"""
+    return await run_db(db, Crud.get_products_page, **filters)
+
+
+async def import_products_batch(db, records: List[tuple], upsert: bool = True) -> dict:
+    """Validate and write one batch of imported products"""
+    validated = await run_in_threadpool(Crud.validate_import_batch, records)
+    return await run_db(db, Crud.write_import_batch, validated, upsert)
+
+
+async def get_product_rows_after(db, after_id: int, limit: int) -> List[tuple]:
+    """Up to ``limit`` products with id > after_id as plain tuples"""
+    return await run_db(db, Crud.get_product_rows_after, after_id, limit)
+
+
+async def set_product_image(db, product_id: int, image_url: str):
+    """Point a product at a newly stored image"""
+    return await run_db(db, Crud.set_product_image, product_id, image_url)
+
+
+async def image_in_use(db, image_url: str) -> bool:
+    """True when some product points at this image URL"""
+    return await run_db(db, Crud.image_in_use, image_url)
+
+
+async def get_product_by_id(db, product_id: int):
+    """Get a specific product"""
+    return await run_db(db, Crud.get_product_by_id, product_id)
+
+
+async def get_product_snapshot(db, product_id: int) -> dict:
+    """Get a product as a cached dict snapshot (read-only callers)"""
+    snapshot = await cache_io(product_cache.get, product_id)
+    if snapshot is None:
+        token = await cache_io(product_cache.fill_token)
+        snapshot = await run_db(db, Crud.read_product_snapshot, product_id)
+        await cache_io(product_cache.fill, {product_id: snapshot}, token)
+    return snapshot
+
+
+async def get_product_snapshots(db, product_ids: List[int]) -> dict:
+    """Cached dict snapshots for many products; misses are read in one query"""
+    snapshots, missing, token = await cache_io(Crud.cached_product_snapshots, product_ids)
+    if missing:
+        found = await run_db(db, Crud.read_product_snapshots, missing)
+        await cache_io(Crud.cache_product_snapshots, found, token)
+        snapshots.update(found)
+    return snapshots
+
+
+async def search_products(db, q: str, limit: int = 20, offset: int = 0):
+    """Full-text search over product names and descriptions"""
+    if Crud.uses_postgres_search(db):
+        ranked, total = await run_db(db, Crud.search_products_postgres, q, limit, offset)
+    else:
+        stale, generation = await run_in_threadpool(product_search.needs_rebuild)
+        if stale:
+            async with _search_rebuild_lock:
+                # Re-check: a search that held the lock may have just rebuilt it
+                stale, generation = await run_in_threadpool(product_search.needs_rebuild)
+                if stale:
+                    documents = await run_db(db, Crud.read_search_documents)
+                    await run_in_threadpool(product_search.index.rebuild, documents, generation)
+        ranked, total = await run_in_threadpool(product_search.search, q, limit, offset)
+    snapshots = await get_product_snapshots(db, [product_id for product_id, _ in ranked])
+    return Crud.ranked_snapshots(ranked, snapshots), total
+
+
+async def update_Product(db, new_product: Product_Update_Schema, id: int):
+    """Update an existing product"""
+    return await run_db(db, Crud.update_Product, new_product, id)
+
+
+async def delete_product(db, id: int):
+    """Delete a product"""
+    return await run_db(db, Crud.delete_product, id)
+
+
+# ==================== USER FUNCTIONS ====================
+
+async def create_user(db, user: UserCreateSchema):
+    """Create a new user with hashed password"""
+    existing_user = await run_db(db, Crud.find_user_by_email, user.email)
+    if existing_user:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+
+    hashed_pwd = await hash_password_async(user.password)
+    return await run_db(db, Crud.add_user, user.email, hashed_pwd)
+
+
+async def authenticate_user(db, email: str, password: str):
+    """Authenticate user by email and password"""
+    user = await run_db(db, Crud.find_user_by_email, email)
+    if not user or not user.is_active:
+        return None
+
+    if not await verify_password_async(password, user.hashed_password):
+        return None
+
+    return user
+
+
+async def get_user_by_id(db, user_id: int):
+    """Get user by ID"""
+    return await run_db(db, Crud.get_user_by_id, user_id)
+
+
+async def get_user_by_email(db, email: str):
+    """Get user by email"""
+    return await run_db(db, Crud.get_user_by_email, email)
+
+
+async def find_user_by_id(db, user_id: int):
+    """Get user by ID, or None if it does not exist"""
+    return await run_db(db, Crud.find_user_by_id, user_id)
+
+
+async def find_user_by_email(db, email: str):
+    """Get user by email, or None if it does not exist"""
+    return await run_db(db, Crud.find_user_by_email, email)
+
+
+async def set_user_active(db, user_id: int, is_active: bool):
+    """Activate or deactivate a user and drop their cached auth entry"""
+    return await run_db(db, Crud.set_user_active, user_id, is_active)
+
+
+# ==================== CART FUNCTIONS ====================
+
+async def load_cart(db, user_id: int) -> dict:
+    """The user's cart document (see CartStore.load)"""
+    if not cart_store.write_behind:
+        return await run_db(db, cart_store.load, user_id)
+    cart = await cache_io(cart_store.cached, user_id)
+    if cart is None:
+        persisted = await run_db(db, read_persisted, user_id)
+        cart = await cache_io(cart_store.hydrate, user_id, persisted)
+    return cart
+
+
+async def update_cart(db, user_id: int, mutate) -> dict:
+    """Apply mutate(cart) to the user's cart and save it (see CartStore.update)"""
+    if not cart_store.write_behind:
+        return await run_db(db, cart_store.update, user_id, mutate)
+    await load_cart(db, user_id)  # bring a persisted cart into the store first
+    return await cache_io(cart_store.apply, user_id, mutate)
+
+
+# ==================== ORDER FUNCTIONS ====================
+
+async def create_order(db, user_id: int, items: List[dict]):
+    """Create a new order with items, reserving stock atomically"""
+    return await run_db(db, Crud.create_order, user_id, items)
+
+
+async def checkout_cart(db, user_id: int):
+    """Turn the user's cart into an order in one transaction"""
+    cart = await load_cart(db, user_id)
+    return await run_db(db, Crud.place_cart_order, user_id, cart)
+
+
+async def get_orders_page(db, **page_options):
+    """Get one page of orders, newest first (see Crud.get_orders_page)"""
+    return await run_db(db, Crud.get_orders_page, **page_options)
+
+
+async def get_user_orders(db, user_id: int, **page_options):
+    """Get one page of a user's orders"""
+    return await run_db(db, Crud.get_user_orders, user_id, **page_options)
+
+
+async def get_order_by_id(db, order_id: int):
+    """Get a specific order"""
+    return await run_db(db, Crud.get_order_by_id, order_id)
+
+
+async def get_all_orders(db, **page_options):
+    """Get one page of all orders (admin function)"""
+    return await run_db(db, Crud.get_all_orders, **page_options)
+
+
+async def update_order_status(db, order_id: int, new_status: Optional[str]):
+    """Update order status"""
+    return await run_db(db, Crud.update_order_status, order_id, new_status)
+
+
+async def delete_order(db, order_id: int):
+    """Delete an order and its items"""
+    return await run_db(db, Crud.delete_order, order_id)
@@ -1,29 +1,80 @@
-from sqlalchemy.orm import Session
-from app.schemas.Product import Product_Create_Schema, Product_Read_Schema, Product_Update_Schema
+import logging
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import or_, and_, case, cast, func, select, text, insert, update, false, Float
+from app.schemas.Product import Product_Create_Schema, Product_Read_Schema, Product_Update_Schema, Product_Import_Schema
+from pydantic import ValidationError
 from app.schemas.User import UserCreateSchema
 from app.Models.Product import Product
 from app.Models.User import User
 from app.core.security import hash_password, verify_password
+from app.core.cache import product_cache, product_page_cache, user_cache
+from app.core.config import SEARCH_BACKEND, LOW_STOCK_THRESHOLD
+from app.core.search import product_search, tokenize
+from app.core.http_cache import catalog_version
+from app.core.cart_store import cart_store
+from app.core.money import to_cents, from_cents
+from app.core.jobs import job_queue
+from app.core.order_jobs import post_order_jobs
+from app.core.reservations import delete_product_holds, held_product_ids, lock_products, release_for_order
+from database import after_commit
 from fastapi import HTTPException, status
-from typing import List
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
 
 
 # ==================== PRODUCT FUNCTIONS ====================
 
+def product_to_dict(product: Product) -> dict:
+    """Plain-data snapshot of a product row, safe to cache across sessions"""
+    return {
+        "id": product.id,
+        "sku": getattr(product, "sku", None),
+        "name": product.name,
+        "description": product.description,
+        "quantity": product.quantity,
+        "price": product.price,
+        "image_url": getattr(product, "image_url", None),
+        "featured": getattr(product, "featured", False) or False,
+    }
+
+
+def invalidate_product_cache(*product_ids: int):
+    """Drop cached snapshots for the given products and every cached list page,
+    and bump the catalog version so HTTP ETags change.
+
+    Called after the write has committed, so a cache error must not fail the
+    request (the client would retry a write that went through): it is tried
+    once more and then logged, and the stale entries age out with their TTL.
+    """
+    for attempt in range(2):
+        try:
+            for product_id in product_ids:
+                product_cache.delete(product_id)
+            product_page_cache.clear()
+            catalog_version.bump()
+            return
+        except Exception as e:
+            error = e
+    logger.warning("Product cache invalidation failed: %s", error)
+
+
 def create_Product(db: Session, product: Product_Create_Schema):
     """Create a new product"""
     try:
         db_product = Product(**product.dict())
         db.add(db_product)
         db.commit()
-        db.refresh(db_product)
-        return db_product
     except Exception as e:
         db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating product: {str(e)}"
         )
+    db.refresh(db_product)
+    after_commit(db, invalidate_product_cache)
+    after_commit(db, product_search.product_changed, db_product.id, db_product.name, db_product.description)
+    return db_product
 
 
 def get_all_products(db: Session):
@@ -37,6 +88,262 @@ def get_all_products(db: Session):
         )
 
 
+# Sort keys accepted by get_products_page. Every key is paired with the
+# primary key as a tie-breaker so the ordering is total and cursors are stable.
+PRODUCT_SORT_KEYS = {
+    "id": (Product.id, False),
+    "-id": (Product.id, True),
+    "price": (Product.price_cents, False),
+    "-price": (Product.price_cents, True),
+    "name": (Product.name, False),
+    "-name": (Product.name, True),
+}
+
+# Product columns read as plain tuples (list pages, exports), in
+# PRODUCT_ROW_FIELDS order. Rows created before the featured column
+# existed have NULL there; they read as False like product_to_dict does.
+PRODUCT_ROW_FIELDS = ("id", "sku", "name", "description", "price", "quantity", "image_url", "featured")
+PRODUCT_ROW_COLUMNS = (
+    Product.id, Product.sku, Product.name, Product.description,
+    (cast(Product.price_cents, Float) / 100).label("price"),  # cents -> decimal amount
+    Product.quantity, Product.image_url, func.coalesce(Product.featured, false()).label("featured"),
+)
+
+
+def get_products_page(
+    db: Session,
+    after_id: Optional[int] = None,
+    limit: int = 20,
+    featured: Optional[bool] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    in_stock: Optional[bool] = None,
+    sort: str = "id",
+    as_rows: bool = False,
+):
+    """Get one page of products using keyset pagination.
+
+    Filters and ordering run in SQL and at most ``limit + 1`` rows are read,
+    so the cost of a page does not grow with the size of the catalog.
+    ``after_id`` is the ``next_cursor`` returned by the previous page.
+    With ``as_rows`` the products are plain tuples of PRODUCT_ROW_COLUMNS
+    instead of ORM objects, which skips building an identity map entry per row.
+    Returns a tuple of (products, next_cursor).
+    """
+    if sort not in PRODUCT_SORT_KEYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid sort. Must be one of: {', '.join(PRODUCT_SORT_KEYS)}"
+        )
+    sort_column, descending = PRODUCT_SORT_KEYS[sort]
+
+    query = db.query(*PRODUCT_ROW_COLUMNS) if as_rows else db.query(Product)
+
+    if featured is not None:
+        if featured:
+            query = query.filter(Product.featured.is_(True))
+        else:
+            # Rows created before the column existed have NULL here
+            query = query.filter(or_(Product.featured.is_(False), Product.featured.is_(None)))
+    if min_price is not None:
+        query = query.filter(Product.price_cents >= to_cents(min_price))
+    if max_price is not None:
+        query = query.filter(Product.price_cents <= to_cents(max_price))
+    if in_stock is not None:
+        query = query.filter(Product.quantity > 0 if in_stock else Product.quantity <= 0)
+
+    if after_id is not None:
+        if sort_column is Product.id:
+            anchor_filter = Product.id < after_id if descending else Product.id > after_id
+        else:
+            anchor_value = db.query(sort_column).filter(Product.id == after_id).scalar()
+            if anchor_value is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Invalid cursor: product {after_id} not found"
+                )
+            if descending:
+                anchor_filter = or_(
+                    sort_column < anchor_value,
+                    and_(sort_column == anchor_value, Product.id < after_id)
+                )
+            else:
+                anchor_filter = or_(
+                    sort_column > anchor_value,
+                    and_(sort_column == anchor_value, Product.id > after_id)
+                )
+        query = query.filter(anchor_filter)
+
+    if descending:
+        query = query.order_by(sort_column.desc(), Product.id.desc())
+    else:
+        query = query.order_by(sort_column.asc(), Product.id.asc())
+
+    try:
+        rows = query.limit(limit + 1).all()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching products: {str(e)}"
+        )
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].id
+    if as_rows:
+        rows = [tuple(row) for row in rows]
+    return rows, next_cursor
+
+
+def _invalidate_after_import():
+    try:
+        product_cache.clear()
+    except Exception as e:
+        logger.warning("Product cache clear failed: %s", e)
+    invalidate_product_cache()
+    product_search.catalog_reloaded()
+
+
+# Inserted products get these for the optional columns an import leaves out
+IMPORT_DEFAULTS = {"sku": None, "image_url": None, "featured": False}
+
+
+def import_products_batch(db: Session, records: List[tuple], upsert: bool = True) -> dict:
+    """Validate and write one batch of imported products in a single transaction.
+
+    ``records`` are (line number, field dict or parse error) pairs. Rows whose
+    sku already exists are updated when ``upsert`` is set, the rest are
+    inserted; the existing skus are looked up with one query per batch and the
+    writes are executemany INSERT/UPDATE statements. Updates only touch the
+    columns the row supplies and may not lower quantity below the stock held
+    by open checkouts. Invalid rows are failed and reported; a row whose sku
+    appears again later in the batch is skipped (the last one wins). If the
+    batched write fails, every row is retried in a transaction of its own so
+    only the offending rows fail. Returns counts
+    (inserted + updated + skipped + failed == len(records)) plus the
+    per-line errors.
+    """
+    return write_import_batch(db, validate_import_batch(records), upsert)
+
+
+def validate_import_batch(records: List[tuple]) -> tuple:
+    """Validate import records (no database access).
+
+    Returns (per-line errors, rows by sku, rows without a sku, number of rows
+    superseded by a later row with the same sku); rows are (line, fields)
+    holding only the columns the row supplied.
+    """
+    errors = []
+    by_sku = {}
+    without_sku = []
+    superseded = 0
+    for line, record in records:
+        if isinstance(record, Exception):
+            errors.append({"line": line, "error": str(record)})
+            continue
+        try:
+            # Only the columns present in the row; updates leave the rest alone
+            data = Product_Import_Schema(**record).model_dump(exclude_unset=True)
+        except ValidationError as e:
+            error = e.errors()[0]
+            errors.append({"line": line, "error": f"{'.'.join(map(str, error['loc']))}: {error['msg']}"})
+            continue
+        if data.get("featured") is None:
+            data.pop("featured", None)
+        data["price_cents"] = to_cents(data.pop("price"))
+        if data.get("sku") is None:
+            without_sku.append((line, data))
+        else:
+            if data["sku"] in by_sku:
+                superseded += 1  # last row wins within a batch
+            by_sku[data["sku"]] = (line, data)
+    return errors, by_sku, without_sku, superseded
+
+
+def write_import_batch(db: Session, validated: tuple, upsert: bool = True) -> dict:
+    """Write rows checked by validate_import_batch in one transaction"""
+    errors, by_sku, without_sku, superseded = validated
+    errors = list(errors)
+    failed = len(errors)
+    existing = {}
+    if by_sku:
+        # Locked (in id order, like orders and checkouts) so holds taken
+        # meanwhile cannot push reserved above an imported quantity
+        existing = {
+            sku: (product_id, reserved) for sku, product_id, reserved in
+            db.query(Product.sku, Product.id, Product.reserved)
+            .filter(Product.sku.in_(list(by_sku))).order_by(Product.id).with_for_update().all()
+        }
+    if existing and not upsert:
+        for sku in existing:
+            errors.append({"line": by_sku[sku][0], "sku": sku, "error": "sku already exists"})
+        failed += len(existing)
+    inserts = [
+        (line, dict(IMPORT_DEFAULTS, **data))
+        for line, data in without_sku + [row for sku, row in by_sku.items() if sku not in existing]
+    ]
+    updates = []
+    if upsert:
+        for sku, (line, data) in by_sku.items():
+            if sku not in existing:
+                continue
+            product_id, reserved = existing[sku]
+            if data["quantity"] < reserved:
+                errors.append({"line": line, "sku": sku,
+                               "error": f"quantity {data['quantity']} is below the {reserved} reserved by checkouts"})
+                failed += 1
+                continue
+            updates.append((line, dict(data, id=product_id)))
+
+    try:
+        if inserts:
+            db.execute(insert(Product), [data for _, data in inserts])
+        if updates:
+            db.execute(update(Product), [data for _, data in updates])
+        db.commit()
+        inserted, updated = len(inserts), len(updates)
+    except Exception:
+        db.rollback()
+        # Find the rows that broke the batch by writing each on its own
+        inserted = _write_import_rows(db, insert(Product), inserts, errors)
+        updated = _write_import_rows(db, update(Product), updates, errors)
+        failed += len(inserts) + len(updates) - inserted - updated
+
+    if inserted or updated:
+        after_commit(db, _invalidate_after_import)
+    return {
+        "inserted": inserted,
+        "updated": updated,
+        "skipped": superseded,
+        "failed": failed,
+        "errors": errors,
+    }
+
+
+def _write_import_rows(db: Session, statement, rows: List[tuple], errors: List[dict]) -> int:
+    """Execute ``statement`` for each (line, fields) row in its own transaction;
+    returns rows written and adds the others to ``errors``"""
+    written = 0
+    for line, data in rows:
+        try:
+            db.execute(statement, [data])
+            db.commit()
+            written += 1
+        except Exception as e:
+            db.rollback()
+            errors.append({"line": line, "error": str(getattr(e, "orig", e))})
+    return written
+
+
+def get_product_rows_after(db: Session, after_id: int, limit: int) -> List[tuple]:
+    """Up to ``limit`` products with id > after_id as plain tuples, for exports"""
+    return [
+        tuple(row) for row in db.query(*PRODUCT_ROW_COLUMNS)
+        .filter(Product.id > after_id).order_by(Product.id).limit(limit).all()
+    ]
+
+
 def get_product_by_id(db: Session, product_id: int):
     """Get a specific product"""
     product = db.query(Product).filter(Product.id == product_id).first()
@@ -48,15 +355,132 @@ def get_product_by_id(db: Session, product_id: int):
     return product
 
 
+def get_product_snapshot(db: Session, product_id: int) -> dict:
+    """Get a product as a cached dict snapshot (read-only callers)"""
+    snapshot = product_cache.get(product_id)
+    if snapshot is None:
+        token = product_cache.fill_token()
+        snapshot = read_product_snapshot(db, product_id)
+        product_cache.fill({product_id: snapshot}, token)
+    return snapshot
+
+
+def read_product_snapshot(db: Session, product_id: int) -> dict:
+    """Read a product snapshot from the database, bypassing the cache"""
+    return product_to_dict(get_product_by_id(db, product_id))
+
+
+def cached_product_snapshots(product_ids: List[int]):
+    """Split product ids into (cached snapshots by id, ids missing from the
+    cache, fill token for caching the missing ones once read)"""
+    snapshots = {}
+    missing = []
+    for product_id in product_ids:
+        snapshot = product_cache.get(product_id)
+        if snapshot is None:
+            missing.append(product_id)
+        else:
+            snapshots[product_id] = snapshot
+    return snapshots, missing, product_cache.fill_token() if missing else None
+
+
+def read_product_snapshots(db: Session, product_ids: List[int]) -> dict:
+    """Snapshots of the existing products among ``product_ids``, read in one query"""
+    if not product_ids:
+        return {}
+    return {product.id: product_to_dict(product)
+            for product in db.query(Product).filter(Product.id.in_(product_ids)).all()}
+
+
+def cache_product_snapshots(snapshots: dict, token: int):
+    """Cache snapshots read after ``token`` was taken (see CacheNamespace.fill)"""
+    product_cache.fill(snapshots, token)
+
+
+def get_product_snapshots(db: Session, product_ids: List[int]) -> dict:
+    """Cached dict snapshots for many products; misses are read in one query"""
+    snapshots, missing, token = cached_product_snapshots(product_ids)
+    if missing:
+        found = read_product_snapshots(db, missing)
+        cache_product_snapshots(found, token)
+        snapshots.update(found)
+    return snapshots
+
+
+# Must match the GIN expression index created by migration v0005
+PRODUCT_SEARCH_VECTOR = "to_tsvector('english', coalesce(name, '') || ' ' || coalesce(description, ''))"
+
+
+def uses_postgres_search(db) -> bool:
+    """True when searches are ranked by PostgreSQL instead of the in-process index"""
+    return SEARCH_BACKEND == "postgres" and db.get_bind().dialect.name == "postgresql"
+
+
+def search_products_postgres(db: Session, q: str, limit: int, offset: int):
+    """Rank products with tsvector/tsquery; every token matches as a prefix"""
+    tokens = tokenize(q)
+    if not tokens:
+        return [], 0
+    ts_query = " | ".join(f"{token}:*" for token in tokens)
+    rows = db.execute(text(f"""
+        SELECT id, ts_rank_cd({PRODUCT_SEARCH_VECTOR}, query) AS rank, COUNT(*) OVER () AS total
+        FROM products, to_tsquery('english', :query) AS query
+        WHERE {PRODUCT_SEARCH_VECTOR} @@ query
+        ORDER BY rank DESC, id
+        LIMIT :limit OFFSET :offset
+    """), {"query": ts_query, "limit": limit, "offset": offset}).all()
+    total = rows[0].total if rows else 0
+    return [(row.id, row.rank) for row in rows], total
+
+
+def search_products(db: Session, q: str, limit: int = 20, offset: int = 0):
+    """Full-text search over product names and descriptions.
+
+    Uses the in-process BM25 index (app.core.search) unless SEARCH_BACKEND is
+    "postgres" and the database is PostgreSQL. Returns a tuple of
+    (product dicts in rank order, total number of matches).
+    """
+    if uses_postgres_search(db):
+        ranked, total = search_products_postgres(db, q, limit, offset)
+    else:
+        product_search.ensure_fresh(
+            lambda: db.query(Product.id, Product.name, Product.description).yield_per(1000)
+        )
+        ranked, total = product_search.search(q, limit, offset)
+
+    snapshots = get_product_snapshots(db, [product_id for product_id, _ in ranked])
+    return ranked_snapshots(ranked, snapshots), total
+
+
+def read_search_documents(db: Session) -> List[tuple]:
+    """(id, name, description) of every product, to build the search index from"""
+    return [tuple(row) for row in db.query(Product.id, Product.name, Product.description).yield_per(1000)]
+
+
+def ranked_snapshots(ranked: List[tuple], snapshots: dict) -> List[dict]:
+    # A product deleted by another worker may still be in this worker's index
+    return [snapshots[product_id] for product_id, _ in ranked if product_id in snapshots]
+
+
 def update_Product(db: Session, new_product: Product_Update_Schema, id: int):
     """Update an existing product"""
-    product = db.query(Product).filter(Product.id == id).first()
+    # Locked like imports, so holds taken meanwhile cannot push reserved above the new quantity
+    lock_products(db, [id])
+    product = db.query(Product).filter(Product.id == id).populate_existing().first()
     
     if not product:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Product with id {id} not found"
         )
+    if new_product.quantity is not None and new_product.quantity < product.reserved:
+        reserved = product.reserved
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"quantity {new_product.quantity} is below the {reserved} reserved by checkouts"
+        )
     
     try:
         if new_product.name is not None:
@@ -69,31 +493,51 @@ def update_Product(db: Session, new_product: Product_Update_Schema, id: int):
             product.price = new_product.price
 
         db.commit()
-        db.refresh(product)
-        return product
     except Exception as e:
         db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error updating product: {str(e)}"
         )
+    db.refresh(product)
+    after_commit(db, invalidate_product_cache, product.id)
+    if new_product.name is not None or new_product.description is not None:
+        after_commit(db, product_search.product_changed, product.id, product.name, product.description)
+    return product
+
+
+def set_product_image(db: Session, id: int, image_url: str):
+    """Point a product at a newly stored image"""
+    product = get_product_by_id(db, id)
+    product.image_url = image_url
+    db.commit()
+    db.refresh(product)
+    after_commit(db, invalidate_product_cache, id)
+    return product_to_dict(product)
+
+
+def image_in_use(db: Session, image_url: str) -> bool:
+    """True when some product points at this image URL"""
+    return db.query(Product.id).filter(Product.image_url == image_url).first() is not None
 
 
 def delete_product(db: Session, id: int):
     """Delete a product"""
     try:
+        lock_products(db, [id])
         searched_product = db.query(Product).filter(Product.id == id).first()
         
         if not searched_product:
+            db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Product with id {id} not found"
             )
         
+        # Checkout holds go with the product (they reference it)
+        delete_product_holds(db, id)
         db.delete(searched_product)
         db.commit()
-        
-        return {"message": f"Product with id {id} deleted successfully"}
     except HTTPException:
         raise
     except Exception as e:
@@ -102,6 +546,10 @@ def delete_product(db: Session, id: int):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error deleting product: {str(e)}"
         )
+    after_commit(db, invalidate_product_cache, id)
+    after_commit(db, product_search.product_deleted, id)
+
+    return {"message": f"Product with id {id} deleted successfully"}
 
 
 # ==================== USER FUNCTIONS ====================
@@ -119,16 +567,28 @@ def create_user(db: Session, user: UserCreateSchema):
         
         hashed_pwd = hash_password(user.password)
         
+        return add_user(db, user.email, hashed_pwd)
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error creating user: {str(e)}"
+        )
+
+
+def add_user(db: Session, email: str, hashed_password: str):
+    """Insert a user whose password has already been hashed"""
+    try:
         db_user = User(
-            email=user.email,
-            hashed_password=hashed_pwd
+            email=email,
+            hashed_password=hashed_password
         )
         db.add(db_user)
         db.commit()
         db.refresh(db_user)
         return db_user
-    except HTTPException:
-        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -179,67 +639,167 @@ def get_user_by_email(db: Session, email: str):
     return user
 
 
-# ==================== ORDER FUNCTIONS ====================
+def find_user_by_id(db: Session, user_id: int):
+    """Get user by ID, or None if it does not exist"""
+    return db.query(User).filter(User.id == user_id).first()
 
-def create_order(db: Session, user_id: int, items: List[dict]):
-    """Create a new order with items"""
+
+def find_user_by_email(db: Session, email: str):
+    """Get user by email, or None if it does not exist"""
+    return db.query(User).filter(User.email == email).first()
+
+
+def set_user_active(db: Session, user_id: int, is_active: bool):
+    """Activate or deactivate a user and drop their cached auth entry"""
+    user = get_user_by_id(db, user_id)
     try:
-        from app.Models.Order import Orders
-        from app.Models.orderitem import OrderItem  # lowercase
-        
-        if not items:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Order must contain at least one item"
-            )
-        
-        # Verify user exists
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
+        user.is_active = is_active
+        db.commit()
+        db.refresh(user)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error updating user: {str(e)}"
+        )
+    after_commit(db, invalidate_user_cache, user_id)
+    return user
+
+
+def invalidate_user_cache(user_id: int):
+    """Drop a user's cached auth entry after a committed change.
+
+    Like invalidate_product_cache: tried twice, then logged, and the entry
+    ages out after USER_CACHE_TTL seconds.
+    """
+    for attempt in range(2):
+        try:
+            user_cache.delete(user_id)
+            return
+        except Exception as e:
+            error = e
+    logger.warning("User cache invalidation failed: %s", error)
+
+
+# ==================== ORDER FUNCTIONS ====================
+
+def _place_order(db: Session, user_id: int, items: List[dict]):
+    """Stage an order with items and decrement stock, without committing
+
+    Product rows are read in one query, locked in ascending id order
+    (SELECT ... FOR UPDATE where supported) and decremented by a single
+    conditional UPDATE that only succeeds if every product still has
+    enough stock, so concurrent checkouts can never oversell. Stock held
+    by other buyers' checkouts (products.reserved) does not count; the
+    buyer's own holds and any expired holds on the ordered products are
+    released in the same transaction, after their products are locked
+    together with the ordered ones.
+    Returns (order, product_ids); the caller commits or rolls back.
+    """
+    from app.Models.Order import Orders
+    from app.Models.Orderitem import OrderItem
+    
+    if not items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Order must contain at least one item"
+        )
+    
+    # Verify user exists
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with id {user_id} not found"
+        )
+    
+    # Merge repeated products so each row is locked and decremented once
+    quantities = {}
+    for item in items:
+        quantities[item["product_id"]] = quantities.get(item["product_id"], 0) + item["quantity"]
+    product_ids = sorted(quantities)
+    
+    # Lock all products in a deterministic order to avoid deadlocks, including
+    # those the buyer holds stock of, since releasing the holds updates them.
+    # SQLite ignores FOR UPDATE; the conditional UPDATE below covers it.
+    products = (
+        db.query(Product)
+        .filter(Product.id.in_(set(product_ids) | set(held_product_ids(db, user_id))))
+        .order_by(Product.id)
+        .with_for_update()
+        .all()
+    )
+    products_by_id = {product.id: product for product in products}
+
+    # The buyer's own checkout holds are given back, so that stock is theirs to
+    # take, and so are expired holds the sweeper has not reached yet
+    released = release_for_order(db, user_id, product_ids)
+    
+    # Calculate the total in cents and validate items
+    total_cents = 0
+    for product_id in product_ids:
+        product = products_by_id.get(product_id)
+        if not product:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"User with id {user_id} not found"
+                detail=f"Product {product_id} not found"
             )
         
-        # Calculate total price and validate items
-        total_price = 0
-        for item in items:
-            product = db.query(Product).filter(Product.id == item["product_id"]).first()
-            if not product:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Product {item['product_id']} not found"
-                )
-            
-            if product.quantity < item["quantity"]:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Insufficient stock for product {product.name}"
-                )
-            
-            total_price += product.price * item["quantity"]
-        
-        # Create order
-        db_order = Orders(user_id=user_id, total_price=total_price, status="Pending")
-        db.add(db_order)
-        db.flush()
-        
-        # Add order items and update product quantities
-        for item in items:
-            product = db.query(Product).filter(Product.id == item["product_id"]).first()
-            order_item = OrderItem(
-                order_id=db_order.id,
-                product_id=item["product_id"],
-                quantity=item["quantity"],
-                price=product.price
+        # Stock held by other buyers' checkouts is not for sale
+        # (product.reserved was read before the holds above were released)
+        if product.quantity - (product.reserved - released.get(product_id, 0)) < quantities[product_id]:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Insufficient stock for product {product.name}"
             )
-            db.add(order_item)
-            product.quantity -= item["quantity"]
         
+        total_cents += product.price_cents * quantities[product_id]
+    
+    # Decrement every product in one statement, guarded by the unreserved stock check
+    requested = case(quantities, value=Product.id)
+    updated = (
+        db.query(Product)
+        .filter(Product.id.in_(product_ids), Product.quantity - Product.reserved >= requested)
+        .update({Product.quantity: Product.quantity - requested}, synchronize_session=False)
+    )
+    if updated != len(product_ids):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Insufficient stock: inventory changed while placing the order"
+        )
+    
+    # Create order
+    db_order = Orders(user_id=user_id, total_cents=total_cents, status="Pending")
+    db.add(db_order)
+    db.flush()
+    
+    # Add order items
+    db.add_all([
+        OrderItem(
+            order_id=db_order.id,
+            product_id=product_id,
+            quantity=quantities[product_id],
+            price_cents=products_by_id[product_id].price_cents
+        )
+        for product_id in product_ids
+    ])
+
+    # Mail, alerts and rollups run on the job queue; the jobs commit with the order
+    low_stock_ids = [
+        product_id for product_id in product_ids
+        if products_by_id[product_id].quantity - quantities[product_id] <= LOW_STOCK_THRESHOLD
+    ]
+    job_queue.enqueue_many(db, post_order_jobs(db_order.id, low_stock_ids))
+    return db_order, product_ids
+
+
+def create_order(db: Session, user_id: int, items: List[dict]):
+    """Create a new order with items, reserving stock atomically"""
+    try:
+        db_order, product_ids = _place_order(db, user_id, items)
         db.commit()
-        db.refresh(db_order)
-        return db_order
     except HTTPException:
+        db.rollback()
         raise
     except Exception as e:
         db.rollback()
@@ -247,20 +807,175 @@ def create_order(db: Session, user_id: int, items: List[dict]):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating order: {str(e)}"
         )
+    # Committed: from here on nothing may turn the order into an error
+    after_commit(db, invalidate_product_cache, *product_ids)
+    db.refresh(db_order)
+    return db_order
 
 
-def get_user_orders(db: Session, user_id: int):
-    """Get all orders for a user"""
+def _finish_checkout(user_id: int, cart: dict, order_id: int):
+    # The order is committed: a cart cache error must not report it as failed
     try:
-        from app.Models.Order import Orders
-        orders = db.query(Orders).filter(Orders.user_id == user_id).all()
-        return orders if orders else []
+        cart_store.finish_checkout(user_id, cart)
+    except Exception as e:
+        logger.warning("Cart cleanup after order %s failed: %s", order_id, e)
+
+
+def checkout_cart(db: Session, user_id: int):
+    """Turn the user's cart into an order.
+
+    The order, its items, the stock decrement and the removal of the
+    persisted cart are one transaction; lines are charged at current prices.
+    """
+    return place_cart_order(db, user_id, cart_store.load(db, user_id))
+
+
+def place_cart_order(db: Session, user_id: int, cart: dict):
+    """Order a loaded cart document (the database part of checkout_cart)"""
+    if not cart["lines"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cart is empty"
+        )
+    items = [{"product_id": line["product_id"], "quantity": line["quantity"]} for line in cart["lines"]]
+    try:
+        db_order, product_ids = _place_order(db, user_id, items)
+        cart_store.stage_checkout(db, user_id, cart)
+        db.commit()
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error creating order: {str(e)}"
+        )
+    after_commit(db, _finish_checkout, user_id, cart, db_order.id)
+    after_commit(db, invalidate_product_cache, *product_ids)
+    db.refresh(db_order)
+    return db_order
+
+
+ORDER_STATUSES = ["Pending", "Processing", "Shipped", "Delivered", "Cancelled"]
+
+
+def order_to_dict(order, include_items: bool = False) -> dict:
+    """Plain-data view of an order; items must already be eager-loaded"""
+    data = {
+        "id": order.id,
+        "user_id": order.user_id,
+        "status": order.status,
+        "total_price": order.total_price,
+        "created_at": order.created_at,
+        "item_count": len(order.items) if include_items else None,
+    }
+    if include_items:
+        data["items"] = [
+            {
+                "id": item.id,
+                "product_id": item.product_id,
+                "product_name": item.product.name if item.product else None,
+                "quantity": item.quantity,
+                "price": item.price,
+            }
+            for item in order.items
+        ]
+    return data
+
+
+def get_orders_page(
+    db: Session,
+    user_id: Optional[int] = None,
+    statuses: Optional[List[str]] = None,
+    after_id: Optional[int] = None,
+    limit: int = 20,
+    include_items: bool = False,
+):
+    """Get one page of orders, newest first, using keyset pagination.
+
+    Orders are ordered by ``(created_at, id)`` descending; ``after_id`` is the
+    ``next_cursor`` of the previous page (an unknown cursor yields an empty
+    page). The summary view selects only the listed columns and
+    an item count; ``include_items`` loads items and their products with two
+    extra IN queries for the whole page. Returns a tuple of (orders, next_cursor).
+    """
+    from app.Models.Order import Orders
+    from app.Models.Orderitem import OrderItem
+
+    if statuses:
+        invalid = [s for s in statuses if s not in ORDER_STATUSES]
+        if invalid:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid status. Must be one of: {', '.join(ORDER_STATUSES)}"
+            )
+
+    if include_items:
+        query = db.query(Orders).options(
+            selectinload(Orders.items).selectinload(OrderItem.product)
+        )
+    else:
+        item_count = (
+            select(func.count(OrderItem.id))
+            .where(OrderItem.order_id == Orders.id)
+            .scalar_subquery()
+        )
+        query = db.query(
+            Orders.id,
+            Orders.user_id,
+            Orders.status,
+            Orders.total_cents,
+            Orders.created_at,
+            item_count.label("item_count"),
+        )
+
+    if user_id is not None:
+        query = query.filter(Orders.user_id == user_id)
+    if statuses:
+        query = query.filter(Orders.status.in_(statuses))
+
+    if after_id is not None:
+        # Compare against the anchor row in SQL: no extra round trip, and no
+        # datetime round-tripping (SQLite stores created_at as text)
+        anchor_created_at = (
+            select(Orders.created_at).where(Orders.id == after_id).scalar_subquery()
+        )
+        query = query.filter(or_(
+            Orders.created_at < anchor_created_at,
+            and_(Orders.created_at == anchor_created_at, Orders.id < after_id)
+        ))
+
+    query = query.order_by(Orders.created_at.desc(), Orders.id.desc())
+
+    try:
+        rows = query.limit(limit + 1).all()
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching orders: {str(e)}"
         )
 
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].id
+
+    if include_items:
+        orders = [order_to_dict(order, include_items=True) for order in rows]
+    else:
+        orders = []
+        for row in rows:
+            data = dict(row._mapping)
+            data["total_price"] = from_cents(data.pop("total_cents"))
+            orders.append(data)
+    return orders, next_cursor
+
+
+def get_user_orders(db: Session, user_id: int, **page_options):
+    """Get one page of a user's orders (see get_orders_page)"""
+    return get_orders_page(db, user_id=user_id, **page_options)
+
 
 def get_order_by_id(db: Session, order_id: int):
     """Get a specific order"""
@@ -274,16 +989,9 @@ def get_order_by_id(db: Session, order_id: int):
     return order
 
 
-def get_all_orders(db: Session):
-    """Get all orders (admin function)"""
-    try:
-        from app.Models.Order import Orders
-        return db.query(Orders).all()
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error fetching orders: {str(e)}"
-        )
+def get_all_orders(db: Session, **page_options):
+    """Get one page of all orders (admin function, see get_orders_page)"""
+    return get_orders_page(db, **page_options)
 
 
 def update_order_status(db: Session, order_id: int, new_status: str):
@@ -296,11 +1004,10 @@ def update_order_status(db: Session, order_id: int, new_status: str):
             detail="Order not found"
         )
     
-    valid_statuses = ["Pending", "Processing", "Shipped", "Delivered", "Cancelled"]
-    if new_status not in valid_statuses:
+    if new_status not in ORDER_STATUSES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid status. Must be one of: {', '.join(valid_statuses)}"
+            detail=f"Invalid status. Must be one of: {', '.join(ORDER_STATUSES)}"
         )
     
     try:
@@ -320,7 +1027,7 @@ def delete_order(db: Session, order_id: int):
     """Delete an order and its items"""
     try:
         from app.Models.Order import Orders
-        from app.Models.orderitem import OrderItem  # lowercase
+        from app.Models.Orderitem import OrderItem
         
         order = db.query(Orders).filter(Orders.id == order_id).first()
         if not order:
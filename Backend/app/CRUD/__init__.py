@@ -1,4 +1,5 @@
 # CRUD package
 from . import Crud
+from . import AsyncCrud
 
-__all__ = ["Crud"]
+__all__ = ["Crud", "AsyncCrud"]
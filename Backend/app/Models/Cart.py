@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from database import Base
+
+class Cart(Base):
+    """A user's open cart as one JSON document (see app/core/cart_store.py)"""
+    __tablename__ = "carts"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    data = Column(Text, nullable=False)
+    version = Column(Integer, nullable=False, default=1)  # bumped by every write
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, BigInteger, Date, ForeignKey
+from database import Base
+
+class DailySales(Base):
+    """Units, revenue and orders per product and UTC day, rolled up by the job queue"""
+    __tablename__ = "daily_product_sales"
+    day = Column(Date, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    units = Column(Integer, nullable=False, default=0)
+    revenue_cents = Column(BigInteger, nullable=False, default=0)
+    orders = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from sqlalchemy.sql import func
+from database import Base
+
+class Job(Base):
+    """A unit of background work (see app/core/jobs.py)"""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Workers pick due jobs by status and run_at
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(50), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON
+    status = Column(String(10), nullable=False, default="pending")  # pending, running, done, dead
+    attempts = Column(Integer, nullable=False, default=0)  # bumped by every claim
+    max_attempts = Column(Integer, nullable=False)
+    run_at = Column(DateTime(timezone=True), nullable=False)
+    locked_until = Column(DateTime(timezone=True), nullable=True)  # lease of the running worker
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,16 +1,26 @@
-from sqlalchemy import Column, Integer, Boolean, String, DateTime, ForeignKey,Float
+from sqlalchemy import Column, Integer, BigInteger, Boolean, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
+from app.core.money import from_cents
 
 class Orders(Base):
     __tablename__="Orders"
+    # Created by app/migrations v0003; keep in sync
+    __table_args__ = (
+        Index("ix_orders_user_status", "user_id", "status"),
+        Index("ix_orders_user_created", "user_id", "created_at"),
+    )
     id=Column(Integer,primary_key=True, index=True)
     user_id=Column(Integer,ForeignKey("users.id"),nullable=False)
     created_at= Column(DateTime(timezone=True),server_default=func.now())
     updated_at= Column(DateTime(timezone=True),server_default=func.now(),onupdate=func.now())
     status=Column(String,default="Pending")
-    total_price=Column(Float,nullable=False)
+    total_cents=Column(BigInteger,nullable=False)  # sum of item price_cents * quantity
     items = relationship("OrderItem", back_populates="order", cascade="all, delete")
     users=relationship("User", back_populates="orders")
-    
\ No newline at end of file
+
+    @property
+    def total_price(self):
+        """Order total as a decimal amount"""
+        return from_cents(self.total_cents)
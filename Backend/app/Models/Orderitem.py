@@ -1,17 +1,26 @@
-from sqlalchemy import Column, Integer, Boolean, String, DateTime, ForeignKey,Float
+from sqlalchemy import Column, Integer, BigInteger, Boolean, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
+from app.core.money import from_cents
 
 class OrderItem(Base):
     __tablename__ = "order_items"
+    __table_args__ = (
+        Index("ix_order_items_order_product", "order_id", "product_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     
     order_id = Column(Integer, ForeignKey("Orders.id"), nullable=False)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
     quantity = Column(Integer, nullable=False)
-    price = Column(Float, nullable=False)  
+    price_cents = Column(BigInteger, nullable=False)  # unit price when ordered
     
     order = relationship("Orders", back_populates="items")
-    product = relationship("Product", back_populates="order_items")
\ No newline at end of file
+    product = relationship("Product", back_populates="order_items")
+
+    @property
+    def price(self):
+        """Unit price as a decimal amount"""
+        return from_cents(self.price_cents)
@@ -1,19 +1,31 @@
-from sqlalchemy import Column, Integer, Boolean, String, DateTime, ForeignKey,Float
+from sqlalchemy import Column, Integer, BigInteger, Boolean, String, DateTime, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
+from app.core.money import to_cents, from_cents
 
 class Product(Base):
     __tablename__ = "products"
     id = Column(Integer, primary_key=True, index=True)
+    sku = Column(String(64), unique=True, index=True, nullable=True)  # bulk import/upsert key
     name = Column(String(100), nullable=False)
     description = Column(String(150), nullable=False)
-    price = Column(Float, nullable=False)
+    price_cents = Column(BigInteger, nullable=False)  # see app/core/money.py
     quantity = Column(Integer, nullable=False)
+    reserved = Column(Integer, nullable=False, default=0, server_default="0")  # held by open checkouts
     image_url = Column(String(500), nullable=True)
-    featured = Column(Boolean, default=False)
+    featured = Column(Boolean, default=False, index=True)
 
     order_items = relationship(
         "OrderItem",
         back_populates="product"
-    )
\ No newline at end of file
+    )
+
+    @property
+    def price(self):
+        """Price as a decimal amount (API view of price_cents)"""
+        return from_cents(self.price_cents)
+
+    @price.setter
+    def price(self, amount):
+        self.price_cents = to_cents(amount)
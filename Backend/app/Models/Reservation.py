@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from database import Base
+
+class StockReservation(Base):
+    """A checkout's hold on some of a product's stock (see app/core/reservations.py)"""
+    __tablename__ = "stock_reservations"
+    __table_args__ = (
+        # One hold per user and product; a new checkout replaces the old holds
+        UniqueConstraint("user_id", "product_id", name="uq_stock_reservations_user_product"),
+        # The sweeper reads holds by expiry
+        Index("ix_stock_reservations_expires_at", "expires_at"),
+    )
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -3,5 +3,9 @@ from .User import User
 from .Product import Product
 from .Order import Orders
 from .Orderitem import OrderItem
+from .Cart import Cart
+from .Job import Job
+from .DailySales import DailySales
+from .Reservation import StockReservation
 
-__all__ = ["User", "Product", "Orders", "OrderItem"]
+__all__ = ["User", "Product", "Orders", "OrderItem", "Cart", "Job", "DailySales", "StockReservation"]
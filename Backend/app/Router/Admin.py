@@ -0,0 +1,120 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from app.core.pool_metrics import pool_metrics, render_pool_metrics
+from app.core.hashing_pool import hashing_pool
+from app.core.startup import startup_report
+from app.core.cart_store import cart_store, flush_carts
+from app.core.http_cache import cache_control, NO_STORE
+from app.core.reconcile import reconcile
+from app.core.jobs import job_queue
+from app.core.reservations import reservation_stats
+from app.dependencies import get_admin_user
+from database import get_request_db, run_db, DBSession
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.Models.DailySales import DailySales
+from app.core.money import from_cents
+from datetime import date, datetime, timezone
+from typing import Optional
+
+router = APIRouter(
+    prefix="/api/admin",
+    tags=["Admin"],
+    dependencies=[Depends(get_admin_user), Depends(cache_control(NO_STORE))]
+)
+
+
+@router.get("/pool")
+def get_pool_stats():
+    """Connection pool occupancy, checkout wait times and connection churn"""
+    return {name: metrics.snapshot() for name, metrics in pool_metrics.items()}
+
+
+@router.get("/pool/metrics", response_class=PlainTextResponse)
+def get_pool_metrics():
+    """Connection pool metrics in Prometheus text format"""
+    return render_pool_metrics()
+
+
+@router.get("/hashing")
+def get_hashing_stats():
+    """Password hashing pool queue depth, rejections and call timings"""
+    return hashing_pool.stats()
+
+
+@router.get("/startup")
+def get_startup_report():
+    """Time this worker spent importing, building the app and starting up"""
+    return startup_report.as_dict()
+
+
+@router.get("/carts")
+def get_cart_store_stats():
+    """Cart store backend, write counts and carts waiting to be flushed"""
+    return cart_store.stats()
+
+
+@router.get("/reconcile")
+async def check_money_totals(db: DBSession = Depends(get_request_db)):
+    """Order and cart totals that disagree with the sum of their lines (read only).
+
+    Carts are read from the carts table, so this worker's pending write-behind
+    carts are flushed first; other workers' unflushed edits are not seen.
+    """
+    if cart_store.write_behind:
+        await run_in_threadpool(flush_carts)
+    return await run_db(db, reconcile)
+
+
+def job_report(db: Session, dead_limit: int) -> dict:
+    report = job_queue.stats(db)
+    report["dead_letters"] = job_queue.dead_letters(db, dead_limit)
+    return report
+
+
+@router.get("/jobs")
+async def get_job_stats(
+    dead_limit: int = Query(20, ge=0, le=200),
+    db: DBSession = Depends(get_request_db)
+):
+    """Background jobs by status, this worker's run counts and the latest dead-lettered jobs"""
+    return await run_db(db, job_report, dead_limit)
+
+
+@router.post("/jobs/{job_id}/retry")
+async def retry_dead_job(job_id: int, db: DBSession = Depends(get_request_db)):
+    """Requeue a dead-lettered job with a fresh set of attempts"""
+    await run_db(db, job_queue.retry, job_id)
+    return {"message": f"Job {job_id} requeued"}
+
+
+def sales_for_day(db: Session, day: date) -> dict:
+    rows = db.execute(
+        select(DailySales.product_id, DailySales.units, DailySales.revenue_cents, DailySales.orders)
+        .where(DailySales.day == day)
+        .order_by(DailySales.revenue_cents.desc())
+    ).all()
+    return {
+        "day": day,
+        "revenue": from_cents(sum(row.revenue_cents for row in rows)),
+        "products": [
+            {"product_id": row.product_id, "units": row.units, "revenue": from_cents(row.revenue_cents), "orders": row.orders}
+            for row in rows
+        ],
+    }
+
+
+@router.get("/sales")
+async def get_daily_sales(
+    day: Optional[date] = None,
+    db: DBSession = Depends(get_request_db)
+):
+    """Per-product units and revenue for a day (UTC, default today) from the sales rollup"""
+    return await run_db(db, sales_for_day, day or datetime.now(timezone.utc).date())
+
+
+@router.get("/reservations")
+async def get_reservation_stats(db: DBSession = Depends(get_request_db)):
+    """Checkout stock holds: count, units held, expired holds not yet swept and sweeper runs"""
+    return await run_db(db, reservation_stats)
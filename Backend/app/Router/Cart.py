@@ -1,252 +1,384 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from database import get_db
+from database import get_request_db, run_db, DBSession
 from app.dependencies import get_current_user
-from app.Models.User import User
-from app.Models.Order import Orders
-from app.Models.Orderitem import OrderItem
+from app.schemas.User import UserReadSchema
+from app.schemas.Cart import Add_to_Cart_Schema, Cart_Batch_Schema
 from app.Models.Product import Product
-from app.schemas.Cart import Add_to_Cart_Schema
+from app.Models.Reservation import StockReservation
+from app.CRUD.Crud import order_to_dict
+from app.CRUD.AsyncCrud import checkout_cart, get_product_snapshots, load_cart, update_cart
+from app.core.metrics import cart_adds, orders_created
+from app.core.http_cache import cache_control, PRIVATE_NO_STORE
+from app.core.money import from_cents
+from app.core.reservations import reserve_for_checkout, get_holds, cancel_checkout
+from app.core.config import RESERVATION_TTL
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime
 from pydantic import BaseModel, Field
+from typing import List
 
 router = APIRouter(
     prefix="/api/cart",
-    tags=["Cart"]
+    tags=["Cart"],
+    dependencies=[Depends(cache_control(PRIVATE_NO_STORE))]
 )
 
+PLACEHOLDER_IMAGE = "https://via.placeholder.com/400x400?text=Product"
 
-def get_or_create_cart(db: Session, user_id: int) -> Orders:
-    """Get user's pending cart (order with status 'Cart') or create a new one"""
-    cart = db.query(Orders).filter(
-        Orders.user_id == user_id,
-        Orders.status == "Cart"
-    ).first()
-    
-    if not cart:
-        cart = Orders(user_id=user_id, status="Cart", total_price=0.0)
-        db.add(cart)
-        db.commit()
-        db.refresh(cart)
-    
-    return cart
+# Handlers read the database through run_db and the cart store through
+# AsyncCrud.load_cart/update_cart, so cart store and cache round trips never
+# run inside a database callable (on the event loop with AsyncSession); the
+# mutate callbacks passed to update_cart only edit the cart document.
 
 
-@router.get("")
-@router.get("/")
-def get_cart(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """Get current user's cart"""
-    cart = get_or_create_cart(db, current_user.id)
-    
-    # Get cart items with product details
-    items = db.query(OrderItem).filter(OrderItem.order_id == cart.id).all()
-    
+def find_line(cart: dict, item_id: int) -> dict:
+    """The cart line with this id, or 404"""
+    for line in cart["lines"]:
+        if line["id"] == item_id:
+            return line
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Cart item not found"
+    )
+
+
+def line_response(line: dict) -> dict:
+    return {
+        "id": line["id"],
+        "product_id": line["product_id"],
+        "quantity": line["quantity"],
+        "price": from_cents(line["price_cents"])
+    }
+
+
+async def cart_response(db: DBSession, user_id: int, cart: dict) -> dict:
+    """Build the cart response body from a cart document"""
+    # Product details for every line from the snapshot cache (misses in one query)
+    products = await get_product_snapshots(db, [line["product_id"] for line in cart["lines"]])
+
     cart_items = []
-    total_price = 0.0
-    
-    for item in items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
+    for line in cart["lines"]:
+        product = products.get(line["product_id"])
         if product:
-            item_data = {
-                "id": item.id,
-                "product_id": item.product_id,
-                "name": product.name,
-                "description": product.description,
-                "price": item.price,
-                "quantity": item.quantity,
-                "image": product.image_url or "https://via.placeholder.com/400x400?text=Product"
-            }
-            cart_items.append(item_data)
-            total_price += item.price * item.quantity
-    
+            cart_items.append({
+                "id": line["id"],
+                "product_id": line["product_id"],
+                "name": product["name"],
+                "description": product["description"],
+                "price": from_cents(line["price_cents"]),
+                "quantity": line["quantity"],
+                "image": product["image_url"] or PLACEHOLDER_IMAGE
+            })
+
     return {
-        "id": cart.id,
+        "id": user_id,  # one cart per user
         "items": cart_items,
-        "total_price": total_price,
-        "created_at": cart.created_at
+        "total_price": from_cents(cart["total_cents"]),
+        "created_at": cart["created_at"]
     }
 
 
-@router.post("/items")
-def add_to_cart(
-    item: Add_to_Cart_Schema,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+def read_cart_products(db: Session, user_id: int, product_ids) -> dict:
+    """Live price and available stock of products, by id (one query).
+
+    Stock is read fresh rather than from the snapshot cache, and stock held
+    by other buyers' checkouts does not count; the user's own hold does,
+    since it is released when they order.
+    """
+    if not product_ids:
+        return {}
+    own_hold = (
+        select(func.coalesce(func.sum(StockReservation.quantity), 0))
+        .where(StockReservation.user_id == user_id, StockReservation.product_id == Product.id)
+        .scalar_subquery()
+    )
+    rows = db.execute(
+        select(Product.id, Product.price_cents, (Product.quantity - Product.reserved + own_hold).label("available"))
+        .where(Product.id.in_(list(product_ids)))
+    ).all()
+    return {row.id: row for row in rows}
+
+
+def product_gone(product_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Product {product_id} no longer exists; remove it from the cart"
+    )
+
+
+@router.get("")
+@router.get("/")
+async def get_cart(
+    db: DBSession = Depends(get_request_db),
+    current_user: UserReadSchema = Depends(get_current_user)
 ):
-    """Add item to cart"""
-    # Get or create cart
-    cart = get_or_create_cart(db, current_user.id)
-    
-    # Check if product exists
-    product = db.query(Product).filter(Product.id == item.product_id).first()
-    if not product:
+    """Get current user's cart"""
+    return await cart_response(db, current_user.id, await load_cart(db, current_user.id))
+
+
+async def add_cart_item(db: DBSession, user_id: int, item: Add_to_Cart_Schema) -> dict:
+    """Add a product to the user's cart, merging with an existing line"""
+    products = await run_db(db, read_cart_products, user_id, [item.product_id])
+    product = products.get(item.product_id)
+    if product is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Product {item.product_id} not found"
+            detail=f"Product with id {item.product_id} not found"
         )
-    
-    # Check if item already exists in cart
-    existing_item = db.query(OrderItem).filter(
-        OrderItem.order_id == cart.id,
-        OrderItem.product_id == item.product_id
-    ).first()
-    
-    if existing_item:
-        # Update quantity
-        existing_item.quantity += item.quantity
-        if existing_item.quantity > product.quantity:
+    added = {}
+
+    def mutate(cart):
+        line = next((l for l in cart["lines"] if l["product_id"] == item.product_id), None)
+        current = line["quantity"] if line else 0
+        if current + item.quantity > product.available:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Insufficient stock"
             )
-    else:
-        # Create new cart item
-        if item.quantity > product.quantity:
+        if line:
+            line["quantity"] += item.quantity
+        else:
+            line = {"id": cart["next_line_id"], "product_id": item.product_id, "quantity": item.quantity, "price_cents": product.price_cents}
+            cart["next_line_id"] += 1
+            cart["lines"].append(line)
+        # Update cart total by the added amount only
+        cart["total_cents"] += line["price_cents"] * item.quantity
+        added.update(line)
+
+    await update_cart(db, user_id, mutate)
+    return line_response(added)
+
+
+@router.post("/items")
+async def add_to_cart(
+    item: Add_to_Cart_Schema,
+    db: DBSession = Depends(get_request_db),
+    current_user: UserReadSchema = Depends(get_current_user)
+):
+    """Add item to cart"""
+    result = await add_cart_item(db, current_user.id, item)
+    cart_adds.inc()
+    return result
+
+
+async def apply_cart_operations(db: DBSession, user_id: int, operations: List) -> dict:
+    """Apply add/set/remove operations in order as one cart write.
+
+    Live stock and prices of every product the batch adds or resizes are
+    read with one query; the final quantity of each is checked against the
+    available (unreserved) stock. Any failing operation rejects the whole
+    batch.
+    """
+    lines = {line["id"]: line for line in (await load_cart(db, user_id))["lines"]}
+    product_ids = {op.product_id for op in operations if op.op == "add"}
+    product_ids |= {lines[op.item_id]["product_id"] for op in operations if op.op == "set" and op.item_id in lines}
+    products = await run_db(db, read_cart_products, user_id, product_ids)
+
+    def apply(cart, op, touched):
+        if op.op == "add":
+            product = products.get(op.product_id)
+            if product is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Product {op.product_id} not found"
+                )
+            line = next((l for l in cart["lines"] if l["product_id"] == op.product_id), None)
+            if line is None:
+                line = {"id": cart["next_line_id"], "product_id": op.product_id, "quantity": 0, "price_cents": product.price_cents}
+                cart["next_line_id"] += 1
+                cart["lines"].append(line)
+            line["quantity"] += op.quantity
+            cart["total_cents"] += line["price_cents"] * op.quantity
+            touched.add(op.product_id)
+        elif op.op == "set":
+            line = find_line(cart, op.item_id)
+            cart["total_cents"] += line["price_cents"] * (op.quantity - line["quantity"])
+            line["quantity"] = op.quantity
+            touched.add(line["product_id"])
+        else:
+            line = find_line(cart, op.item_id)
+            cart["total_cents"] -= line["price_cents"] * line["quantity"]
+            cart["lines"].remove(line)
+
+    def mutate(cart):
+        touched = set()
+        for index, op in enumerate(operations):
+            try:
+                apply(cart, op, touched)
+            except HTTPException as e:
+                raise HTTPException(status_code=e.status_code, detail=f"Operation {index}: {e.detail}")
+        for line in cart["lines"]:
+            if line["product_id"] not in touched:
+                continue
+            product = products.get(line["product_id"])
+            if product is None and line["product_id"] in product_ids:
+                raise product_gone(line["product_id"])
+            if product is None:
+                # The line was added by a concurrent request after the stock read
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Cart changed while applying operations, please retry"
+                )
+            if line["quantity"] > product.available:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Insufficient stock for product {line['product_id']}"
+                )
+
+    cart = await update_cart(db, user_id, mutate)
+    return await cart_response(db, user_id, cart)
+
+
+@router.patch("/items")
+async def update_cart_items(
+    batch: Cart_Batch_Schema,
+    db: DBSession = Depends(get_request_db),
+    current_user: UserReadSchema = Depends(get_current_user)
+):
+    """Apply several add/set/remove operations at once and return the cart"""
+    result = await apply_cart_operations(db, current_user.id, batch.operations)
+    adds = sum(1 for op in batch.operations if op.op == "add")
+    if adds:
+        cart_adds.inc(adds)
+    return result
+
+
+class UpdateCartItemRequest(BaseModel):
+    quantity: int = Field(gt=0)
+
+
+async def set_cart_item_quantity(db: DBSession, user_id: int, item_id: int, quantity: int) -> dict:
+    """Set the quantity of one line in the user's cart"""
+    if quantity <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Quantity must be greater than 0"
+        )
+
+    # Check live stock (the line is looked up first so unknown items are 404)
+    product_id = find_line(await load_cart(db, user_id), item_id)["product_id"]
+    product = (await run_db(db, read_cart_products, user_id, [product_id])).get(product_id)
+    if product is None:
+        raise product_gone(product_id)
+    updated = {}
+
+    def mutate(cart):
+        line = find_line(cart, item_id)
+        if quantity > product.available:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Insufficient stock"
             )
-        existing_item = OrderItem(
-            order_id=cart.id,
-            product_id=item.product_id,
-            quantity=item.quantity,
-            price=product.price
-        )
-        db.add(existing_item)
-    
-    # Update cart total
-    cart.total_price = sum(
-        item.price * item.quantity 
-        for item in db.query(OrderItem).filter(OrderItem.order_id == cart.id).all()
-    )
-    
-    db.commit()
-    db.refresh(existing_item)
-    
-    return {
-        "id": existing_item.id,
-        "product_id": existing_item.product_id,
-        "quantity": existing_item.quantity,
-        "price": existing_item.price
-    }
+        # Update cart total by the quantity change, then the quantity itself
+        cart["total_cents"] += line["price_cents"] * (quantity - line["quantity"])
+        line["quantity"] = quantity
+        updated.update(line)
 
-
-class UpdateCartItemRequest(BaseModel):
-    quantity: int = Field(gt=0)
+    await update_cart(db, user_id, mutate)
+    return line_response(updated)
 
 
 @router.put("/items/{item_id}")
-def update_cart_item(
+async def update_cart_item(
     item_id: int,
     request: UpdateCartItemRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: DBSession = Depends(get_request_db),
+    current_user: UserReadSchema = Depends(get_current_user)
 ):
     """Update cart item quantity"""
-    quantity = request.quantity
-    if quantity <= 0:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Quantity must be greater than 0"
-        )
-    
-    # Get cart
-    cart = get_or_create_cart(db, current_user.id)
-    
-    # Get cart item
-    cart_item = db.query(OrderItem).filter(
-        OrderItem.id == item_id,
-        OrderItem.order_id == cart.id
-    ).first()
-    
-    if not cart_item:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Cart item not found"
-        )
-    
-    # Check product stock
-    product = db.query(Product).filter(Product.id == cart_item.product_id).first()
-    if quantity > product.quantity:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Insufficient stock"
-        )
-    
-    # Update quantity
-    cart_item.quantity = quantity
-    
-    # Update cart total
-    cart.total_price = sum(
-        item.price * item.quantity 
-        for item in db.query(OrderItem).filter(OrderItem.order_id == cart.id).all()
-    )
-    
-    db.commit()
-    db.refresh(cart_item)
-    
-    return {
-        "id": cart_item.id,
-        "product_id": cart_item.product_id,
-        "quantity": cart_item.quantity,
-        "price": cart_item.price
-    }
+    return await set_cart_item_quantity(db, current_user.id, item_id, request.quantity)
+
+
+async def remove_cart_item(db: DBSession, user_id: int, item_id: int) -> dict:
+    """Remove one line from the user's cart"""
+    def mutate(cart):
+        line = find_line(cart, item_id)
+        # Update cart total by the removed line only
+        cart["total_cents"] -= line["price_cents"] * line["quantity"]
+        cart["lines"].remove(line)
+
+    await update_cart(db, user_id, mutate)
+    return {"message": "Item removed from cart"}
 
 
 @router.delete("/items/{item_id}")
-def remove_from_cart(
+async def remove_from_cart(
     item_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: DBSession = Depends(get_request_db),
+    current_user: UserReadSchema = Depends(get_current_user)
 ):
     """Remove item from cart"""
-    # Get cart
-    cart = get_or_create_cart(db, current_user.id)
-    
-    # Get cart item
-    cart_item = db.query(OrderItem).filter(
-        OrderItem.id == item_id,
-        OrderItem.order_id == cart.id
-    ).first()
-    
-    if not cart_item:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Cart item not found"
-        )
-    
-    db.delete(cart_item)
-    
-    # Update cart total
-    remaining_items = db.query(OrderItem).filter(OrderItem.order_id == cart.id).all()
-    if remaining_items:
-        cart.total_price = sum(item.price * item.quantity for item in remaining_items)
-    else:
-        cart.total_price = 0.0
-    
-    db.commit()
-    
-    return {"message": "Item removed from cart"}
+    return await remove_cart_item(db, current_user.id, item_id)
+
+
+async def empty_cart(db: DBSession, user_id: int) -> dict:
+    """Delete every line from the user's cart"""
+    def mutate(cart):
+        cart["lines"] = []
+        cart["total_cents"] = 0
+
+    await update_cart(db, user_id, mutate)
+    return {"message": "Cart cleared"}
 
 
 @router.delete("")
 @router.delete("/")
-def clear_cart(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def clear_cart(
+    db: DBSession = Depends(get_request_db),
+    current_user: UserReadSchema = Depends(get_current_user)
 ):
     """Clear all items from cart"""
-    cart = get_or_create_cart(db, current_user.id)
-    
-    # Delete all cart items
-    db.query(OrderItem).filter(OrderItem.order_id == cart.id).delete()
-    cart.total_price = 0.0
-    
-    db.commit()
-    
-    return {"message": "Cart cleared"}
+    return await empty_cart(db, current_user.id)
+
+
+@router.post("/checkout", status_code=status.HTTP_201_CREATED)
+async def checkout(
+    db: DBSession = Depends(get_request_db),
+    current_user: UserReadSchema = Depends(get_current_user)
+):
+    """Place an order for everything in the cart and empty it"""
+    order = await checkout_cart(db, current_user.id)
+    orders_created.inc()
+    return order_to_dict(order)
 
+
+async def start_cart_checkout(db: DBSession, user_id: int) -> dict:
+    """Hold stock for every line in the user's cart"""
+    cart = await load_cart(db, user_id)
+    if not cart["lines"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cart is empty"
+        )
+    items = {}
+    for line in cart["lines"]:
+        items[line["product_id"]] = items.get(line["product_id"], 0) + line["quantity"]
+    return await run_db(db, reserve_for_checkout, user_id, items, RESERVATION_TTL)
+
+
+@router.post("/checkout/start")
+async def start_checkout(
+    db: DBSession = Depends(get_request_db),
+    current_user: UserReadSchema = Depends(get_current_user)
+):
+    """Hold the cart's stock for a while so checkout cannot fail on stock"""
+    return await start_cart_checkout(db, current_user.id)
+
+
+@router.get("/checkout")
+async def get_checkout_holds(
+    db: DBSession = Depends(get_request_db),
+    current_user: UserReadSchema = Depends(get_current_user)
+):
+    """Stock currently held for the user's checkout"""
+    return await run_db(db, get_holds, current_user.id)
+
+
+@router.delete("/checkout")
+async def cancel_cart_checkout(
+    db: DBSession = Depends(get_request_db),
+    current_user: UserReadSchema = Depends(get_current_user)
+):
+    """Release the stock held for the user's checkout"""
+    released = await run_db(db, cancel_checkout, current_user.id)
+    return {"message": f"{released} hold(s) released"}
@@ -0,0 +1,98 @@
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+
+from app.core.image_store import CONTENT_TYPES, KEY_RE, image_store, variant_key
+from app.core.thumbnails import thumbnail_pool
+
+router = APIRouter(
+    prefix="/api/images",
+    tags=["Images"]
+)
+
+# Keys are content hashes, so a URL never changes content
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def parse_range(range_header: str, size: int):
+    """(start, end) for a single "bytes=" range, None to ignore it; 416 if unsatisfiable"""
+    unit, _, spec = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None  # multi-range requests get the whole file
+    start_text, _, end_text = spec.strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+        else:
+            # "bytes=-N": the last N bytes
+            start = max(size - int(end_text), 0)
+            end = size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, min(end, size - 1)
+
+
+@router.get("/stats")
+def image_stats():
+    """Thumbnail worker queue and counters"""
+    return thumbnail_pool.stats()
+
+
+@router.get("/{key}")
+def get_image(
+    key: str,
+    w: Optional[int] = Query(None, ge=1, le=4096, description="Preferred width; served from the nearest thumbnail"),
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+):
+    """Serve a stored image with a strong ETag, byte ranges and long-lived caching"""
+    match = KEY_RE.match(key)
+    if not match or match.group("width") or not image_store.exists(key):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+
+    served_key = key
+    cache_control = IMMUTABLE_CACHE_CONTROL
+    if w is not None and thumbnail_pool.enabled:
+        width = thumbnail_pool.pick_width(w)
+        candidate = variant_key(key, width)
+        if image_store.exists(candidate):
+            served_key = candidate
+        else:
+            # Serve the original for now, but don't let it be cached as the thumbnail
+            thumbnail_pool.schedule(key)
+            cache_control = "public, max-age=60"
+
+    etag = f'"{served_key.rsplit(".", 1)[0]}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+    }
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    size = image_store.size(served_key)
+    byte_range = parse_range(range_header, size) if range_header else None
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, status.HTTP_200_OK
+    else:
+        start, end = byte_range
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+
+    # A sync iterator: Starlette reads it on the threadpool, chunk by chunk
+    return StreamingResponse(
+        image_store.read_range(served_key, start, end),
+        status_code=status_code,
+        media_type=CONTENT_TYPES[match.group("ext")],
+        headers=headers
+    )
@@ -1,15 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from database import get_request_db, DBSession
 from app.dependencies import get_current_user
-from app.Models.User import User
-from app.CRUD.Crud import create_order, get_user_orders, get_order_by_id, update_order_status
-from sqlalchemy.orm import Session
+from app.schemas.User import UserReadSchema
+from app.CRUD.AsyncCrud import create_order, get_user_orders, get_order_by_id, update_order_status
+from app.CRUD.Crud import order_to_dict
+from app.schemas.Order import Order_Page_Schema
+from app.core.metrics import orders_created
+from app.core.http_cache import cache_control, PRIVATE_NO_STORE
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 
 router = APIRouter(
     prefix="/api/orders",
-    tags=["Orders"]
+    tags=["Orders"],
+    dependencies=[Depends(cache_control(PRIVATE_NO_STORE))]
 )
 
 
@@ -28,10 +32,10 @@ class CreateOrderRequest(BaseModel):
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
-def create_new_order(
+async def create_new_order(
     order_data: CreateOrderRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: DBSession = Depends(get_request_db),
+    current_user: UserReadSchema = Depends(get_current_user)
 ):
     """Create a new order"""
     # Convert to backend format
@@ -45,26 +49,40 @@ def create_new_order(
             )
         items.append({"product_id": product_id, "quantity": item.quantity})
     
-    return create_order(db, current_user.id, items)
+    order = await create_order(db, current_user.id, items)
+    orders_created.inc()
+    return order_to_dict(order)
 
 
-@router.get("/")
-def get_orders(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+@router.get("/", response_model=Order_Page_Schema)
+async def get_orders(
+    status_filter: Optional[List[str]] = Query(None, alias="status", description="Only orders with these statuses (repeatable)"),
+    include_items: bool = Query(False, description="Include order lines with product names"),
+    after_id: Optional[int] = Query(None, description="Cursor: next_cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=100, description="Page size"),
+    db: DBSession = Depends(get_request_db),
+    current_user: UserReadSchema = Depends(get_current_user)
 ):
-    """Get all orders for the current user"""
-    return get_user_orders(db, current_user.id)
+    """Get a page of the current user's orders, newest first"""
+    orders, next_cursor = await get_user_orders(
+        db,
+        current_user.id,
+        statuses=status_filter,
+        after_id=after_id,
+        limit=limit,
+        include_items=include_items,
+    )
+    return {"items": orders, "next_cursor": next_cursor, "limit": limit}
 
 
 @router.get("/{order_id}")
-def get_order(
+async def get_order(
     order_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: DBSession = Depends(get_request_db),
+    current_user: UserReadSchema = Depends(get_current_user)
 ):
     """Get a specific order"""
-    order = get_order_by_id(db, order_id)
+    order = await get_order_by_id(db, order_id)
     
     # Check if order belongs to the current user
     if order.user_id != current_user.id:
@@ -73,18 +91,18 @@ def get_order(
             detail="Not authorized to view this order"
         )
     
-    return order
+    return order_to_dict(order)
 
 
 @router.put("/{order_id}/status")
-def update_status(
+async def update_status(
     order_id: int,
     status_update: dict,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: DBSession = Depends(get_request_db),
+    current_user: UserReadSchema = Depends(get_current_user)
 ):
     """Update order status (admin only)"""
-    order = get_order_by_id(db, order_id)
+    order = await get_order_by_id(db, order_id)
     
     # Check if order belongs to the current user
     if order.user_id != current_user.id:
@@ -93,4 +111,4 @@ def update_status(
             detail="Not authorized to update this order"
         )
     
-    return update_order_status(db, order_id, status_update.get("status"))
+    return order_to_dict(await update_order_status(db, order_id, status_update.get("status")))
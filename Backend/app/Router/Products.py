@@ -1,19 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, File, UploadFile, Form
-from database import get_db
-from app.schemas.Product import Product_Create_Schema, Product_Read_Schema, Product_Update_Schema
-from app.CRUD.Crud import create_Product, get_all_products, update_Product, delete_product
-from app.Models.Product import Product
-from sqlalchemy.orm import Session
+import logging
+from fastapi import APIRouter, Depends, HTTPException, status, Query, File, UploadFile, Form, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from database import get_request_db, open_request_session, run_db, DBSession
+from app.dependencies import get_admin_user
+from app.schemas.Product import Product_Create_Schema, Product_Read_Schema, Product_Update_Schema, Product_Page_Schema, Product_Search_Schema
+from app.CRUD.Crud import PRODUCT_ROW_FIELDS
+from app.CRUD.AsyncCrud import create_Product, get_products_page, get_product_snapshot, update_Product, delete_product, search_products, import_products_batch, get_product_rows_after, set_product_image, image_in_use
+from app.core.cache import cache_io, product_cache, product_page_cache
+from app.core.search import product_search
+from app.core.config import PRODUCT_IMPORT_BATCH_SIZE, PRODUCT_EXPORT_BATCH_SIZE, IMAGE_BASE_URL
+from app.core.image_store import image_store
+from app.core.thumbnails import thumbnail_pool
+from app.core.http_cache import catalog_etag, check_not_modified, not_modified_response, NO_STORE
+from app.core.product_io import FORMATS, iter_record_batches, csv_header, encode_rows
+from app.core.fast_json import FastJSONResponse, dumps, rows_to_dicts
+from app.core.reservations import availability
 from typing import Optional
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(
     prefix="/api/products",
     tags=["Products"]
 )
 
 
-@router.post("", response_model=Product_Read_Schema, status_code=status.HTTP_201_CREATED)
-@router.post("/", response_model=Product_Read_Schema, status_code=status.HTTP_201_CREATED)
+async def read_upload(upload: UploadFile, chunk_size: int = 65536):
+    """Yield an UploadFile in chunks instead of reading it whole"""
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def image_url_for(key: str) -> str:
+    return f"{IMAGE_BASE_URL}/{key}"
+
+
+async def discard_image(db: DBSession, key: str):
+    """Remove an upload whose product write failed, unless a product already
+    uses the same (content-addressed) file"""
+    try:
+        if not await image_in_use(db, image_url_for(key)):
+            await run_in_threadpool(image_store.delete, key)
+    except Exception as e:
+        logger.warning("Discarding image %s failed: %s", key, e)
+
+
+@router.post("", response_model=Product_Read_Schema, status_code=status.HTTP_201_CREATED, dependencies=[Depends(get_admin_user)])
+@router.post("/", response_model=Product_Read_Schema, status_code=status.HTTP_201_CREATED, dependencies=[Depends(get_admin_user)])
 async def create_product(
     name: str = Form(...),
     description: str = Form(...),
@@ -22,9 +59,11 @@ async def create_product(
     image_url: Optional[str] = Form(None),
     featured: Optional[str] = Form("false"),
     image: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db)
+    sku: Optional[str] = Form(None),
+    db: DBSession = Depends(get_request_db)
 ):
-    """Create a new product (supports both JSON and FormData)"""
+    """Create a new product (supports both JSON and FormData). Needs an admin user."""
+    image_key = None
     try:
         # Convert featured string to boolean
         featured_bool = False
@@ -34,13 +73,13 @@ async def create_product(
             else:
                 featured_bool = bool(featured)
         
-        # If image file is provided, use a placeholder URL (in production, upload to cloud storage)
-        if image:
-            # For now, just use the image_url if provided, or a placeholder
-            if not image_url:
-                image_url = f"https://via.placeholder.com/400x400?text={name.replace(' ', '+')}"
+        # Store an uploaded image (streamed to disk, thumbnails made in the background)
+        if image and image.filename:
+            image_key = await image_store.save_stream(read_upload(image))
+            image_url = image_url_for(image_key)
         
         product_data = Product_Create_Schema(
+            sku=sku,
             name=name,
             description=description,
             price=price,
@@ -48,101 +87,248 @@ async def create_product(
             image_url=image_url,
             featured=featured_bool
         )
-        return create_Product(db, product_data)
+        product = await create_Product(db, product_data)
     except Exception as e:
-        import traceback
-        print(f"Error in create_product: {str(e)}")
-        print(traceback.format_exc())
+        if image_key is not None:
+            await discard_image(db, image_key)
+        if isinstance(e, HTTPException):
+            raise
+        logger.exception("Error in create_product")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating product: {str(e)}"
         )
+    if image_key is not None:
+        thumbnail_pool.schedule(image_key)
+    return product
 
 
-@router.get("", response_model=list[Product_Read_Schema])
-@router.get("/", response_model=list[Product_Read_Schema])
-def list_products(
+@router.get("", response_model=Product_Page_Schema)
+@router.get("/", response_model=Product_Page_Schema)
+async def list_products(
+    request: Request,
+    response: Response,
     featured: Optional[str] = Query(None, description="Filter by featured products (true/false)"),
-    db: Session = Depends(get_db)
+    min_price: Optional[float] = Query(None, ge=0, description="Minimum price (inclusive)"),
+    max_price: Optional[float] = Query(None, ge=0, description="Maximum price (inclusive)"),
+    in_stock: Optional[bool] = Query(None, description="Only products with (true) or without (false) stock"),
+    sort: str = Query("id", description="Sort key: id, price, name; prefix with '-' for descending"),
+    after_id: Optional[int] = Query(None, description="Cursor: next_cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=100, description="Page size"),
+    db: DBSession = Depends(get_request_db)
 ):
-    """Get all products, optionally filtered by featured"""
+    """Get a page of products, optionally filtered and sorted.
+
+    Rows are read as tuples and encoded straight to JSON; they come from our
+    own table, so the response_model (kept for the docs) is not re-validated.
+    """
+    not_modified = await check_not_modified(request, response)
+    if not_modified:
+        return not_modified
     try:
-        products = get_all_products(db)
-        
         # Handle featured filter - convert string to boolean if needed
+        featured_bool = None
         if featured is not None:
-            # Convert string "true"/"false" to boolean
-            if isinstance(featured, str):
-                featured_bool = featured.lower() in ("true", "1", "yes")
-            else:
-                featured_bool = bool(featured)
-            
-            # Filter products, handling None values (existing products without featured field)
-            filtered_products = []
-            for p in products:
-                # Safely get featured attribute, default to False if not present or None
-                product_featured = False
-                try:
-                    product_featured = getattr(p, 'featured', False)
-                    if product_featured is None:
-                        product_featured = False
-                except (AttributeError, KeyError):
-                    product_featured = False
-                
-                if product_featured == featured_bool:
-                    filtered_products.append(p)
-            products = filtered_products
-        
-        # Convert products to schema, handling missing attributes
-        result = []
-        for p in products:
-            try:
-                product_dict = {
-                    'id': p.id,
-                    'name': p.name,
-                    'description': p.description,
-                    'quantity': p.quantity,
-                    'price': p.price,
-                    'image_url': getattr(p, 'image_url', None),
-                    'featured': getattr(p, 'featured', False) or False
-                }
-                result.append(Product_Read_Schema(**product_dict))
-            except Exception as e:
-                print(f"Error serializing product {p.id}: {e}")
-                # Skip products that can't be serialized
-                continue
-        
-        return result
+            featured_bool = featured.lower() in ("true", "1", "yes")
+
+        # Pages are cached already encoded, so a hit does no serialization at all
+        cache_key = (featured_bool, min_price, max_price, in_stock, sort, after_id, limit)
+        body = await cache_io(product_page_cache.get, cache_key)
+        if body is None:
+            rows, next_cursor = await get_products_page(
+                db,
+                after_id=after_id,
+                limit=limit,
+                featured=featured_bool,
+                min_price=min_price,
+                max_price=max_price,
+                in_stock=in_stock,
+                sort=sort,
+                as_rows=True,
+            )
+            page = {"items": rows_to_dicts(PRODUCT_ROW_FIELDS, rows), "next_cursor": next_cursor, "limit": limit}
+            body = dumps(page).decode("utf-8")
+            await cache_io(product_page_cache.set, cache_key, body)
+        return FastJSONResponse(body, headers=dict(response.headers))
+    except HTTPException:
+        raise
     except Exception as e:
-        import traceback
-        print(f"Error in list_products: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Error in list_products")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching products: {str(e)}"
         )
 
 
-@router.get("/{product_id}", response_model=Product_Read_Schema)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    """Get a product by ID"""
-    product = db.query(Product).filter(Product.id == product_id).first()
-    
-    if not product:
+@router.get("/cache/stats")
+async def product_cache_stats(response: Response):
+    """Hit/miss/eviction counters for the product caches"""
+    response.headers["Cache-Control"] = NO_STORE
+    return {
+        "products": product_cache.stats(),
+        "pages": product_page_cache.stats()
+    }
+
+
+@router.get("/search", response_model=Product_Search_Schema)
+async def search(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="Search terms; each also matches as a word prefix"),
+    limit: int = Query(20, ge=1, le=100, description="Page size"),
+    offset: int = Query(0, ge=0, le=1000, description="Number of ranked results to skip"),
+    db: DBSession = Depends(get_request_db)
+):
+    """Search product names and descriptions, best match first"""
+    not_modified = await check_not_modified(request, response)
+    if not_modified:
+        return not_modified
+    products, total = await search_products(db, q, limit, offset)
+    # Snapshots of our own rows: encode without re-validating
+    return FastJSONResponse(
+        {"items": products, "total": total, "limit": limit, "offset": offset},
+        headers=dict(response.headers)
+    )
+
+
+@router.get("/search/stats")
+async def search_stats(response: Response):
+    """Size and freshness of this worker's search index"""
+    response.headers["Cache-Control"] = NO_STORE
+    return product_search.index.stats()
+
+
+@router.get("/availability")
+async def product_availability(
+    response: Response,
+    ids: str = Query(..., description="Comma-separated product ids (at most 100)"),
+    db: DBSession = Depends(get_request_db)
+):
+    """On-hand, reserved (held by open checkouts) and available stock per product"""
+    response.headers["Cache-Control"] = NO_STORE
+    try:
+        product_ids = sorted({int(part) for part in ids.split(",") if part.strip()})
+    except ValueError:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Product with id {product_id} not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be comma-separated integers"
         )
+    if not product_ids or len(product_ids) > 100:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Between 1 and 100 product ids are required"
+        )
+    return await run_db(db, availability, product_ids)
+
+
+# Errors returned by an import; the rest are only counted
+MAX_IMPORT_ERRORS = 100
+
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+@router.post("/import", dependencies=[Depends(get_admin_user)])
+async def import_products(
+    request: Request,
+    format: str = Query("csv", description="Body format: csv (with header row) or ndjson"),
+    upsert: bool = Query(True, description="Update products whose sku already exists instead of rejecting the row"),
+    db: DBSession = Depends(get_request_db)
+):
+    """Bulk-create/update products from a streamed CSV or NDJSON request body.
+
+    The body is parsed as it arrives and written in batches of
+    PRODUCT_IMPORT_BATCH_SIZE rows, one transaction per batch; a failed batch
+    does not undo the batches before it. Needs an admin user.
+    """
+    if format not in FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid format. Must be one of: {', '.join(FORMATS)}"
+        )
+
+    summary = {"inserted": 0, "updated": 0, "skipped": 0, "failed": 0, "batches": 0, "errors": []}
+    async for records in iter_record_batches(request.stream(), format, PRODUCT_IMPORT_BATCH_SIZE):
+        result = await import_products_batch(db, records, upsert)
+        summary["batches"] += 1
+        for key in ("inserted", "updated", "skipped", "failed"):
+            summary[key] += result[key]
+        room = MAX_IMPORT_ERRORS - len(summary["errors"])
+        if room > 0:
+            summary["errors"].extend(result["errors"][:room])
+    return summary
+
+
+@router.get("/export")
+async def export_products(
+    format: str = Query("csv", description="Output format: csv or ndjson")
+):
+    """Stream every product as CSV or NDJSON, reading PRODUCT_EXPORT_BATCH_SIZE rows at a time"""
+    if format not in FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid format. Must be one of: {', '.join(FORMATS)}"
+        )
+
+    async def generate():
+        # The body is produced after the handler returns, so it uses its own session
+        async with open_request_session() as db:
+            if format == "csv":
+                yield csv_header()
+            after_id = 0
+            while True:
+                rows = await get_product_rows_after(db, after_id, PRODUCT_EXPORT_BATCH_SIZE)
+                if not rows:
+                    break
+                yield encode_rows(rows, format)
+                after_id = rows[-1][0]
+
+    return StreamingResponse(
+        generate(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="products.{format}"', "Cache-Control": NO_STORE}
+    )
+
+
+@router.put("/{product_id}/image", response_model=Product_Read_Schema, dependencies=[Depends(get_admin_user)])
+async def upload_product_image(
+    product_id: int,
+    request: Request,
+    db: DBSession = Depends(get_request_db)
+):
+    """Replace a product's image with the raw image bytes of the request body (streamed).
+
+    Needs an admin user.
+    """
+    await get_product_snapshot(db, product_id)  # 404 before reading the upload
+    key = await image_store.save_stream(request.stream())
+    try:
+        product = await set_product_image(db, product_id, image_url_for(key))
+    except Exception:
+        await discard_image(db, key)
+        raise
+    thumbnail_pool.schedule(key)
+    return product
+
+
+@router.get("/{product_id}", response_model=Product_Read_Schema)
+async def get_product(product_id: int, request: Request, response: Response, db: DBSession = Depends(get_request_db)):
+    """Get a product by ID"""
+    etag = await catalog_etag()
+    # A missing product is a 404 even to a client holding the current tag
+    product = await get_product_snapshot(db, product_id)
+    not_modified = not_modified_response(request, response, etag)
+    if not_modified:
+        return not_modified
     return product
 
 
 @router.put("/{product_id}", response_model=Product_Read_Schema)
-def update_product(product_id: int, product_update: Product_Update_Schema, db: Session = Depends(get_db)):
+async def update_product(product_id: int, product_update: Product_Update_Schema, db: DBSession = Depends(get_request_db)):
     """Update a product"""
-    return update_Product(db, product_update, product_id)
+    return await update_Product(db, product_update, product_id)
 
 
 @router.delete("/{product_id}")
-def remove_product(product_id: int, db: Session = Depends(get_db)):
+async def remove_product(product_id: int, db: DBSession = Depends(get_request_db)):
     """Delete a product"""
-    return delete_product(db, product_id)
+    return await delete_product(db, product_id)
@@ -1,4 +1,4 @@
 # Router package
-from . import Auth, Products, Orders, Cart
+from . import Auth, Products, Orders, Cart, Admin, Images
 
-__all__ = ["Auth", "Products", "Orders", "Cart"]
+__all__ = ["Auth", "Products", "Orders", "Cart", "Admin", "Images"]
@@ -0,0 +1,411 @@
+import json
+import logging
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from urllib.parse import urlparse
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import (
+    CACHE_GENERATION_TTL, CACHE_URL, PRODUCT_CACHE_SIZE, PRODUCT_CACHE_TTL, PRODUCT_PAGE_CACHE_SIZE, USER_CACHE_SIZE, USER_CACHE_TTL
+)
+
+logger = logging.getLogger(__name__)
+
+
+_MISSING = object()
+
+
+class CacheBackend:
+    """
+    Minimal key/value interface shared by every cache backend.
+
+    Keys are strings and values are JSON-compatible data. ``incr`` must be
+    atomic across every process that shares the backend, since it is what
+    namespaces use to broadcast invalidation.
+    """
+
+    # True when several worker processes see the same entries
+    shared = False
+
+    def get(self, key: str, default: Any = None) -> Any:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+
+class LRUCache(CacheBackend):
+    """
+    Thread-safe, size-bounded LRU cache with a per-entry time-to-live.
+
+    Values are stored as-is, so callers should cache plain data (dicts,
+    lists) rather than ORM instances bound to a session.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._counters = set()  # keys written by incr()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store value under key, evicting the least recently used entry if full"""
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                evicted, _ = self._data.popitem(last=False)
+                self._counters.discard(evicted)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        """Drop a single entry if present"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key: Hashable) -> int:
+        """Increment an integer counter entry (never expires) and return it"""
+        with self._lock:
+            value, _ = self._data.get(key, (0, None))
+            value += 1
+            self._data[key] = (value, None)
+            self._data.move_to_end(key)
+            self._counters.add(key)
+            return value
+
+    def clear(self) -> None:
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            counters = [(key, self._data[key]) for key in self._counters if key in self._data]
+            self._data.clear()
+            self._data.update(counters)
+
+    def stats(self) -> dict:
+        """Return hit/miss/eviction counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class RedisError(Exception):
+    """Error reply or protocol failure from a Redis-compatible server"""
+
+
+class RedisBackend(CacheBackend):
+    """
+    Cache backend speaking the Redis protocol (RESP2) over TCP.
+
+    Only GET/SET/DEL/INCR/FLUSHDB are used, so a real Redis server or the
+    stand-in in ``app.core.cache_server`` both work. Each thread keeps its
+    own connection. Connection failures are treated as cache misses so the
+    API falls back to the database instead of failing requests.
+    """
+
+    shared = True
+
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0, timeout: float = 1.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.timeout = timeout
+        self._local = threading.local()
+        self.errors = 0
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBackend":
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip("/") or 0)
+        return cls(host=parsed.hostname or "localhost", port=parsed.port or 6379, db=db)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn = (sock, sock.makefile("rb"))
+            self._local.conn = conn
+            if self.db:
+                self._send(conn, "SELECT", str(self.db))
+        return conn
+
+    def _disconnect(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn[1].close()
+                conn[0].close()
+            except OSError:
+                pass
+
+    @staticmethod
+    def _send(conn, *args):
+        sock, reader = conn
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+        sock.sendall(b"".join(parts))
+        return RedisBackend._read_reply(reader)
+
+    @staticmethod
+    def _read_reply(reader):
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by cache server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise RedisError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(payload)
+            if count < 0:
+                return None
+            return [RedisBackend._read_reply(reader) for _ in range(count)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+
+    def execute(self, *args):
+        """Send one command and return its reply, reconnecting once on a dropped socket"""
+        for attempt in range(2):
+            try:
+                return self._send(self._connection(), *args)
+            except (OSError, ConnectionError):
+                self._disconnect()
+                if attempt:
+                    raise
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            raw = self.execute("GET", key)
+        except (OSError, ConnectionError, RedisError) as e:
+            self.errors += 1
+            logger.warning("Cache GET failed: %s", e)
+            return default
+        return default if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        args = ["SET", key, json.dumps(value, default=str)]
+        if ttl:
+            args += ["PX", str(int(ttl * 1000))]
+        try:
+            self.execute(*args)
+        except (OSError, ConnectionError, RedisError) as e:
+            self.errors += 1
+            logger.warning("Cache SET failed: %s", e)
+
+    def delete(self, key: str) -> None:
+        # Invalidation must not be silently lost, so errors propagate here
+        self.execute("DEL", key)
+
+    def incr(self, key: str) -> int:
+        return self.execute("INCR", key)
+
+    def clear(self) -> None:
+        self.execute("FLUSHDB")
+
+    def stats(self) -> dict:
+        return {"backend": f"redis://{self.host}:{self.port}/{self.db}", "errors": self.errors}
+
+
+class CacheNamespace:
+    """
+    A named slice of a cache backend, e.g. product rows or list pages.
+
+    On a shared backend, entry keys embed a generation number stored in the
+    backend itself, so ``clear()`` is a single atomic INCR: once it runs,
+    every worker stops seeing the old entries, which then age out by TTL.
+    The generation is re-read at most every ``generation_ttl`` seconds, so
+    lookups are one round trip; another worker's clear() shows up here
+    within that time (this worker's own clear() at once).
+    A private in-memory backend belongs to one namespace and is just emptied.
+
+    Entries read from the database are stored with ``fill()`` rather than
+    ``set()``: a reader that loaded a row just before a write committed could
+    otherwise store it after the writer's ``delete()`` and serve the old row
+    for the whole TTL. Every ``delete()``/``clear()`` bumps a write counter
+    first; a reader takes ``fill_token()`` before its query, and ``fill()``
+    drops what it stored if the counter moved meanwhile:
+
+        token = namespace.fill_token()
+        value = load(key)
+        namespace.fill({key: value}, token)
+    """
+
+    def __init__(self, backend: CacheBackend, prefix: str, ttl: Optional[float] = None,
+                 generation_ttl: float = CACHE_GENERATION_TTL):
+        self.backend = backend
+        self.prefix = prefix
+        self.ttl = ttl
+        self.generation_ttl = generation_ttl
+        self._known_generation = None  # (generation, time.monotonic() when read)
+        self.hits = 0
+        self.misses = 0
+
+    def _generation(self, fresh: bool = False) -> int:
+        known = self._known_generation
+        now = time.monotonic()
+        if not fresh and known is not None and now - known[1] < self.generation_ttl:
+            return known[0]
+        generation = self.backend.get(f"{self.prefix}:gen") or 0
+        self._known_generation = (generation, now)
+        return generation
+
+    def _key(self, key: Hashable, fresh: bool = False) -> str:
+        if self.backend.shared:
+            return f"{self.prefix}:{self._generation(fresh)}:{key}"
+        return f"{self.prefix}:{key}"
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self.backend.get(self._key(key), _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self.backend.set(self._key(key), value, self.ttl)
+
+    def fill_token(self) -> int:
+        """Current write count; read it before loading the values to fill()"""
+        return self.backend.get(f"{self.prefix}:writes") or 0
+
+    def fill(self, values: dict, token: int) -> bool:
+        """Store values loaded after fill_token() returned ``token``, unless a
+        delete() or clear() ran since; True if they were kept"""
+        if not values:
+            return True
+        keys = [self._key(key) for key in values]
+        for cache_key, value in zip(keys, values.values()):
+            self.backend.set(cache_key, value, self.ttl)
+        if self.fill_token() == token:
+            # A write after this check deletes the entries itself
+            return True
+        try:
+            for cache_key in keys:
+                self.backend.delete(cache_key)
+        except Exception as e:
+            logger.warning("Cache fill rollback failed: %s", e)
+        return False
+
+    def delete(self, key: Hashable) -> None:
+        # Fills in progress see the counter move and drop what they stored
+        self.backend.incr(f"{self.prefix}:writes")
+        # Invalidation must hit the current generation, not a remembered one
+        self.backend.delete(self._key(key, fresh=True))
+
+    def clear(self) -> None:
+        self.backend.incr(f"{self.prefix}:writes")
+        if self.backend.shared:
+            self._known_generation = (self.backend.incr(f"{self.prefix}:gen"), time.monotonic())
+        else:
+            self.backend.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        stats = {
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+        backend_stats = self.backend.stats()
+        stats["size"] = backend_stats.get("size")
+        stats["maxsize"] = backend_stats.get("maxsize")
+        stats["evictions"] = backend_stats.get("evictions")
+        if "backend" in backend_stats:
+            stats["backend"] = backend_stats["backend"]
+            stats["errors"] = backend_stats["errors"]
+        return stats
+
+
+_shared_backend: Optional[CacheBackend] = None
+
+
+def create_backend(maxsize: int) -> CacheBackend:
+    """Backend for one namespace: a private LRU in memory, or the shared server"""
+    global _shared_backend
+    if CACHE_URL.startswith("redis://"):
+        if _shared_backend is None:
+            _shared_backend = RedisBackend.from_url(CACHE_URL)
+        return _shared_backend
+    return LRUCache(maxsize=maxsize)
+
+
+async def cache_io(fn, *args, **kwargs):
+    """Call a blocking cache function from async code.
+
+    With the shared backend every call is a network round trip, so it runs in
+    the threadpool instead of on the event loop; in-memory caches are called
+    directly, which is cheaper than the thread hop.
+    """
+    if CACHE_URL.startswith("redis://"):
+        return await run_in_threadpool(fn, *args, **kwargs)
+    return fn(*args, **kwargs)
+
+
+# Single product snapshots keyed by product id
+product_cache = CacheNamespace(create_backend(PRODUCT_CACHE_SIZE), "products:row", ttl=PRODUCT_CACHE_TTL)
+
+# Serialized GET /api/products pages keyed by their query parameters
+product_page_cache = CacheNamespace(create_backend(PRODUCT_PAGE_CACHE_SIZE), "products:page", ttl=PRODUCT_CACHE_TTL)
+
+# Active users keyed by id (the JWT "sub"), as UserReadSchema dicts
+user_cache = CacheNamespace(create_backend(USER_CACHE_SIZE), "users:active", ttl=USER_CACHE_TTL)
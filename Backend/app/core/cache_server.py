@@ -0,0 +1,160 @@
+"""
+Small Redis-protocol server used as a local stand-in for Redis.
+
+It implements just the commands RedisBackend sends (PING, SELECT, GET, SET
+with EX/PX, DEL, INCR, FLUSHDB), which is enough to run several uvicorn
+workers against one shared cache on a dev machine or in tests:
+
+    python -m app.core.cache_server --port 6380
+    CACHE_URL=redis://localhost:6380/0 uvicorn main:app --workers 4
+"""
+import argparse
+import socket
+import socketserver
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class _Store:
+    """Thread-safe dict of key -> (value bytes, expiry timestamp or None)"""
+
+    def __init__(self):
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    """Handles one client connection, one command per RESP array"""
+
+    def setup(self):
+        super().setup()
+        with self.server.clients_lock:
+            self.server.clients.add(self.request)
+
+    def finish(self):
+        with self.server.clients_lock:
+            self.server.clients.discard(self.request)
+        super().finish()
+
+    def handle(self):
+        while True:
+            try:
+                command = self._read_command()
+            except (ConnectionError, ValueError):
+                return
+            if command is None:
+                return
+            self.wfile.write(self._dispatch(command))
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            raise ValueError("Only RESP arrays are supported")
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def _dispatch(self, args) -> bytes:
+        store: _Store = self.server.store
+        name = args[0].upper()
+        with store.lock:
+            if name == b"PING":
+                return b"+PONG\r\n"
+            if name == b"SELECT":
+                return b"+OK\r\n"
+            if name == b"GET":
+                value = store.get(args[1])
+                if value is None:
+                    return b"$-1\r\n"
+                return b"$%d\r\n%s\r\n" % (len(value), value)
+            if name == b"SET":
+                expires_at = None
+                options = [arg.upper() for arg in args[3:]]
+                if b"PX" in options:
+                    expires_at = time.monotonic() + int(args[3 + options.index(b"PX") + 1]) / 1000
+                elif b"EX" in options:
+                    expires_at = time.monotonic() + int(args[3 + options.index(b"EX") + 1])
+                store.data[args[1]] = (args[2], expires_at)
+                return b"+OK\r\n"
+            if name == b"DEL":
+                removed = sum(1 for key in args[1:] if store.data.pop(key, None) is not None)
+                return b":%d\r\n" % removed
+            if name == b"INCR":
+                current = store.get(args[1])
+                try:
+                    value = int(current or 0) + 1
+                except ValueError:
+                    return b"-ERR value is not an integer or out of range\r\n"
+                store.data[args[1]] = (str(value).encode(), None)
+                return b":%d\r\n" % value
+            if name == b"FLUSHDB":
+                store.data.clear()
+                return b"+OK\r\n"
+        return b"-ERR unknown command '%s'\r\n" % args[0]
+
+
+class CacheServer(socketserver.ThreadingTCPServer):
+    """Threaded TCP server sharing one in-memory store between connections"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6380):
+        super().__init__((host, port), _RespHandler)
+        self.store = _Store()
+        self.clients = set()
+        self.clients_lock = threading.Lock()
+
+    def start_background(self) -> threading.Thread:
+        """Serve from a daemon thread and return it (port 0 picks a free port)"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self) -> None:
+        """Stop serving and drop every client connection, like a server going down"""
+        self.shutdown()
+        self.server_close()
+        with self.clients_lock:
+            clients = list(self.clients)
+        for client in clients:
+            try:
+                client.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Redis stand-in for the cache backend")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6380)
+    options = parser.parse_args()
+
+    server = CacheServer(options.host, options.port)
+    print(f"Cache server listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
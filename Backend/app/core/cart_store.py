@@ -0,0 +1,459 @@
+"""
+Server-side shopping carts.
+
+Carts used to be Orders rows with status 'Cart', so every cart click wrote
+to the table that order history and reporting read. A cart is now one small
+JSON document per user:
+
+    {"lines": [{"id": 1, "product_id": 3, "quantity": 2, "price_cents": 800}],
+     "next_line_id": 2, "total_cents": 1600, "created_at": "...", "version": 4}
+
+held by the CartStore chosen with CART_STORE and persisted to the ``carts``
+table. Line ids are stable within a cart (they are the item ids of the cart
+API); money is integer cents and ``total_cents`` is kept up to date by
+applying each edit's delta; ``version`` is bumped by every write. Checkout turns the cart into an
+Orders row in the same transaction that removes the persisted cart.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.cache import CacheBackend, RedisBackend, RedisError
+from app.core.config import CACHE_URL, CART_STORE, CART_TTL
+from app.core.money import to_cents
+from app.Models.Cart import Cart
+
+logger = logging.getLogger(__name__)
+
+# Optimistic writes retried this many times before giving up with 409
+UPDATE_ATTEMPTS = 5
+# Write-behind stores: seconds to back off (times the attempt number) when
+# another thread is writing the same cart
+CLAIM_RETRY_DELAY = 0.005
+
+
+def new_cart() -> dict:
+    """An empty, never-saved cart"""
+    return {
+        "lines": [],
+        "next_line_id": 1,
+        "total_cents": 0,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "version": 0,
+    }
+
+
+def upgrade_cart(cart: dict) -> dict:
+    """Convert a cart document written with float prices to cents in place"""
+    if "total_cents" not in cart:
+        for line in cart["lines"]:
+            line["price_cents"] = to_cents(line.pop("price"))
+        cart.pop("total_price", None)
+        cart["total_cents"] = sum(line["price_cents"] * line["quantity"] for line in cart["lines"])
+    return cart
+
+
+def encode_cart(cart: dict) -> str:
+    return json.dumps(cart, separators=(",", ":"))
+
+
+def read_persisted(db: Session, user_id: int) -> Optional[dict]:
+    """The user's cart as last written to the carts table"""
+    row = db.execute(select(Cart.data).where(Cart.user_id == user_id)).first()
+    return json.loads(row[0]) if row else None
+
+
+def remove_ordered(cart: dict, ordered: Dict[int, int]) -> None:
+    """Take ordered quantities (product id -> quantity) out of a cart in place"""
+    remaining = []
+    for line in cart["lines"]:
+        taken = min(ordered.get(line["product_id"], 0), line["quantity"])
+        cart["total_cents"] -= line["price_cents"] * taken
+        line["quantity"] -= taken
+        if line["quantity"] > 0:
+            remaining.append(line)
+    cart["lines"] = remaining
+    if not remaining:
+        cart["total_cents"] = 0
+
+
+class CartStore:
+    """
+    Where carts live between requests.
+
+    ``update`` is the only write path for cart edits: it applies a
+    ``mutate(cart)`` callback atomically for one user and saves the result.
+    The callback must not do IO; it may raise (e.g. HTTPException) to abort,
+    in which case nothing is saved.
+    """
+
+    name = "abstract"
+    # True when carts reach the carts table only through flush()
+    write_behind = False
+
+    def load(self, db: Session, user_id: int) -> dict:
+        """The user's cart, or an empty one; never writes"""
+        raise NotImplementedError
+
+    def update(self, db: Session, user_id: int, mutate: Callable[[dict], None]) -> dict:
+        """Apply mutate(cart) for this user, save and return the new cart"""
+        raise NotImplementedError
+
+    def stage_checkout(self, db: Session, user_id: int, cart: dict) -> None:
+        """Remove the persisted cart inside the caller's checkout transaction"""
+        raise NotImplementedError
+
+    def finish_checkout(self, user_id: int, cart: dict) -> None:
+        """Called once the checkout transaction has committed"""
+
+    def flush(self, db: Session) -> int:
+        """Persist carts changed since the last flush; returns how many"""
+        return 0
+
+    def stats(self) -> dict:
+        return {"backend": self.name}
+
+
+class DatabaseCartStore(CartStore):
+    """
+    Carts read and written straight to the carts table, one row per user.
+
+    Writes are optimistic: the UPDATE only applies if the row still has the
+    version that was read, otherwise the edit is replayed on the fresh cart.
+    Safe with any number of workers.
+    """
+
+    name = "database"
+
+    def __init__(self):
+        self.writes = 0
+        self.conflicts = 0
+
+    def load(self, db: Session, user_id: int) -> dict:
+        return read_persisted(db, user_id) or new_cart()
+
+    def update(self, db: Session, user_id: int, mutate: Callable[[dict], None]) -> dict:
+        for _ in range(UPDATE_ATTEMPTS):
+            cart = self.load(db, user_id)
+            expected = cart["version"]
+            mutate(cart)
+            cart["version"] = expected + 1
+            data = encode_cart(cart)
+            try:
+                if expected == 0:
+                    db.execute(insert(Cart).values(user_id=user_id, data=data, version=1))
+                    applied = True
+                else:
+                    applied = db.execute(
+                        update(Cart)
+                        .where(Cart.user_id == user_id, Cart.version == expected)
+                        .values(data=data, version=expected + 1, updated_at=func.now())
+                    ).rowcount == 1
+            except IntegrityError:
+                applied = False  # another request created the row first
+            if applied:
+                db.commit()
+                self.writes += 1
+                return cart
+            db.rollback()
+            self.conflicts += 1
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Cart is being changed by another request, please retry"
+        )
+
+    def stage_checkout(self, db: Session, user_id: int, cart: dict) -> None:
+        deleted = db.execute(
+            delete(Cart).where(Cart.user_id == user_id, Cart.version == cart["version"])
+        ).rowcount
+        if deleted != 1:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Cart changed during checkout, please review it and retry"
+            )
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "writes": self.writes, "conflicts": self.conflicts}
+
+
+class WriteBehindCartStore(CartStore):
+    """
+    Carts kept as JSON outside the database and written to the carts table
+    in batches by flush() (every CART_FLUSH_INTERVAL seconds, and at
+    shutdown). A cart missing from the store is loaded from the table.
+
+    Edits for one user are serialized in this process only (see _claim);
+    with several workers on a shared backend, two simultaneous edits of the
+    same cart from different workers resolve as last-writer-wins.
+
+    ``cached``, ``hydrate`` and ``apply`` split ``load``/``update`` into
+    their backend and database parts, so async callers can run the backend
+    IO in the threadpool and the carts table read through run_db.
+    """
+
+    write_behind = True
+
+    def __init__(self):
+        self._claims_lock = threading.Lock()
+        self._claimed = set()
+        self._dirty = set()
+        self._dirty_lock = threading.Lock()
+        self.writes = 0
+        self.hydrated = 0
+        self.flushed = 0
+        self.conflicts = 0
+
+    # Backend hooks: _get returns a fresh copy (or None), _set replaces
+    def _get(self, user_id: int) -> Optional[dict]:
+        raise NotImplementedError
+
+    def _set(self, user_id: int, cart: dict) -> None:
+        raise NotImplementedError
+
+    def _claim(self, user_id: int, attempts: int = UPDATE_ATTEMPTS) -> bool:
+        """Mark the user's cart as being written by this thread.
+
+        A flag rather than a held lock, since the backend calls that follow
+        may block: another writer of the same cart backs off and retries
+        instead of waiting. False if the cart stayed claimed.
+        """
+        for attempt in range(attempts):
+            if attempt:
+                time.sleep(CLAIM_RETRY_DELAY * attempt)
+            with self._claims_lock:
+                if user_id not in self._claimed:
+                    self._claimed.add(user_id)
+                    return True
+            self.conflicts += 1
+        return False
+
+    def _release(self, user_id: int) -> None:
+        with self._claims_lock:
+            self._claimed.discard(user_id)
+
+    def _mark_dirty(self, user_id: int) -> None:
+        with self._dirty_lock:
+            self._dirty.add(user_id)
+
+    def cached(self, user_id: int) -> Optional[dict]:
+        """The user's cart if the store has it (backend IO only)"""
+        return self._get(user_id)
+
+    def hydrate(self, user_id: int, persisted: Optional[dict]) -> dict:
+        """Put a cart read from the carts table into the store, unless an
+        edit got there first; returns the stored cart"""
+        if persisted is None:
+            return self._get(user_id) or new_cart()
+        if not self._claim(user_id):
+            return self._get(user_id) or persisted
+        try:
+            cart = self._get(user_id)
+            if cart is None:
+                self._set(user_id, persisted)
+                self.hydrated += 1
+                cart = persisted
+        finally:
+            self._release(user_id)
+        return cart
+
+    def load(self, db: Session, user_id: int) -> dict:
+        cart = self.cached(user_id)
+        if cart is not None:
+            return cart
+        return self.hydrate(user_id, read_persisted(db, user_id))
+
+    def apply(self, user_id: int, mutate: Callable[[dict], None]) -> dict:
+        """The backend half of update(): the cart must already be hydrated"""
+        if not self._claim(user_id):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Cart is being changed by another request, please retry"
+            )
+        try:
+            cart = self._get(user_id) or new_cart()
+            mutate(cart)
+            cart["version"] += 1
+            self._set(user_id, cart)
+            self.writes += 1
+        finally:
+            self._release(user_id)
+        self._mark_dirty(user_id)
+        return cart
+
+    def update(self, db: Session, user_id: int, mutate: Callable[[dict], None]) -> dict:
+        self.load(db, user_id)  # bring a persisted cart into the store first
+        return self.apply(user_id, mutate)
+
+    def stage_checkout(self, db: Session, user_id: int, cart: dict) -> None:
+        db.execute(delete(Cart).where(Cart.user_id == user_id))
+
+    def finish_checkout(self, user_id: int, cart: dict) -> None:
+        ordered = {line["product_id"]: line["quantity"] for line in cart["lines"]}
+        # The order is committed, so the cart is cleared even if a stuck
+        # writer keeps it claimed
+        claimed = self._claim(user_id)
+        try:
+            current = self._get(user_id)
+            if current is None or current["version"] == cart["version"]:
+                current = new_cart()
+                current["version"] = cart["version"]
+            else:
+                # Edited while checking out: keep whatever was not ordered
+                remove_ordered(current, ordered)
+            current["version"] += 1
+            self._set(user_id, current)
+        finally:
+            if claimed:
+                self._release(user_id)
+        # Flushed like any other edit, so a flush that raced the checkout
+        # and wrote the old cart back is corrected by the next one
+        self._mark_dirty(user_id)
+
+    def flush(self, db: Session) -> int:
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+        carts = {user_id: self._get(user_id) for user_id in dirty}
+        carts = {user_id: cart for user_id, cart in carts.items() if cart is not None}
+        if not carts:
+            return 0
+        try:
+            existing = set(db.scalars(select(Cart.user_id).where(Cart.user_id.in_(list(carts)))))
+            empty = [user_id for user_id, cart in carts.items() if not cart["lines"]]
+            rows = [
+                {"user_id": user_id, "data": encode_cart(cart), "version": cart["version"]}
+                for user_id, cart in carts.items() if cart["lines"]
+            ]
+            if empty:
+                db.execute(delete(Cart).where(Cart.user_id.in_(empty)))
+            inserts = [row for row in rows if row["user_id"] not in existing]
+            updates = [row for row in rows if row["user_id"] in existing]
+            if inserts:
+                db.execute(insert(Cart), inserts)
+            if updates:
+                db.execute(update(Cart), updates)
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._dirty_lock:
+                self._dirty |= dirty
+            raise
+        self.flushed += len(carts)
+        return len(carts)
+
+    def stats(self) -> dict:
+        with self._dirty_lock:
+            pending = len(self._dirty)
+        return {
+            "backend": self.name,
+            "writes": self.writes,
+            "conflicts": self.conflicts,
+            "pending_flush": pending,
+            "flushed": self.flushed,
+            "hydrated": self.hydrated,
+        }
+
+
+class MemoryCartStore(WriteBehindCartStore):
+    """Carts as compact JSON strings in this process; single worker only"""
+
+    name = "memory"
+
+    def __init__(self):
+        super().__init__()
+        self._carts: Dict[int, str] = {}
+
+    def _get(self, user_id: int) -> Optional[dict]:
+        raw = self._carts.get(user_id)
+        return None if raw is None else upgrade_cart(json.loads(raw))
+
+    def _set(self, user_id: int, cart: dict) -> None:
+        self._carts[user_id] = encode_cart(cart)
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["size"] = len(self._carts)
+        return stats
+
+
+class CacheCartStore(WriteBehindCartStore):
+    """
+    Carts on the shared cache server, so every worker sees the same cart.
+
+    Unlike cache reads elsewhere, failures are not treated as misses: a
+    cart edit that cannot be stored is reported as 503.
+    """
+
+    name = "cache"
+
+    def __init__(self, backend: CacheBackend, ttl: Optional[float] = None):
+        super().__init__()
+        self.backend = backend
+        self.ttl = ttl
+
+    def _call(self, *args):
+        try:
+            return self.backend.execute(*args)
+        except (OSError, ConnectionError, RedisError) as e:
+            logger.warning("Cart store error: %s", e)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Cart store unavailable, please retry"
+            )
+
+    def _get(self, user_id: int) -> Optional[dict]:
+        raw = self._call("GET", f"cart:{user_id}")
+        # Carts cached before the switch to cents are converted on read
+        return None if raw is None else upgrade_cart(json.loads(raw))
+
+    def _set(self, user_id: int, cart: dict) -> None:
+        args = ["SET", f"cart:{user_id}", encode_cart(cart)]
+        if self.ttl:
+            args += ["PX", str(int(self.ttl * 1000))]
+        self._call(*args)
+
+
+def create_cart_store(kind: Optional[str] = None) -> CartStore:
+    """Store for CART_STORE: database, cache (needs a redis:// CACHE_URL) or memory"""
+    kind = kind or CART_STORE
+    if kind == "database":
+        return DatabaseCartStore()
+    if kind == "memory":
+        return MemoryCartStore()
+    if kind == "cache":
+        if not CACHE_URL.startswith("redis://"):
+            raise ValueError("CART_STORE=cache needs a redis:// CACHE_URL")
+        return CacheCartStore(RedisBackend.from_url(CACHE_URL), ttl=CART_TTL)
+    raise ValueError(f"Unsupported CART_STORE: {kind}")
+
+
+cart_store = create_cart_store()
+
+
+def flush_carts() -> int:
+    """Flush the write-behind cart store with a session of its own"""
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        return cart_store.flush(db)
+    finally:
+        db.close()
+
+
+async def run_cart_flusher(interval: float) -> None:
+    """Flush carts every ``interval`` seconds until cancelled"""
+    from starlette.concurrency import run_in_threadpool
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(flush_carts)
+        except Exception as e:
+            logger.warning("Cart flush failed (will retry): %s", e)
@@ -1,3 +1,121 @@
-SECRET_KEY="0JJ1fsewCVH-Mp6K5M9ACvjSMjltMgVQWIWbzWz4Tls"
-ALGORITHM="HS256"
-ACCESS_TOKEN_EXPIRE=30
\ No newline at end of file
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SECRET_KEY=os.getenv("SECRET_KEY", "0JJ1fsewCVH-Mp6K5M9ACvjSMjltMgVQWIWbzWz4Tls")
+ALGORITHM=os.getenv("ALGORITHM", "HS256")
+ACCESS_TOKEN_EXPIRE=int(os.getenv("ACCESS_TOKEN_EXPIRE", "30"))
+
+# Authenticated requests: cache active users by token subject for a few seconds,
+# or (AUTH_TRUST_TOKEN_CLAIMS=true) trust the signed token and skip the lookup
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "30"))
+AUTH_TRUST_TOKEN_CLAIMS = os.getenv("AUTH_TRUST_TOKEN_CLAIMS", "false").lower() in ("true", "1", "yes")
+
+# Admin routes (/api/admin, product import) need a signed-in user whose email
+# is in ADMIN_EMAILS (comma-separated); when it is empty they are closed to
+# everyone
+ADMIN_EMAILS = {email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
+
+# Cache backend: "memory://" keeps a private cache per worker process,
+# "redis://host:port/db" shares one cache between all workers
+CACHE_URL = os.getenv("CACHE_URL", "memory://")
+# With a redis:// CACHE_URL each worker reuses a namespace's generation number
+# for this many seconds instead of reading it on every lookup, so a clear()
+# from another worker can take that long to show here
+CACHE_GENERATION_TTL = float(os.getenv("CACHE_GENERATION_TTL", "1"))
+
+# Product catalog cache (entries per cache, seconds before an entry goes stale)
+PRODUCT_CACHE_SIZE = int(os.getenv("PRODUCT_CACHE_SIZE", "10000"))
+PRODUCT_CACHE_TTL = float(os.getenv("PRODUCT_CACHE_TTL", "300"))
+PRODUCT_PAGE_CACHE_SIZE = int(os.getenv("PRODUCT_PAGE_CACHE_SIZE", "1000"))
+
+# Browsers/CDNs may reuse catalog responses for this many seconds, then
+# revalidate with If-None-Match (cheap 304 while the catalog is unchanged)
+CATALOG_MAX_AGE = int(os.getenv("CATALOG_MAX_AGE", "30"))
+
+# Product search: "memory" (in-process inverted index, BM25) or "postgres"
+# (tsvector + GIN index, PostgreSQL only). With CACHE_URL=memory:// each
+# worker's index may lag other workers' edits by up to SEARCH_INDEX_TTL seconds
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "memory")
+SEARCH_INDEX_TTL = float(os.getenv("SEARCH_INDEX_TTL", "300"))
+
+# Bulk product import/export: rows per INSERT/UPDATE batch (one commit each)
+# and rows per SELECT while streaming an export
+PRODUCT_IMPORT_BATCH_SIZE = int(os.getenv("PRODUCT_IMPORT_BATCH_SIZE", "1000"))
+PRODUCT_EXPORT_BATCH_SIZE = int(os.getenv("PRODUCT_EXPORT_BATCH_SIZE", "1000"))
+
+# Product images: content-addressed store (file:// only for now), the URL
+# prefix written into image_url (point it at nginx/a CDN serving the same
+# files to keep image traffic off the API), upload limit and thumbnail widths
+IMAGE_STORE_URL = os.getenv("IMAGE_STORE_URL", "file://./media/images")
+IMAGE_BASE_URL = os.getenv("IMAGE_BASE_URL", "/api/images").rstrip("/")
+IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(10 * 1024 * 1024)))
+IMAGE_THUMBNAIL_WIDTHS = [int(w) for w in os.getenv("IMAGE_THUMBNAIL_WIDTHS", "200,400").split(",") if w.strip()]
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+
+# Shopping carts (one JSON document per user, kept out of the Orders table):
+#   "database" - the carts table is the store; safe with any number of workers
+#   "cache"    - the shared CACHE_URL server (must be redis://), persisted to
+#                the carts table every CART_FLUSH_INTERVAL seconds
+#   "memory"   - a dict in this process, persisted the same way; single
+#                worker only (local development, tests)
+# With "cache"/"memory" a crash loses at most CART_FLUSH_INTERVAL seconds of edits
+CART_STORE = os.getenv("CART_STORE", "database")
+CART_FLUSH_INTERVAL = float(os.getenv("CART_FLUSH_INTERVAL", "5"))
+CART_TTL = float(os.getenv("CART_TTL", str(30 * 24 * 3600)))  # idle carts drop out of the cache
+
+# Password hashing pool: argon2 runs on these workers instead of request threads.
+# Requests beyond workers + queue are rejected with 503 right away.
+HASH_POOL_KIND = os.getenv("HASH_POOL_KIND", "thread")  # "thread" or "process"
+HASH_POOL_WORKERS = int(os.getenv("HASH_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_POOL_MAX_QUEUE = int(os.getenv("HASH_POOL_MAX_QUEUE", "32"))
+
+# Request tracing: one JSON log line per request with its SQL query count and
+# DB time, plus a slow-query log (with bound parameters) above SLOW_QUERY_MS
+REQUEST_LOG_ENABLED = os.getenv("REQUEST_LOG_ENABLED", "true").lower() in ("true", "1", "yes")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG_FILE = os.getenv("SLOW_QUERY_LOG_FILE")  # stderr when unset
+
+# Apply pending schema migrations when a worker starts. Meant for local
+# development only; production runs `python -m app.migrations upgrade` once
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "false").lower() in ("true", "1", "yes")
+
+# Background jobs (post-order emails, low-stock alerts, sales rollups) are
+# rows in the jobs table, committed with the order, and run by JOB_WORKERS
+# asyncio workers inside every API process (1 by default). Claims are
+# lease-based, so any number of processes can share the table. JOB_WORKERS=0
+# makes API processes only enqueue, for deployments that run a separate
+# `python -m app.core.jobs run` process instead. Failed jobs are retried
+# with exponential backoff (JOB_BACKOFF_BASE * 2^n seconds, capped at
+# JOB_BACKOFF_MAX) and end up dead-lettered after JOB_MAX_ATTEMPTS. A worker
+# that dies mid-job loses its claim after JOB_LEASE seconds. An API process
+# with JOB_WORKERS=0 checks at startup and then every JOB_STALL_WARNING
+# seconds for pending jobs that have been due longer than that, and warns
+# that no job runner is draining the table.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_BACKOFF_BASE = float(os.getenv("JOB_BACKOFF_BASE", "2"))
+JOB_BACKOFF_MAX = float(os.getenv("JOB_BACKOFF_MAX", "600"))
+JOB_LEASE = float(os.getenv("JOB_LEASE", "60"))
+JOB_STALL_WARNING = float(os.getenv("JOB_STALL_WARNING", "300"))
+
+# Outgoing mail. Without SMTP_HOST mails are only logged; for local runs
+# start python -m app.core.smtp_server --port 8025 and set SMTP_HOST=localhost
+SMTP_HOST = os.getenv("SMTP_HOST")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "8025"))
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "10"))
+MAIL_FROM = os.getenv("MAIL_FROM", "orders@ecommerce.local")
+
+# Products whose stock drops to this level or below after an order trigger a
+# low-inventory alert (mailed to INVENTORY_ALERT_EMAIL when set, else logged)
+LOW_STOCK_THRESHOLD = int(os.getenv("LOW_STOCK_THRESHOLD", "5"))
+INVENTORY_ALERT_EMAIL = os.getenv("INVENTORY_ALERT_EMAIL")
+
+# Stock holds: starting a checkout holds the cart's quantities for
+# RESERVATION_TTL seconds so other buyers cannot take them; expired holds
+# are released every RESERVATION_SWEEP_INTERVAL seconds by each worker
+RESERVATION_TTL = float(os.getenv("RESERVATION_TTL", "600"))
+RESERVATION_SWEEP_INTERVAL = float(os.getenv("RESERVATION_SWEEP_INTERVAL", "30"))
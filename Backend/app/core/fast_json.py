@@ -0,0 +1,49 @@
+"""
+Fast JSON responses for trusted data.
+
+FastAPI validates a handler's return value against its ``response_model``
+and then runs it through ``jsonable_encoder`` before encoding. For data that
+comes straight from our own database rows that work is redundant, and on
+large list pages it is the biggest CPU cost of the request. Handlers that
+return a ``FastJSONResponse`` skip both steps; the ``response_model`` stays
+on the route so the OpenAPI schema is unchanged.
+
+orjson is used when installed, otherwise the standard library encoder.
+"""
+import json
+from typing import Any, Iterable, Sequence
+
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def dumps(value: Any) -> bytes:
+    """Encode plain data (dicts, lists, str, numbers, None, datetimes) as compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def rows_to_dicts(fields: Sequence[str], rows: Iterable[tuple]) -> list:
+    """Turn row tuples into JSON objects keyed by ``fields`` (same order)"""
+    return [dict(zip(fields, row)) for row in rows]
+
+
+class FastJSONResponse(Response):
+    """JSON response that encodes its content without validation.
+
+    ``content`` may also be an already-encoded body (``bytes`` or ``str``),
+    e.g. a page held in a cache, which is sent as is.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        if isinstance(content, str):
+            return content.encode("utf-8")
+        return dumps(content)
@@ -0,0 +1,117 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+
+from app.core.config import HASH_POOL_KIND, HASH_POOL_MAX_QUEUE, HASH_POOL_WORKERS
+from app.core.security import hash_password, verify_password
+
+
+def _timed_call(fn, *args):
+    """Run fn in the worker and report how long it took there"""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+class HashingPool:
+    """
+    Bounded executor for argon2 hashing and verification.
+
+    At most `workers` calls run at once and at most `max_queue` more wait;
+    anything beyond that is rejected with 503 immediately, so a login storm
+    cannot tie up the workers that serve the rest of the API.
+    """
+
+    def __init__(self, workers: int, max_queue: int, kind: str = "thread"):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.kind = kind
+        self._executor: Executor = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+        self.timings = {}
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hashing")
+        return self._executor
+
+    def _record(self, name: str, queued: float, run: float):
+        stats = self.timings.setdefault(name, {
+            "calls": 0, "run_total_ms": 0.0, "run_max_ms": 0.0, "queue_total_ms": 0.0, "queue_max_ms": 0.0
+        })
+        stats["calls"] += 1
+        stats["run_total_ms"] += run * 1000
+        stats["run_max_ms"] = max(stats["run_max_ms"], run * 1000)
+        stats["queue_total_ms"] += queued * 1000
+        stats["queue_max_ms"] = max(stats["queue_max_ms"], queued * 1000)
+
+    async def run(self, name: str, fn, *args):
+        """Run fn(*args) on the pool, or raise 503 if the pool is saturated"""
+        with self._lock:
+            if self.in_flight >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Server busy, please retry shortly",
+                    headers={"Retry-After": "1"}
+                )
+            self.in_flight += 1
+
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, run_time = await loop.run_in_executor(self._get_executor(), _timed_call, fn, *args)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+        total = time.perf_counter() - start
+        with self._lock:
+            self._record(name, max(total - run_time, 0.0), run_time)
+        return result
+
+    def stats(self) -> dict:
+        """Queue depth, rejections and per-operation timings"""
+        with self._lock:
+            timings = {}
+            for name, stats in self.timings.items():
+                calls = stats["calls"]
+                timings[name] = {
+                    **{key: round(value, 3) for key, value in stats.items()},
+                    "run_avg_ms": round(stats["run_total_ms"] / calls, 3),
+                    "queue_avg_ms": round(stats["queue_total_ms"] / calls, 3),
+                }
+            return {
+                "kind": self.kind,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "rejected": self.rejected,
+                "timings": timings,
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hashing_pool = HashingPool(HASH_POOL_WORKERS, HASH_POOL_MAX_QUEUE, HASH_POOL_KIND)
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the hashing pool"""
+    return await hashing_pool.run("hash", hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the hashing pool"""
+    return await hashing_pool.run("verify", verify_password, plain_password, hashed_password)
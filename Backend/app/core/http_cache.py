@@ -0,0 +1,102 @@
+"""
+Conditional GETs for catalog routes.
+
+Every product write bumps ``catalog_version`` (see Crud.invalidate_product_cache),
+so "same version" means "same catalog data": responses carry a strong ETag
+built from the version, and a request whose If-None-Match still matches gets
+a 304 without touching the database or serializing anything.
+
+The counter lives in the shared cache backend, so every worker sees every
+write. With the in-memory backend a worker cannot see writes made by the
+others and would keep answering 304 to a stale tag, so catalog responses are
+sent without an ETag and with Cache-Control: no-store instead.
+"""
+from typing import Optional
+
+from fastapi import Response, status
+
+from app.core.cache import cache_io, create_backend
+from app.core.config import CATALOG_MAX_AGE
+
+# Cache-Control per kind of route
+CATALOG_CACHE_CONTROL = f"public, max-age={CATALOG_MAX_AGE}, must-revalidate"
+PRIVATE_NO_STORE = "private, no-store"
+NO_STORE = "no-store"
+
+
+class CatalogVersion:
+    """Counter bumped on every catalog write"""
+
+    KEY = "catalog:version"
+
+    def __init__(self):
+        self._backend = create_backend(16)
+
+    @property
+    def shared(self) -> bool:
+        """True when every worker reads the same counter (ETags are only sent then)"""
+        return self._backend.shared
+
+    def current(self) -> int:
+        return self._backend.get(self.KEY) or 0
+
+    def bump(self) -> None:
+        self._backend.incr(self.KEY)
+
+    def etag(self) -> str:
+        """Strong ETag for catalog data at the current version"""
+        return f'"catalog-{self.current()}"'
+
+
+catalog_version = CatalogVersion()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison, so W/"x" matches "x" """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+async def catalog_etag() -> Optional[str]:
+    """ETag for the catalog as of now, or None when workers do not share the version.
+
+    Read it before the data: if a write lands in between, the ETag is older
+    than the data and the next request just gets a fresh 200.
+    """
+    if not catalog_version.shared:
+        return None
+    return await cache_io(catalog_version.etag)
+
+
+def not_modified_response(request, response: Response, etag: Optional[str],
+                          cache_control: str = CATALOG_CACHE_CONTROL) -> Optional[Response]:
+    """Return a 304 if the client's copy is current, else tag `response`
+    (no-store when there is no ETag)"""
+    if etag is None:
+        response.headers["Cache-Control"] = NO_STORE
+        return None
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+async def check_not_modified(request, response: Response, cache_control: str = CATALOG_CACHE_CONTROL) -> Optional[Response]:
+    """Return a 304 if the client's copy is current, else tag `response`.
+
+    For routes whose 304 does not depend on the request naming an existing
+    row; see catalog_etag() and not_modified_response() for the rest.
+    """
+    return not_modified_response(request, response, await catalog_etag(), cache_control)
+
+
+def cache_control(value: str):
+    """Router dependency setting a default Cache-Control on every response"""
+    def set_cache_control(response: Response):
+        response.headers["Cache-Control"] = value
+    return set_cache_control
@@ -0,0 +1,186 @@
+"""
+Content-addressed storage for uploaded product images.
+
+Uploads are written chunk by chunk to a temporary file while being hashed,
+then renamed to ``<sha256>.<ext>``; identical uploads share one file. Keys
+never change content, so they can be cached forever by browsers and CDNs.
+
+``ImageStore`` is the interface the API uses; ``LocalImageStore`` keeps
+files on disk. Another backend (e.g. S3-compatible) only has to implement
+the same methods and be returned by ``create_image_store``.
+"""
+import glob
+import hashlib
+import os
+import re
+import tempfile
+from typing import AsyncIterator, Iterator, Optional
+
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import IMAGE_MAX_BYTES, IMAGE_STORE_URL
+
+# Leading bytes -> (content type, extension)
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", ("image/jpeg", "jpg")),
+    (b"\x89PNG\r\n\x1a\n", ("image/png", "png")),
+    (b"GIF87a", ("image/gif", "gif")),
+    (b"GIF89a", ("image/gif", "gif")),
+)
+CONTENT_TYPES = {
+    "jpg": "image/jpeg",
+    "png": "image/png",
+    "gif": "image/gif",
+    "webp": "image/webp",
+}
+# <sha256>.<ext> or <sha256>_w<width>.<ext> for a thumbnail variant
+KEY_RE = re.compile(r"^(?P<digest>[0-9a-f]{64})(?:_w(?P<width>\d+))?\.(?P<ext>jpg|png|gif|webp)$")
+
+
+def sniff_image_type(head: bytes):
+    """(content type, extension) from the file's magic bytes, or None"""
+    for signature, kind in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return kind
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ("image/webp", "webp")
+    return None
+
+
+def variant_key(key: str, width: int) -> str:
+    """Key of the thumbnail of `key` resized to `width` pixels"""
+    digest, ext = key.rsplit(".", 1)
+    return f"{digest}_w{width}.{ext}"
+
+
+class ImageStore:
+    """Interface for image storage backends"""
+
+    async def save_stream(self, chunks: AsyncIterator[bytes]) -> str:
+        """Store an uploaded image and return its key"""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def size(self, key: str) -> int:
+        raise NotImplementedError
+
+    def read_range(self, key: str, start: int, end: int, chunk_size: int = 65536) -> Iterator[bytes]:
+        """Yield bytes start..end (inclusive) of a stored image"""
+        raise NotImplementedError
+
+    def read_bytes(self, key: str) -> bytes:
+        raise NotImplementedError
+
+    def write_bytes(self, key: str, data: bytes) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """Remove an image and its thumbnail variants"""
+        raise NotImplementedError
+
+
+class LocalImageStore(ImageStore):
+    """Images on the local filesystem under root/<first two hex digits>/<key>"""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self._tmp = os.path.join(self.root, "tmp")
+
+    def path(self, key: str) -> str:
+        if not KEY_RE.match(key):
+            raise ValueError(f"Invalid image key: {key}")
+        return os.path.join(self.root, key[:2], key)
+
+    async def save_stream(self, chunks: AsyncIterator[bytes]) -> str:
+        os.makedirs(self._tmp, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self._tmp)
+        digest = hashlib.sha256()
+        size = 0
+        kind = None
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    if kind is None:
+                        kind = sniff_image_type(chunk[:16])
+                        if kind is None:
+                            raise HTTPException(
+                                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                                detail="Unsupported image type (expected JPEG, PNG, GIF or WebP)"
+                            )
+                    size += len(chunk)
+                    if size > IMAGE_MAX_BYTES:
+                        raise HTTPException(
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"Image larger than {IMAGE_MAX_BYTES} bytes"
+                        )
+                    digest.update(chunk)
+                    await run_in_threadpool(tmp_file.write, chunk)
+            if kind is None:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty image upload")
+
+            key = f"{digest.hexdigest()}.{kind[1]}"
+            final_path = self.path(key)
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            if os.path.exists(final_path):
+                os.remove(tmp_path)  # same content already stored
+            else:
+                os.replace(tmp_path, final_path)
+            return key
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def size(self, key: str) -> int:
+        return os.path.getsize(self.path(key))
+
+    def read_range(self, key: str, start: int, end: int, chunk_size: int = 65536) -> Iterator[bytes]:
+        with open(self.path(key), "rb") as image_file:
+            image_file.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = image_file.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def read_bytes(self, key: str) -> bytes:
+        with open(self.path(key), "rb") as image_file:
+            return image_file.read()
+
+    def write_bytes(self, key: str, data: bytes) -> None:
+        final_path = self.path(key)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(final_path))
+        with os.fdopen(fd, "wb") as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_path, final_path)
+
+    def delete(self, key: str) -> None:
+        digest, ext = key.rsplit(".", 1)
+        original = self.path(key)
+        for path in [original] + glob.glob(os.path.join(os.path.dirname(original), f"{digest}_w*.{ext}")):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def create_image_store(url: Optional[str] = None) -> ImageStore:
+    """Store for IMAGE_STORE_URL; only file:// (local disk) is built in"""
+    url = url or IMAGE_STORE_URL
+    if url.startswith("file://"):
+        return LocalImageStore(url[len("file://"):])
+    raise ValueError(f"Unsupported IMAGE_STORE_URL: {url}")
+
+
+image_store = create_image_store()
@@ -0,0 +1,339 @@
+"""
+Background job queue persisted in the jobs table.
+
+Work that does not have to finish before a response is sent (order
+confirmation mail, low-stock alerts, sales rollups) is enqueued as a row in
+the same transaction as the data it is about, so a job exists if and only
+if its order was committed, and pending jobs survive restarts:
+
+    job_queue.enqueue(db, "order_confirmation", {"order_id": order.id})
+    db.commit()
+
+Jobs are run by JOB_WORKERS asyncio workers in every API process (1 by
+default) and by any separate ``python -m app.core.jobs run`` processes;
+JOB_WORKERS=0 leaves them to the latter. A worker claims a due job with a
+conditional UPDATE, so any number of processes can share the table, and runs
+its handler in a thread with a fresh session. The handler's writes commit
+together with the job's "done" mark; a handler that raises is retried with
+exponential backoff and moved to the dead-letter state ("dead") after
+max_attempts. Jobs whose worker died are claimed again once their lease
+(JOB_LEASE) runs out. An API process without workers watches for pending
+jobs that stay overdue and warns that nothing is running them.
+
+Handlers are registered per kind:
+
+    @job_queue.handler("order_confirmation")
+    def send_order_confirmation(db, payload): ...
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import JOB_BACKOFF_BASE, JOB_BACKOFF_MAX, JOB_LEASE, JOB_MAX_ATTEMPTS, JOB_STALL_WARNING
+from app.core.metrics import jobs_processed
+from app.Models.Job import Job
+
+logger = logging.getLogger(__name__)
+
+# Due jobs read per claim attempt; the first one this worker wins is run
+CLAIM_CANDIDATES = 5
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class JobQueue:
+    """Handler registry plus the enqueue, claim and run steps of the queue"""
+
+    def __init__(self, max_attempts: int = JOB_MAX_ATTEMPTS, lease: float = JOB_LEASE,
+                 backoff_base: float = JOB_BACKOFF_BASE, backoff_max: float = JOB_BACKOFF_MAX):
+        self.handlers: Dict[str, Callable[[Session, dict], None]] = {}
+        self.max_attempts = max_attempts
+        self.lease = lease
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.retried = 0
+        self.dead = 0
+
+    def handler(self, kind: str):
+        """Decorator registering ``fn(db, payload)`` as the handler for ``kind``"""
+        def register(fn):
+            self.handlers[kind] = fn
+            return fn
+        return register
+
+    # Producers
+
+    def enqueue(self, db: Session, kind: str, payload: dict, delay: float = 0) -> None:
+        """Add one job to the caller's transaction (committed with it)"""
+        self.enqueue_many(db, [(kind, payload)], delay)
+
+    def enqueue_many(self, db: Session, jobs: List[Tuple[str, dict]], delay: float = 0) -> None:
+        """Add (kind, payload) jobs with one INSERT in the caller's transaction"""
+        if not jobs:
+            return
+        run_at = utcnow() + timedelta(seconds=delay)
+        db.execute(insert(Job), [
+            {
+                "kind": kind,
+                "payload": json.dumps(payload),
+                "status": "pending",
+                "attempts": 0,
+                "max_attempts": self.max_attempts,
+                "run_at": run_at,
+            }
+            for kind, payload in jobs
+        ])
+
+    # Workers
+
+    def backoff(self, attempts: int) -> float:
+        """Seconds before retry number ``attempts``, with +-20% jitter"""
+        delay = min(self.backoff_base * 2 ** (attempts - 1), self.backoff_max)
+        return delay * random.uniform(0.8, 1.2)
+
+    def claim(self, db: Session) -> Optional[Job]:
+        """Claim one due job for this worker, or None if nothing is due"""
+        now = utcnow()
+        due = or_(
+            and_(Job.status == "pending", Job.run_at <= now),
+            and_(Job.status == "running", Job.locked_until <= now),  # lease ran out
+        )
+        candidates = db.execute(
+            select(Job.id, Job.attempts, Job.max_attempts)
+            .where(due)
+            .order_by(Job.run_at)
+            .limit(CLAIM_CANDIDATES)
+        ).all()
+        for job_id, attempts, max_attempts in candidates:
+            # attempts doubles as a version: only one worker's UPDATE matches
+            claimed = and_(Job.id == job_id, Job.attempts == attempts, due)
+            if attempts >= max_attempts:
+                # Its worker died on the last attempt
+                db.execute(
+                    update(Job).where(claimed)
+                    .values(status="dead", locked_until=None, finished_at=now,
+                            last_error="Worker lost the job (lease expired)")
+                )
+                db.commit()
+                continue
+            won = db.execute(
+                update(Job).where(claimed)
+                .values(status="running", attempts=attempts + 1,
+                        locked_until=now + timedelta(seconds=self.lease))
+            ).rowcount == 1
+            db.commit()
+            if won:
+                return db.get(Job, job_id)
+        return None
+
+    def run(self, db: Session, job: Job) -> bool:
+        """Run a claimed job; True if it completed"""
+        # Plain copies: the instance expires on rollback
+        job_id, kind, attempts, max_attempts = job.id, job.kind, job.attempts, job.max_attempts
+        owned = and_(Job.id == job_id, Job.status == "running", Job.attempts == attempts)
+        try:
+            handler = self.handlers.get(kind)
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind '{kind}'")
+            handler(db, json.loads(job.payload))
+            # The handler's writes and the done mark commit together
+            done = db.execute(
+                update(Job).where(owned)
+                .values(status="done", locked_until=None, last_error=None, finished_at=utcnow())
+            ).rowcount == 1
+            if not done:
+                # Lease ran out and another worker claimed the job; let it finish
+                db.rollback()
+                return False
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            error = f"{type(e).__name__}: {e}"
+            if attempts >= max_attempts:
+                values = {"status": "dead", "locked_until": None, "finished_at": utcnow()}
+                outcome = "dead"
+                logger.warning("Job %s (%s) dead after %s attempt(s): %s", job_id, kind, attempts, error)
+            else:
+                values = {"status": "pending", "locked_until": None,
+                          "run_at": utcnow() + timedelta(seconds=self.backoff(attempts))}
+                outcome = "retried"
+                logger.warning("Job %s (%s) failed, attempt %s/%s: %s", job_id, kind, attempts, max_attempts, error)
+            db.execute(update(Job).where(owned).values(last_error=error[:2000], **values))
+            db.commit()
+            with self._lock:
+                setattr(self, outcome, getattr(self, outcome) + 1)
+            jobs_processed.inc(kind=kind, outcome=outcome)
+            return False
+        with self._lock:
+            self.completed += 1
+        jobs_processed.inc(kind=kind, outcome="completed")
+        return True
+
+    def run_next(self) -> bool:
+        """Claim and run one due job in a fresh session; False if none was due"""
+        from database import SessionLocal
+        db = SessionLocal()
+        try:
+            job = self.claim(db)
+            if job is None:
+                return False
+            self.run(db, job)
+            return True
+        finally:
+            db.close()
+
+    # Admin
+
+    def overdue(self, db: Session, older_than: float) -> int:
+        """Pending jobs that have been due for more than ``older_than`` seconds"""
+        cutoff = utcnow() - timedelta(seconds=older_than)
+        return db.scalar(
+            select(func.count()).select_from(Job).where(Job.status == "pending", Job.run_at <= cutoff)
+        )
+
+    def stats(self, db: Session) -> dict:
+        counts = dict(db.execute(select(Job.status, func.count()).group_by(Job.status)).all())
+        return {
+            "jobs": {name: counts.get(name, 0) for name in ("pending", "running", "done", "dead")},
+            # Nonzero means no worker is keeping up (or none is running)
+            "overdue": self.overdue(db, JOB_STALL_WARNING),
+            "handlers": sorted(self.handlers),
+            # This process only
+            "completed": self.completed,
+            "retried": self.retried,
+            "dead": self.dead,
+        }
+
+    def dead_letters(self, db: Session, limit: int = 50) -> List[dict]:
+        """Most recently failed dead jobs"""
+        rows = db.execute(
+            select(Job.id, Job.kind, Job.payload, Job.attempts, Job.last_error, Job.created_at, Job.finished_at)
+            .where(Job.status == "dead")
+            .order_by(Job.finished_at.desc(), Job.id.desc())
+            .limit(limit)
+        ).all()
+        return [dict(row._mapping, payload=json.loads(row.payload)) for row in rows]
+
+    def retry(self, db: Session, job_id: int) -> None:
+        """Move a dead job back to pending with a fresh set of attempts"""
+        retried = db.execute(
+            update(Job).where(Job.id == job_id, Job.status == "dead")
+            .values(status="pending", attempts=0, run_at=utcnow(), finished_at=None)
+        ).rowcount
+        if not retried:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Dead job not found"
+            )
+        db.commit()
+
+    def purge(self, db: Session, older_than_days: float) -> int:
+        """Delete done jobs finished more than ``older_than_days`` ago"""
+        cutoff = utcnow() - timedelta(days=older_than_days)
+        deleted = db.execute(delete(Job).where(Job.status == "done", Job.finished_at < cutoff)).rowcount
+        db.commit()
+        return deleted
+
+
+job_queue = JobQueue()
+
+
+async def run_job_worker(poll_interval: float) -> None:
+    """Run due jobs one at a time in a threadpool thread until cancelled"""
+    while True:
+        try:
+            ran = await run_in_threadpool(job_queue.run_next)
+        except Exception as e:
+            logger.warning("Job worker error: %s", e)
+            ran = False
+        if not ran:
+            await asyncio.sleep(poll_interval)
+
+
+def report_unattended_jobs(older_than: float) -> int:
+    """Warn about pending jobs overdue by more than ``older_than`` seconds; returns how many"""
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        overdue = job_queue.overdue(db, older_than)
+    finally:
+        db.close()
+    if overdue:
+        logger.warning(
+            "%s background job(s) overdue by more than %gs and this process runs no job workers "
+            "(JOB_WORKERS=0); start `python -m app.core.jobs run` or set JOB_WORKERS", overdue, older_than
+        )
+    return overdue
+
+
+async def watch_unattended_jobs(interval: float) -> None:
+    """Check for overdue jobs now and every ``interval`` seconds until cancelled"""
+    while True:
+        try:
+            await run_in_threadpool(report_unattended_jobs, interval)
+        except Exception as e:
+            logger.warning("Job watchdog error: %s", e)
+        await asyncio.sleep(interval)
+
+
+def main():
+    from app.core import order_jobs  # noqa: F401 (registers the handlers)
+    from app.core.config import JOB_POLL_INTERVAL, JOB_WORKERS
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Background job queue")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    run_parser = subcommands.add_parser("run", help="Run job workers in this process")
+    run_parser.add_argument("--workers", type=int, default=JOB_WORKERS or 2)
+    subcommands.add_parser("status", help="Job counts by status and the latest dead jobs")
+    retry_parser = subcommands.add_parser("retry", help="Requeue a dead job")
+    retry_parser.add_argument("job_id", type=int)
+    purge_parser = subcommands.add_parser("purge", help="Delete old finished jobs")
+    purge_parser.add_argument("--days", type=float, default=7)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        async def run_workers():
+            await asyncio.gather(*(run_job_worker(JOB_POLL_INTERVAL) for _ in range(args.workers)))
+        print(f"Running {args.workers} job worker(s)")
+        try:
+            asyncio.run(run_workers())
+        except KeyboardInterrupt:
+            pass
+        return
+
+    db = SessionLocal()
+    try:
+        if args.command == "status":
+            print(json.dumps(job_queue.stats(db)["jobs"]))
+            for job in job_queue.dead_letters(db, limit=20):
+                print(f"  dead {job['id']} {job['kind']} after {job['attempts']} attempt(s): {job['last_error']}")
+        elif args.command == "retry":
+            try:
+                job_queue.retry(db, args.job_id)
+            except HTTPException as e:
+                raise SystemExit(e.detail)
+            print(f"Job {args.job_id} requeued")
+        else:
+            print(f"{job_queue.purge(db, args.days)} finished job(s) deleted")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import threading
+import time
+
+from app.core.pool_metrics import render_pool_metrics
+
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    """Base for in-process metrics; one sample per label combination"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._values = {}
+        if not labels and self.kind != "histogram":
+            # Unlabelled counters/gauges are exported as 0 before first use
+            self._values[()] = 0
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def samples(self) -> list:
+        with self._lock:
+            return [
+                f"{self.name}{_format_labels(self.labels, key)} {value}"
+                for key, value in sorted(self._values.items())
+            ]
+
+    def render(self) -> list:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"] + self.samples()
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = buckets
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # Per-bucket counts (non-cumulative), sum, count
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self) -> list:
+        lines = []
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labels, key, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                inf_labels = _format_labels(self.labels, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{inf_labels} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric of this process and renders them for /metrics"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: tuple = ()) -> Counter:
+        return self.register(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: tuple = ()) -> Gauge:
+        return self.register(Gauge(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def render(self) -> str:
+        """All metrics (plus connection pool metrics) in Prometheus text format"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n" + render_pool_metrics()
+
+
+registry = MetricsRegistry()
+
+# HTTP metrics, labelled by route template (not raw path) to keep cardinality bounded
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route")
+)
+# The route is only known after routing, so in-flight requests are per method
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled", ("method",)
+)
+http_responses = registry.counter(
+    "http_responses_total", "HTTP responses by status code", ("method", "route", "status")
+)
+http_errors = registry.counter(
+    "http_errors_total", "HTTP responses with a 4xx/5xx status code", ("method", "route", "status")
+)
+
+# Business counters
+orders_created = registry.counter("orders_created_total", "Orders placed")
+cart_adds = registry.counter("cart_adds_total", "Products added to a cart")
+login_failures = registry.counter("login_failures_total", "Rejected login attempts")
+jobs_processed = registry.counter(
+    "jobs_processed_total", "Background jobs run, by kind and outcome (completed/retried/dead)", ("kind", "outcome")
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, in-flight requests and status codes per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        start = time.perf_counter()
+        status_code = 500
+        http_requests_in_flight.inc(method=method)
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec(method=method)
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            http_request_duration.observe(time.perf_counter() - start, method=method, route=route_path)
+            http_responses.inc(method=method, route=route_path, status=status_code)
+            if status_code >= 400:
+                http_errors.inc(method=method, route=route_path, status=status_code)
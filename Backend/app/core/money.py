@@ -0,0 +1,28 @@
+"""
+Money arithmetic in integer cents.
+
+Prices and totals are stored as whole cents (BIGINT) and summed as Python
+ints, so repeated additions never drift the way float sums do. The API
+keeps exposing amounts as decimal numbers; conversion happens only at the
+edges, through these helpers.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Optional, Union
+
+CENT = Decimal("0.01")
+
+
+def to_cents(amount: Union[int, float, str, Decimal]) -> int:
+    """Decimal amount (e.g. 19.99) -> cents (1999), rounding half up.
+
+    Floats go through their shortest repr, so 19.99 is read as "19.99" and
+    not as the nearest binary fraction below it.
+    """
+    if isinstance(amount, float):
+        amount = repr(amount)
+    return int(Decimal(amount).quantize(CENT, rounding=ROUND_HALF_UP) * 100)
+
+
+def from_cents(cents: Optional[int]) -> Optional[float]:
+    """Cents -> decimal amount as a float for JSON (None stays None)"""
+    return None if cents is None else cents / 100
@@ -0,0 +1,148 @@
+"""
+Post-order work run by the job queue (see app/core/jobs.py).
+
+_place_order enqueues these in the order's transaction, so checkout only
+pays for the INSERT; mail and rollups happen on the workers:
+
+  order_confirmation  mail the customer a summary of the order
+  low_stock_alert     report products whose stock fell to LOW_STOCK_THRESHOLD
+  sales_rollup        add the order to daily_product_sales
+
+Mail is at-least-once (a retry after a failed commit sends it again) and is
+only logged while SMTP_HOST is unset; the rollup commits with the job's done
+mark, so each order is counted once.
+"""
+import logging
+import smtplib
+from datetime import date, datetime, timezone
+from email.message import EmailMessage
+from typing import List
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    INVENTORY_ALERT_EMAIL, LOW_STOCK_THRESHOLD, MAIL_FROM, SMTP_HOST, SMTP_PORT, SMTP_TIMEOUT,
+)
+from app.core.jobs import job_queue
+from app.core.money import from_cents
+from app.Models.DailySales import DailySales
+from app.Models.Order import Orders
+from app.Models.Orderitem import OrderItem
+from app.Models.Product import Product
+from app.Models.User import User
+
+logger = logging.getLogger(__name__)
+
+
+def post_order_jobs(order_id: int, low_stock_ids: List[int]) -> list:
+    """The (kind, payload) jobs to enqueue for a new order"""
+    jobs = [
+        ("order_confirmation", {"order_id": order_id}),
+        ("sales_rollup", {"order_id": order_id}),
+    ]
+    if low_stock_ids:
+        jobs.append(("low_stock_alert", {"product_ids": low_stock_ids}))
+    return jobs
+
+
+def send_mail(to: str, subject: str, body: str) -> None:
+    """Send a plain-text mail through SMTP_HOST:SMTP_PORT (errors propagate for retry)"""
+    if not SMTP_HOST:
+        logger.warning("Mail to %s not sent (SMTP_HOST unset): %s\n%s", to, subject, body)
+        return
+    message = EmailMessage()
+    message["From"] = MAIL_FROM
+    message["To"] = to
+    message["Subject"] = subject
+    message.set_content(body)
+    with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT) as smtp:
+        smtp.send_message(message)
+
+
+def _order_lines(db: Session, order_id: int):
+    return db.execute(
+        select(OrderItem.product_id, OrderItem.quantity, OrderItem.price_cents, Product.name)
+        .join(Product, Product.id == OrderItem.product_id)
+        .where(OrderItem.order_id == order_id)
+        .order_by(OrderItem.id)
+    ).all()
+
+
+@job_queue.handler("order_confirmation")
+def send_order_confirmation(db: Session, payload: dict) -> None:
+    order = db.execute(
+        select(Orders.id, Orders.total_cents, User.email)
+        .join(User, User.id == Orders.user_id)
+        .where(Orders.id == payload["order_id"])
+    ).first()
+    if order is None:
+        logger.warning("Order %s no longer exists, confirmation skipped", payload["order_id"])
+        return
+
+    lines = [
+        f"  {line.quantity} x {line.name} @ {from_cents(line.price_cents):.2f}"
+        for line in _order_lines(db, order.id)
+    ]
+    body = "\n".join([
+        "Thank you for your order!",
+        "",
+        f"Order #{order.id}",
+        *lines,
+        "",
+        f"Total: {from_cents(order.total_cents):.2f}",
+    ])
+    send_mail(order.email, f"Order #{order.id} confirmation", body)
+
+
+@job_queue.handler("low_stock_alert")
+def send_low_stock_alert(db: Session, payload: dict) -> None:
+    # Stock may have been refilled since the order; report current levels only
+    products = db.execute(
+        select(Product.id, Product.name, Product.quantity)
+        .where(Product.id.in_(payload["product_ids"]), Product.quantity <= LOW_STOCK_THRESHOLD)
+        .order_by(Product.id)
+    ).all()
+    if not products:
+        return
+
+    body = "\n".join(f"  #{p.id} {p.name}: {p.quantity} left" for p in products)
+    if INVENTORY_ALERT_EMAIL:
+        send_mail(INVENTORY_ALERT_EMAIL, f"Low stock: {len(products)} product(s)", body)
+    else:
+        logger.warning("Low stock (<= %s):\n%s", LOW_STOCK_THRESHOLD, body)
+
+
+def utc_day(moment: datetime) -> date:
+    """The UTC date of a timestamp; naive values are UTC already (SQLite CURRENT_TIMESTAMP)"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.date()
+
+
+@job_queue.handler("sales_rollup")
+def add_order_to_rollup(db: Session, payload: dict) -> None:
+    order = db.execute(
+        select(Orders.id, Orders.created_at).where(Orders.id == payload["order_id"])
+    ).first()
+    if order is None:
+        return
+
+    # Same calendar as GET /api/admin/sales, whatever the database session's time zone
+    day = utc_day(order.created_at)
+    for line in _order_lines(db, order.id):
+        revenue = line.price_cents * line.quantity
+        updated = db.execute(
+            update(DailySales)
+            .where(DailySales.day == day, DailySales.product_id == line.product_id)
+            .values(
+                units=DailySales.units + line.quantity,
+                revenue_cents=DailySales.revenue_cents + revenue,
+                orders=DailySales.orders + 1,
+            )
+        ).rowcount
+        if not updated:
+            # A concurrent first insert makes this fail; the job is then retried
+            db.execute(insert(DailySales).values(
+                day=day, product_id=line.product_id, units=line.quantity, revenue_cents=revenue, orders=1,
+            ))
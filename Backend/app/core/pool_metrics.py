@@ -0,0 +1,172 @@
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+# Upper bounds (seconds) of the checkout wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+
+class PoolMetrics:
+    """Counters for one connection pool: checkouts, waits, timeouts and churn"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool = None
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_buckets = [0] * len(WAIT_BUCKETS)
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            for i, bound in enumerate(WAIT_BUCKETS):
+                if seconds <= bound:
+                    self.wait_buckets[i] += 1
+                    break
+            if timed_out:
+                self.timeouts += 1
+
+    def _count(self, attribute: str):
+        with self._lock:
+            setattr(self, attribute, getattr(self, attribute) + 1)
+
+    def attach(self, pool):
+        """Listen to pool events; connects/closes are the connection churn"""
+        self.pool = pool
+        event.listen(pool, "checkout", lambda *args: self._count("checkouts"))
+        event.listen(pool, "checkin", lambda *args: self._count("checkins"))
+        event.listen(pool, "connect", lambda *args: self._count("connects"))
+        event.listen(pool, "close", lambda *args: self._count("closes"))
+        event.listen(pool, "invalidate", lambda *args: self._count("invalidations"))
+        if isinstance(pool, InstrumentedPoolMixin):
+            pool.metrics = self
+
+    def snapshot(self) -> dict:
+        """Current pool occupancy plus cumulative counters"""
+        pool = self.pool
+        with self._lock:
+            data = {
+                "name": self.name,
+                "pool_class": type(pool).__name__ if pool is not None else None,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "closes": self.closes,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_count": self.wait_count,
+                "wait_total_ms": round(self.wait_total * 1000, 3),
+                "wait_avg_ms": round(self.wait_total * 1000 / self.wait_count, 3) if self.wait_count else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+                "wait_buckets": {
+                    str(bound): count for bound, count in zip(WAIT_BUCKETS, self.wait_buckets)
+                },
+            }
+        if isinstance(pool, QueuePool):
+            data.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+            })
+        return data
+
+
+class InstrumentedPoolMixin:
+    """Times how long each checkout waits for a free connection"""
+
+    metrics = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            if self.metrics is not None:
+                self.metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        if self.metrics is not None:
+            self.metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # Event listeners are carried over by SQLAlchemy; only re-point the metrics
+        new_pool = super().recreate()
+        new_pool.metrics = self.metrics
+        if self.metrics is not None:
+            self.metrics.pool = new_pool
+        return new_pool
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+# One entry per engine created in database.py
+pool_metrics = {}
+
+
+def render_pool_metrics() -> str:
+    """Pool metrics in the Prometheus text exposition format"""
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+
+    snapshots = [metrics.snapshot() for metrics in pool_metrics.values()]
+    gauges = [
+        ("db_pool_size", "size", "Configured pool size"),
+        ("db_pool_checked_out", "checked_out", "Connections currently checked out"),
+        ("db_pool_idle", "idle", "Idle connections in the pool"),
+        ("db_pool_overflow", "overflow", "Connections above pool size"),
+    ]
+    for name, key, help_text in gauges:
+        metric(name, "gauge", help_text, [
+            f'{name}{{pool="{s["name"]}"}} {s[key]}' for s in snapshots if key in s
+        ])
+
+    counters = [
+        ("db_pool_checkouts_total", "checkouts", "Connection checkouts"),
+        ("db_pool_connects_total", "connects", "New DBAPI connections opened"),
+        ("db_pool_closes_total", "closes", "DBAPI connections closed"),
+        ("db_pool_invalidations_total", "invalidations", "Connections invalidated"),
+        ("db_pool_timeouts_total", "timeouts", "Checkouts that hit the pool timeout"),
+    ]
+    for name, key, help_text in counters:
+        metric(name, "counter", help_text, [f'{name}{{pool="{s["name"]}"}} {s[key]}' for s in snapshots])
+
+    samples = []
+    for metrics in pool_metrics.values():
+        with metrics._lock:
+            cumulative = 0
+            for bound, count in zip(WAIT_BUCKETS, metrics.wait_buckets):
+                cumulative += count
+                samples.append(f'db_pool_wait_seconds_bucket{{pool="{metrics.name}",le="{bound}"}} {cumulative}')
+            samples.append(f'db_pool_wait_seconds_bucket{{pool="{metrics.name}",le="+Inf"}} {metrics.wait_count}')
+            samples.append(f'db_pool_wait_seconds_sum{{pool="{metrics.name}"}} {metrics.wait_total}')
+            samples.append(f'db_pool_wait_seconds_count{{pool="{metrics.name}"}} {metrics.wait_count}')
+    metric("db_pool_wait_seconds", "histogram", "Time spent waiting for a pooled connection", samples)
+
+    return "\n".join(lines) + "\n"
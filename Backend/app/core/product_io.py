@@ -0,0 +1,127 @@
+"""
+Streaming parsers and writers for bulk product import/export.
+
+Uploads are read chunk by chunk and handed on in batches of records, so
+memory use is bounded by the batch size rather than the file size. Exports
+are written a batch of rows at a time as they are read from the database.
+"""
+import codecs
+import csv
+import io
+import json
+from typing import AsyncIterator, List, Sequence, Tuple, Union
+
+# Column order of exports; also the accepted import columns (id is ignored)
+PRODUCT_EXPORT_FIELDS = ("id", "sku", "name", "description", "price", "quantity", "image_url", "featured")
+FORMATS = ("csv", "ndjson")
+
+# (line number, field dict) or (line number, error) for a row that failed to parse
+Record = Tuple[int, Union[dict, Exception]]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream as UTF-8 (BOM tolerated) and yield lines with their newline"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        # The last piece may be an incomplete line; keep it for the next chunk
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def _clean(value):
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def _parse_csv_batch(header: List[str], lines: List[str], first_line: int) -> List[Record]:
+    records = []
+    reader = csv.reader(lines)
+    line_number = first_line
+    for row in reader:
+        if not any(field.strip() for field in row):
+            line_number = first_line + reader.line_num
+            continue
+        if len(row) > len(header):
+            records.append((line_number, ValueError(f"expected {len(header)} columns, got {len(row)}")))
+        else:
+            records.append((line_number, {key: _clean(value) for key, value in zip(header, row)}))
+        line_number = first_line + reader.line_num
+    return records
+
+
+async def iter_csv_batches(lines: AsyncIterator[str], batch_size: int) -> AsyncIterator[List[Record]]:
+    """Batches of CSV records; the first record is the header row.
+
+    A batch only ends where the quote count is even, so quoted fields that
+    span lines are never split between batches.
+    """
+    header = None
+    batch_lines, batch_rows, first_line, line_number = [], 0, 2, 0
+    in_quotes = False
+    async for line in lines:
+        line_number += 1
+        if header is None:
+            header = [field.strip().lower() for field in next(csv.reader([line]))]
+            continue
+        batch_lines.append(line)
+        if line.count('"') % 2:
+            in_quotes = not in_quotes
+        if in_quotes:
+            continue
+        batch_rows += 1
+        if batch_rows >= batch_size:
+            yield _parse_csv_batch(header, batch_lines, first_line)
+            batch_lines, batch_rows, first_line = [], 0, line_number + 1
+    if batch_lines:
+        yield _parse_csv_batch(header, batch_lines, first_line)
+
+
+async def iter_ndjson_batches(lines: AsyncIterator[str], batch_size: int) -> AsyncIterator[List[Record]]:
+    """Batches of NDJSON records, one JSON object per line"""
+    batch, line_number = [], 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("expected a JSON object")
+            batch.append((line_number, {key.lower(): _clean(value) for key, value in record.items()}))
+        except ValueError as e:
+            batch.append((line_number, e))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_record_batches(chunks: AsyncIterator[bytes], fmt: str, batch_size: int) -> AsyncIterator[List[Record]]:
+    lines = iter_lines(chunks)
+    if fmt == "csv":
+        return iter_csv_batches(lines, batch_size)
+    return iter_ndjson_batches(lines, batch_size)
+
+
+def csv_header() -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(PRODUCT_EXPORT_FIELDS)
+    return buffer.getvalue()
+
+
+def encode_rows(rows: Sequence[tuple], fmt: str) -> str:
+    """Serialize rows (in PRODUCT_EXPORT_FIELDS order) as CSV or NDJSON text"""
+    if fmt == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
+    return "".join(json.dumps(dict(zip(PRODUCT_EXPORT_FIELDS, row))) + "\n" for row in rows)
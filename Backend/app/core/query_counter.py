@@ -0,0 +1,48 @@
+from contextlib import contextmanager
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from database import engine, async_engine
+
+# The engine the routers use; async engines expose events on their sync_engine
+default_engine = async_engine.sync_engine if async_engine is not None else engine
+
+
+class QueryCounter:
+    """
+    Counts SQL statements executed on an engine while active.
+
+    Usage:
+        with QueryCounter() as counter:
+            client.get("/api/cart")
+        print(counter.count, counter.statements)
+    """
+
+    def __init__(self, engine: Optional[Engine] = None):
+        self.engine = engine or default_engine
+        self.count = 0
+        self.statements: List[str] = []
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        event.remove(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        return False
+
+
+@contextmanager
+def assert_max_queries(limit: int, engine: Optional[Engine] = None):
+    """Fail with the executed statements if the block runs more than `limit` queries"""
+    with QueryCounter(engine) as counter:
+        yield counter
+    if counter.count > limit:
+        executed = "\n".join(f"  {i + 1}. {sql}" for i, sql in enumerate(counter.statements))
+        raise AssertionError(f"Expected at most {limit} queries, got {counter.count}:\n{executed}")
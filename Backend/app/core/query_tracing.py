@@ -0,0 +1,143 @@
+import json
+import logging
+import sys
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import REQUEST_LOG_ENABLED, SLOW_QUERY_LOG_FILE, SLOW_QUERY_MS
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats each record's `fields` dict as a single JSON line"""
+
+    def format(self, record):
+        data = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+        }
+        data.update(getattr(record, "fields", {"message": record.getMessage()}))
+        return json.dumps(data, default=str)
+
+
+def _json_logger(name: str, filename: Optional[str] = None) -> logging.Logger:
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        handler = logging.FileHandler(filename) if filename else logging.StreamHandler(sys.stderr)
+        handler.setFormatter(JSONFormatter())
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+request_logger = _json_logger("app.requests")
+slow_query_logger = _json_logger("app.slow_queries", SLOW_QUERY_LOG_FILE)
+
+
+class RequestTrace:
+    """SQL statistics collected for one request"""
+
+    __slots__ = ("query_count", "db_time", "slowest_time", "slowest_statement")
+
+    def __init__(self):
+        self.query_count = 0
+        self.db_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+
+    def add(self, statement: str, duration: float):
+        self.query_count += 1
+        self.db_time += duration
+        if duration > self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_statement = statement
+
+
+# Trace of the request being handled; copied into threadpool workers and
+# SQLAlchemy's async greenlets, so statements land on the right request
+current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("current_trace", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start_time"].pop()
+
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add(statement, duration)
+
+    if duration * 1000 >= SLOW_QUERY_MS:
+        slow_query_logger.warning("slow query", extra={"fields": {
+            "event": "slow_query",
+            "duration_ms": round(duration * 1000, 3),
+            "statement": statement,
+            "parameters": repr(parameters)[:2000],
+            "executemany": executemany,
+        }})
+
+
+def install_query_tracing(engine: Engine):
+    """Attach the timing hooks to an engine (use async_engine.sync_engine for async)"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryTracingMiddleware:
+    """
+    ASGI middleware that traces the SQL issued by each HTTP request.
+
+    Adds a `Server-Timing` header (total, db time, query count) to every
+    response and logs one JSON line per request with the slowest statement.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace()
+        token = current_trace.set(trace)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                total_ms = (time.perf_counter() - start) * 1000
+                header = (
+                    f'app;dur={total_ms:.2f}, '
+                    f'db;dur={trace.db_time * 1000:.2f};desc="{trace.query_count} queries"'
+                )
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"server-timing", header.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_trace.reset(token)
+            if REQUEST_LOG_ENABLED:
+                request_logger.info("request", extra={"fields": {
+                    "event": "request",
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status_code,
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                    "db_queries": trace.query_count,
+                    "db_time_ms": round(trace.db_time * 1000, 3),
+                    "slowest_query_ms": round(trace.slowest_time * 1000, 3),
+                    "slowest_query": trace.slowest_statement,
+                }})
@@ -0,0 +1,153 @@
+"""
+Bulk check of the running money totals.
+
+Orders.total_cents and each cart document's total_cents are maintained by
+applying deltas as lines change, never by re-summing on read. This job
+re-sums the lines in bulk and reports (or, with fix, corrects) totals that
+drifted:
+
+    cd Backend
+    python -m app.core.reconcile [--fix]
+
+Carts are checked in the carts table. With a write-behind cart store
+(CART_STORE=cache/memory) the API worker flushes its pending carts before
+GET /api/admin/reconcile checks them; edits other workers have not flushed
+yet (at most CART_FLUSH_INTERVAL seconds old) are checked on the next run.
+Cart fixes go through the store and are flushed to the table before
+reconcile() returns.
+"""
+import argparse
+import json
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.cart_store import cart_store
+from app.Models.Cart import Cart
+from app.Models.Order import Orders
+from app.Models.Orderitem import OrderItem
+
+# Orders / carts read per query
+BATCH_SIZE = 1000
+# Mismatches listed in the report (all of them are counted and fixed)
+REPORT_LIMIT = 50
+
+
+def order_mismatches(db: Session, batch_size: int = BATCH_SIZE):
+    """Yield (order id, stored total, sum of lines) for orders whose total is off"""
+    lines_total = func.sum(OrderItem.price_cents * OrderItem.quantity)
+    after_id = 0
+    while True:
+        rows = db.execute(
+            select(Orders.id, Orders.total_cents, lines_total)
+            .join(OrderItem, OrderItem.order_id == Orders.id)
+            .where(Orders.id > after_id)
+            .group_by(Orders.id, Orders.total_cents)
+            .order_by(Orders.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return
+        for order_id, stored, expected in rows:
+            if stored != expected:
+                yield order_id, stored, expected
+        after_id = rows[-1][0]
+
+
+def cart_mismatches(db: Session, batch_size: int = BATCH_SIZE):
+    """Yield (user id, stored total, sum of lines) for persisted carts whose total is off"""
+    after_id = 0
+    while True:
+        rows = db.execute(
+            select(Cart.user_id, Cart.data)
+            .where(Cart.user_id > after_id)
+            .order_by(Cart.user_id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return
+        for user_id, data in rows:
+            cart = json.loads(data)
+            expected = sum(line["price_cents"] * line["quantity"] for line in cart["lines"])
+            if cart["total_cents"] != expected:
+                yield user_id, cart["total_cents"], expected
+        after_id = rows[-1][0]
+
+
+def recompute_total(cart: dict) -> None:
+    cart["total_cents"] = sum(line["price_cents"] * line["quantity"] for line in cart["lines"])
+
+
+def reconcile(db: Session, fix: bool = False, batch_size: int = BATCH_SIZE) -> dict:
+    """
+    Compare stored order and cart totals with the sum of their lines.
+
+    Args:
+        db: Database session
+        fix: Overwrite wrong totals with the sum of the lines
+        batch_size: Orders / carts read per query
+
+    Returns:
+        dict: Rows checked, mismatch counts and the first mismatches found
+    """
+    orders = list(order_mismatches(db, batch_size))
+    carts = list(cart_mismatches(db, batch_size))
+
+    if fix and orders:
+        for start in range(0, len(orders), batch_size):
+            db.execute(
+                update(Orders),
+                [{"id": order_id, "total_cents": expected} for order_id, _, expected in orders[start:start + batch_size]],
+            )
+        db.commit()
+    if fix:
+        # Through the store so the fix is versioned like any other cart write
+        for user_id, _, _ in carts:
+            cart_store.update(db, user_id, recompute_total)
+        if carts and cart_store.write_behind:
+            # A write-behind store only buffers the fix; this process may exit next
+            cart_store.flush(db)
+
+    return {
+        "orders_checked": db.scalar(select(func.count()).select_from(Orders)),
+        "carts_checked": db.scalar(select(func.count()).select_from(Cart)),
+        "order_mismatches": len(orders),
+        "cart_mismatches": len(carts),
+        "fixed": fix,
+        "orders": [
+            {"id": order_id, "total_cents": stored, "lines_cents": expected}
+            for order_id, stored, expected in orders[:REPORT_LIMIT]
+        ],
+        "carts": [
+            {"user_id": user_id, "total_cents": stored, "lines_cents": expected}
+            for user_id, stored, expected in carts[:REPORT_LIMIT]
+        ],
+    }
+
+
+def main():
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Check order and cart totals against their lines")
+    parser.add_argument("--fix", action="store_true", help="Correct the totals that are off")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows read per query")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        report = reconcile(db, fix=args.fix, batch_size=args.batch_size)
+    finally:
+        db.close()
+
+    print(f"Orders: {report['orders_checked']} checked, {report['order_mismatches']} off")
+    for row in report["orders"]:
+        print(f"  order {row['id']}: total {row['total_cents']} != lines {row['lines_cents']}")
+    print(f"Carts: {report['carts_checked']} checked, {report['cart_mismatches']} off")
+    for row in report["carts"]:
+        print(f"  cart of user {row['user_id']}: total {row['total_cents']} != lines {row['lines_cents']}")
+    if report["fixed"]:
+        print("Totals corrected")
+
+
+if __name__ == "__main__":
+    main()
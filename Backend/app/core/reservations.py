@@ -0,0 +1,274 @@
+"""
+Short-lived stock holds taken when a checkout starts.
+
+Without holds, stock is only compared at cart-add time and decremented at
+order time, so two buyers can both reach payment for the last unit. Starting
+a checkout now holds the cart's quantities for RESERVATION_TTL seconds:
+
+- products.reserved is the sum of the live holds on a product, so
+  available = quantity - reserved is a single row read (availability()).
+- A hold is a stock_reservations row. reserve_for_checkout() replaces the
+  user's holds; each is taken with
+  ``UPDATE products SET reserved = reserved + q WHERE quantity - reserved >= q``
+  and either every line is held or none is.
+- Placing an order gives the buyer's own holds back and then decrements
+  only unreserved stock, all in the order's transaction (Crud._place_order).
+- Expired holds are released by a sweeper task in every worker, and inline
+  for the products a new checkout or order asks for, so they never block a
+  purchase until the next sweep.
+
+A hold is released by deleting its row by id, and only the transaction whose
+DELETE removed the row gives the quantity back, so a hold is never returned
+twice by concurrent workers. Like Crud._place_order, every path locks the
+product rows it will touch in ascending id order before changing holds or
+stock, so checkouts, orders and the sweeper cannot deadlock each other.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, case, delete, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.Models.Product import Product
+from app.Models.Reservation import StockReservation
+
+logger = logging.getLogger(__name__)
+
+# Expired holds released per sweeper transaction
+SWEEP_BATCH_SIZE = 500
+
+# This process's sweeper counters
+sweeper_stats = {"runs": 0, "released": 0}
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def lock_products(db: Session, product_ids) -> None:
+    """Lock product rows in ascending id order (SELECT ... FOR UPDATE where supported)"""
+    if product_ids:
+        db.execute(
+            select(Product.id).where(Product.id.in_(list(product_ids))).order_by(Product.id).with_for_update()
+        )
+
+
+def held_product_ids(db: Session, user_id: int) -> List[int]:
+    """Products a user currently holds stock of"""
+    return list(db.scalars(select(StockReservation.product_id).where(StockReservation.user_id == user_id)))
+
+
+def _release(db: Session, holds) -> Dict[int, int]:
+    """Delete (id, product_id, quantity) holds and give their stock back.
+
+    Returns the quantity released per product. The products are locked
+    first; rows the caller already locked are simply locked again.
+    """
+    holds = list(holds)
+    lock_products(db, {product_id for _, product_id, _ in holds})
+    released = {}
+    for hold_id, product_id, quantity in holds:
+        if db.execute(delete(StockReservation).where(StockReservation.id == hold_id)).rowcount == 1:
+            released[product_id] = released.get(product_id, 0) + quantity
+    if released:
+        amount = case(released, value=Product.id)
+        db.execute(
+            update(Product)
+            .where(Product.id.in_(released))
+            .values(reserved=Product.reserved - amount)
+            .execution_options(synchronize_session=False)
+        )
+    return released
+
+
+def release_holds(db: Session, user_id: int) -> Dict[int, int]:
+    """Release every hold of a user in the caller's transaction (one hold per product)"""
+    holds = db.execute(
+        select(StockReservation.id, StockReservation.product_id, StockReservation.quantity)
+        .where(StockReservation.user_id == user_id)
+    ).all()
+    return _release(db, holds)
+
+
+def release_for_order(db: Session, user_id: int, product_ids: List[int]) -> Dict[int, int]:
+    """Release a buyer's own holds and the expired holds on the products they
+    order, read together in the caller's transaction; returns the quantity
+    released per product"""
+    holds = db.execute(
+        select(StockReservation.id, StockReservation.product_id, StockReservation.quantity)
+        .where(or_(
+            StockReservation.user_id == user_id,
+            and_(StockReservation.product_id.in_(product_ids), StockReservation.expires_at <= utcnow()),
+        ))
+    ).all()
+    return _release(db, holds)
+
+
+def delete_product_holds(db: Session, product_id: int) -> int:
+    """Delete every hold on a product that is being deleted, in the caller's
+    transaction (which has locked the product); returns how many there were"""
+    return db.execute(delete(StockReservation).where(StockReservation.product_id == product_id)).rowcount
+
+
+def release_expired(db: Session, product_ids: Optional[List[int]] = None, limit: int = SWEEP_BATCH_SIZE) -> int:
+    """Release up to ``limit`` expired holds (optionally of some products) in the caller's transaction.
+
+    Returns the number of expired holds found, released here or by a concurrent sweep.
+    """
+    query = select(StockReservation.id, StockReservation.product_id, StockReservation.quantity).where(
+        StockReservation.expires_at <= utcnow()
+    )
+    if product_ids is not None:
+        query = query.where(StockReservation.product_id.in_(product_ids))
+    holds = db.execute(query.order_by(StockReservation.expires_at).limit(limit)).all()
+    _release(db, holds)
+    return len(holds)
+
+
+def reserve_for_checkout(db: Session, user_id: int, items: Dict[int, int], ttl: float) -> dict:
+    """
+    Hold ``items`` (product id -> quantity) for a user, replacing their earlier holds.
+
+    Args:
+        db: Database session
+        user_id: Buyer
+        items: Quantities to hold per product
+        ttl: Seconds until the holds expire
+
+    Returns:
+        dict: expires_at and the held items
+
+    Raises:
+        HTTPException: 404 for an unknown product, 400 when one is short of
+            unreserved stock (nothing is held then), 409 on a concurrent
+            checkout start by the same user
+    """
+    product_ids = sorted(items)
+    try:
+        # Every product touched below (new and replaced holds) is locked up front, in id order
+        lock_products(db, set(product_ids) | set(held_product_ids(db, user_id)))
+        release_holds(db, user_id)
+        release_expired(db, product_ids)
+        for product_id in product_ids:
+            held = db.execute(
+                update(Product)
+                .where(Product.id == product_id, Product.quantity - Product.reserved >= items[product_id])
+                .values(reserved=Product.reserved + items[product_id])
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if not held:
+                name = db.scalar(select(Product.name).where(Product.id == product_id))
+                if name is None:
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail=f"Product {product_id} not found"
+                    )
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Insufficient stock for product {name}"
+                )
+        expires_at = utcnow() + timedelta(seconds=ttl)
+        db.execute(insert(StockReservation), [
+            {"user_id": user_id, "product_id": product_id, "quantity": items[product_id], "expires_at": expires_at}
+            for product_id in product_ids
+        ])
+        db.commit()
+    except HTTPException:
+        db.rollback()
+        raise
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Checkout is already being started, please retry"
+        )
+    return {
+        "expires_at": expires_at,
+        "items": [{"product_id": product_id, "quantity": items[product_id]} for product_id in product_ids],
+    }
+
+
+def cancel_checkout(db: Session, user_id: int) -> int:
+    """Release a user's holds (checkout abandoned); returns holds released"""
+    released = release_holds(db, user_id)
+    db.commit()
+    return len(released)
+
+
+def get_holds(db: Session, user_id: int) -> dict:
+    """A user's current holds"""
+    rows = db.execute(
+        select(
+            StockReservation.product_id,
+            StockReservation.quantity,
+            StockReservation.expires_at,
+            (StockReservation.expires_at <= utcnow()).label("expired"),
+        )
+        .where(StockReservation.user_id == user_id)
+        .order_by(StockReservation.product_id)
+    ).all()
+    return {
+        "expires_at": min((row.expires_at for row in rows), default=None),
+        "items": [
+            {"product_id": row.product_id, "quantity": row.quantity, "expired": bool(row.expired)}
+            for row in rows
+        ],
+    }
+
+
+def availability(db: Session, product_ids: List[int]) -> List[dict]:
+    """On-hand, reserved and available stock of products (one indexed read)"""
+    rows = db.execute(
+        select(Product.id, Product.quantity, Product.reserved)
+        .where(Product.id.in_(product_ids))
+        .order_by(Product.id)
+    ).all()
+    return [
+        {"product_id": row.id, "quantity": row.quantity, "reserved": row.reserved,
+         "available": max(row.quantity - row.reserved, 0)}
+        for row in rows
+    ]
+
+
+def reservation_stats(db: Session) -> dict:
+    holds, units = db.execute(
+        select(func.count(), func.coalesce(func.sum(StockReservation.quantity), 0))
+    ).one()
+    expired = db.scalar(
+        select(func.count()).select_from(StockReservation).where(StockReservation.expires_at <= utcnow())
+    )
+    return {"holds": holds, "units": units, "expired_unswept": expired, "sweeper": dict(sweeper_stats)}
+
+
+def sweep_expired() -> int:
+    """Release all expired holds with a session of its own, one batch per transaction"""
+    from database import SessionLocal
+    db = SessionLocal()
+    total = 0
+    try:
+        while True:
+            released = release_expired(db)
+            db.commit()
+            total += released
+            if released < SWEEP_BATCH_SIZE:
+                break
+    finally:
+        db.close()
+    sweeper_stats["runs"] += 1
+    sweeper_stats["released"] += total
+    return total
+
+
+async def run_reservation_sweeper(interval: float) -> None:
+    """Release expired holds every ``interval`` seconds until cancelled"""
+    from starlette.concurrency import run_in_threadpool
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(sweep_expired)
+        except Exception as e:
+            logger.warning("Reservation sweep failed (will retry): %s", e)
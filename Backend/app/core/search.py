@@ -0,0 +1,262 @@
+"""
+In-process full-text search over product names and descriptions.
+
+``SearchIndex`` is an inverted index (term -> {doc id: weighted term
+frequency}) ranked with Okapi BM25. Query terms also match indexed terms
+that start with them, so "lap" finds "laptop". Name tokens count
+NAME_WEIGHT times, so titles outrank descriptions.
+
+Each worker holds its own index, built lazily on the first search and then
+kept up to date by the product write paths in Crud. Other workers learn about
+a change through a generation counter on the shared cache backend
+(CACHE_URL=redis://...) and rebuild; with the in-memory backend they rebuild
+after SEARCH_INDEX_TTL seconds instead.
+"""
+import bisect
+import logging
+import math
+import re
+import threading
+import time
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from app.core.cache import create_backend
+from app.core.config import SEARCH_INDEX_TTL
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in is it of on or the to with".split()
+)
+
+NAME_WEIGHT = 2
+PREFIX_WEIGHT = 0.5  # score factor for prefix (non-exact) matches
+MAX_PREFIX_EXPANSIONS = 50
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercased word tokens without stopwords"""
+    if not text:
+        return []
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+class SearchIndex:
+    """Thread-safe inverted index with BM25 ranking and prefix matching"""
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._postings = {}  # term -> {doc_id: weighted tf}
+        self._terms = []  # sorted vocabulary, for prefix lookups
+        self._doc_terms = {}  # doc_id -> {term: weighted tf}
+        self._doc_lengths = {}
+        self._total_length = 0
+        self.built = False
+        self.built_at = 0.0
+        self.generation = None
+
+    # ---- maintenance ----
+
+    def _add(self, doc_id: int, name: Optional[str], description: Optional[str], keep_sorted: bool = True):
+        # keep_sorted=False appends new terms; the caller sorts _terms once afterwards
+        frequencies = {}
+        for token in tokenize(name):
+            frequencies[token] = frequencies.get(token, 0) + NAME_WEIGHT
+        for token in tokenize(description):
+            frequencies[token] = frequencies.get(token, 0) + 1
+        if not frequencies:
+            return
+        for term, frequency in frequencies.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                if keep_sorted:
+                    bisect.insort(self._terms, term)
+                else:
+                    self._terms.append(term)
+            postings[doc_id] = frequency
+        length = sum(frequencies.values())
+        self._doc_terms[doc_id] = frequencies
+        self._doc_lengths[doc_id] = length
+        self._total_length += length
+
+    def _remove(self, doc_id: int):
+        frequencies = self._doc_terms.pop(doc_id, None)
+        if frequencies is None:
+            return
+        for term in frequencies:
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect.bisect_left(self._terms, term)]
+        self._total_length -= self._doc_lengths.pop(doc_id)
+
+    def upsert(self, doc_id: int, name: Optional[str], description: Optional[str]):
+        """Index (or re-index) one document"""
+        with self._lock:
+            self._remove(doc_id)
+            self._add(doc_id, name, description)
+
+    def remove(self, doc_id: int):
+        with self._lock:
+            self._remove(doc_id)
+
+    def rebuild(self, documents: Iterable[Tuple[int, Optional[str], Optional[str]]], generation=None):
+        """Replace the whole index with (id, name, description) rows.
+
+        The new index is built without holding the lock (searches keep using
+        the old one) and swapped in at the end.
+        """
+        fresh = SearchIndex(self.ttl)
+        for doc_id, name, description in documents:
+            fresh._add(doc_id, name, description, keep_sorted=False)
+        fresh._terms.sort()
+        with self._lock:
+            self._postings = fresh._postings
+            self._terms = fresh._terms
+            self._doc_terms = fresh._doc_terms
+            self._doc_lengths = fresh._doc_lengths
+            self._total_length = fresh._total_length
+            self.built = True
+            self.built_at = time.monotonic()
+            self.generation = generation
+
+    def is_stale(self, generation=None) -> bool:
+        if not self.built or generation != self.generation:
+            return True
+        return self.ttl is not None and time.monotonic() - self.built_at > self.ttl
+
+    # ---- queries ----
+
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        """Indexed terms matching a query token: the exact term and prefix matches"""
+        matches = []
+        start = bisect.bisect_left(self._terms, token)
+        for term in self._terms[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(token):
+                break
+            matches.append((term, 1.0 if term == token else PREFIX_WEIGHT))
+        return matches
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> Tuple[List[Tuple[int, float]], int]:
+        """Rank documents for a query.
+
+        Returns a tuple of ([(doc_id, score), ...] for the requested slice,
+        total number of matching documents). A query token expands to at most
+        MAX_PREFIX_EXPANSIONS indexed terms, so for very short prefixes the
+        total (and the ranking) only covers documents matching those terms.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return [], 0
+
+        with self._lock:
+            doc_count = len(self._doc_lengths)
+            if not doc_count:
+                return [], 0
+            average_length = self._total_length / doc_count
+            scores = {}
+            for token in tokens:
+                # A document scores once per query token, by its best-matching term
+                best = {}
+                for term, weight in self._expand(token):
+                    postings = self._postings[term]
+                    idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for doc_id, frequency in postings.items():
+                        norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_lengths[doc_id] / average_length)
+                        score = weight * idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+                        if score > best.get(doc_id, 0.0):
+                            best[doc_id] = score
+                for doc_id, score in best.items():
+                    scores[doc_id] = scores.get(doc_id, 0.0) + score
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[offset:offset + limit], len(ranked)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "built": self.built,
+                "documents": len(self._doc_lengths),
+                "terms": len(self._terms),
+                "generation": self.generation,
+                "age_seconds": round(time.monotonic() - self.built_at, 3) if self.built else None,
+            }
+
+
+class ProductSearch:
+    """The product index plus the cross-worker generation counter"""
+
+    GENERATION_KEY = "products:search:gen"
+
+    def __init__(self):
+        self._state = create_backend(16)
+        # One rebuild at a time: concurrent searches that find the index stale
+        # wait for it instead of each loading the whole catalog
+        self.rebuild_lock = threading.Lock()
+        # A shared backend tells us when another worker changed the catalog;
+        # a private one cannot, so fall back to rebuilding after a TTL
+        self.index = SearchIndex(ttl=None if self._state.shared else SEARCH_INDEX_TTL)
+
+    def _generation(self):
+        if self._state.shared:
+            return self._state.get(self.GENERATION_KEY) or 0
+        return None
+
+    def needs_rebuild(self) -> Tuple[bool, Optional[int]]:
+        """(index missing or stale, generation to pass to index.rebuild)"""
+        generation = self._generation()
+        return self.index.is_stale(generation), generation
+
+    def ensure_fresh(self, load_documents: Callable[[], Iterable[Tuple[int, str, str]]]):
+        """Rebuild from load_documents() if the index is missing or stale"""
+        stale, generation = self.needs_rebuild()
+        if not stale:
+            return
+        with self.rebuild_lock:
+            # Another thread may have rebuilt while we waited
+            stale, generation = self.needs_rebuild()
+            if stale:
+                self.index.rebuild(load_documents(), generation)
+
+    def _incr_generation(self) -> Optional[int]:
+        # Runs after the write committed: log a cache error instead of failing it
+        try:
+            return self._state.incr(self.GENERATION_KEY)
+        except Exception as e:
+            logger.warning("Search generation bump failed: %s", e)
+            return None
+
+    def _bump(self):
+        if self._state.shared:
+            generation = self._incr_generation()
+            # Our own change is already applied; only foreign bumps force a rebuild
+            if self.index.built and self.index.generation is not None and generation == self.index.generation + 1:
+                self.index.generation = generation
+
+    def product_changed(self, product_id: int, name: Optional[str], description: Optional[str]):
+        if self.index.built:
+            self.index.upsert(product_id, name, description)
+        self._bump()
+
+    def product_deleted(self, product_id: int):
+        if self.index.built:
+            self.index.remove(product_id)
+        self._bump()
+
+    def catalog_reloaded(self):
+        """Many products changed at once (bulk import): rebuild on next search"""
+        self.index.built = False
+        if self._state.shared:
+            self._incr_generation()
+
+    def search(self, query: str, limit: int, offset: int):
+        return self.index.search(query, limit, offset)
+
+
+product_search = ProductSearch()
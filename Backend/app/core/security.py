@@ -1,7 +1,8 @@
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from typing import Optional
-import jwt
+from jose import jwt
+from app.core.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE
 
 # Configure argon2 as the password hashing algorithm
 pwd_context = CryptContext(
@@ -12,10 +13,8 @@ pwd_context = CryptContext(
     argon2__parallelism=1
 )
 
-# JWT Configuration
-SECRET_KEY = "your-secret-key-change-this-to-a-strong-random-string"  # Change this to a strong secret key
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# JWT Configuration lives in app.core.config so signing and verification agree
+ACCESS_TOKEN_EXPIRE_MINUTES = ACCESS_TOKEN_EXPIRE
 
 
 def hash_password(password: str) -> str:
@@ -0,0 +1,119 @@
+"""
+Small SMTP server used as a local stand-in for a mail relay.
+
+It accepts every message smtplib sends (EHLO/HELO, MAIL, RCPT, DATA, RSET,
+NOOP, QUIT; no auth or TLS), keeps it in memory and prints its envelope and
+subject, so order confirmations and stock alerts can be checked on a dev
+machine or in tests:
+
+    python -m app.core.smtp_server --port 8025
+    SMTP_HOST=localhost SMTP_PORT=8025 python -m app.core.jobs run
+"""
+import argparse
+import socketserver
+import threading
+from email import message_from_bytes
+from email.message import Message
+from typing import List, Optional
+
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    """Handles one client connection"""
+
+    def handle(self):
+        self._reply(b"220 localhost SMTP stand-in ready")
+        self._reset()
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            verb, _, argument = line.decode("utf-8", "replace").strip().partition(" ")
+            verb = verb.upper()
+            if verb == "EHLO":
+                self._reply(b"250-localhost\r\n250 8BITMIME")
+            elif verb == "HELO":
+                self._reply(b"250 localhost")
+            elif verb == "MAIL":
+                self._reset()
+                self.sender = argument.partition(":")[2].strip().strip("<>").split(" ")[0]
+                self._reply(b"250 OK")
+            elif verb == "RCPT":
+                self.recipients.append(argument.partition(":")[2].strip().strip("<>"))
+                self._reply(b"250 OK")
+            elif verb == "DATA":
+                if not self.recipients:
+                    self._reply(b"503 RCPT first")
+                    continue
+                self._reply(b"354 End data with <CR><LF>.<CR><LF>")
+                self.server.deliver(self.sender, self.recipients, self._read_data())
+                self._reset()
+                self._reply(b"250 OK")
+            elif verb == "RSET":
+                self._reset()
+                self._reply(b"250 OK")
+            elif verb == "NOOP":
+                self._reply(b"250 OK")
+            elif verb == "QUIT":
+                self._reply(b"221 Bye")
+                return
+            else:
+                self._reply(b"502 Command not implemented")
+
+    def _reset(self):
+        self.sender: Optional[str] = None
+        self.recipients: List[str] = []
+
+    def _reply(self, line: bytes):
+        self.wfile.write(line + b"\r\n")
+
+    def _read_data(self) -> bytes:
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b".\r\n", b".\n"):
+                break
+            # Undo dot-stuffing
+            lines.append(line[1:] if line.startswith(b"..") else line)
+        return b"".join(lines)
+
+
+class SmtpServer(socketserver.ThreadingTCPServer):
+    """Threaded SMTP server collecting delivered messages in ``messages``"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8025, quiet: bool = False):
+        super().__init__((host, port), _SmtpHandler)
+        self.quiet = quiet
+        self.messages: List[Message] = []
+        self._lock = threading.Lock()
+
+    def deliver(self, sender: str, recipients: List[str], data: bytes):
+        message = message_from_bytes(data)
+        with self._lock:
+            self.messages.append(message)
+        if not self.quiet:
+            print(f"Mail from {sender} to {', '.join(recipients)}: {message['Subject']}")
+
+    def start_background(self) -> threading.Thread:
+        """Serve from a daemon thread and return it (port 0 picks a free port)"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local SMTP stand-in for outgoing mail")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    options = parser.parse_args()
+
+    server = SmtpServer(options.host, options.port)
+    print(f"SMTP server listening on {options.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
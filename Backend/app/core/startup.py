@@ -0,0 +1,32 @@
+import time
+from contextlib import contextmanager
+
+
+class StartupReport:
+    """Wall-clock time spent in each phase of bringing a worker up"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.ready_ms = None
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round((time.perf_counter() - start) * 1000, 3)
+
+    def mark_ready(self):
+        """Record time-to-ready (since main was imported) and print the report"""
+        self.ready_ms = round((time.perf_counter() - self.started) * 1000, 3)
+        phases = ", ".join(f"{name} {ms:.1f} ms" for name, ms in self.phases.items())
+        print(f"Startup: ready in {self.ready_ms:.1f} ms ({phases})")
+
+    def as_dict(self) -> dict:
+        return {"phases_ms": dict(self.phases), "ready_ms": self.ready_ms}
+
+
+# Created when main is imported; filled in by create_app and the lifespan handler
+startup_report = StartupReport()
@@ -0,0 +1,112 @@
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Sequence
+
+from app.core.config import IMAGE_THUMBNAIL_WIDTHS, IMAGE_WORKERS
+from app.core.image_store import ImageStore, image_store, variant_key
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it originals are served for every width
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+SAVE_OPTIONS = {
+    "jpg": ("JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+    "png": ("PNG", {"optimize": True}),
+    "gif": ("GIF", {}),
+    "webp": ("WEBP", {"quality": 85}),
+}
+
+
+class ThumbnailPool:
+    """
+    Generates resized variants of stored images on background threads.
+
+    Uploads return as soon as the original is stored; variants appear a
+    moment later and are served once they exist (the original until then).
+    """
+
+    def __init__(self, store: ImageStore, widths: Sequence[int], workers: int):
+        self.store = store
+        self.widths = tuple(sorted(widths))
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = set()
+        self.generated = 0
+        self.failed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return Image is not None and bool(self.widths)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="thumbnails")
+        return self._executor
+
+    def schedule(self, key: str):
+        """Queue every missing variant of an image"""
+        if not self.enabled:
+            return
+        for width in self.widths:
+            target = variant_key(key, width)
+            with self._lock:
+                if target in self._pending:
+                    continue
+                self._pending.add(target)
+            self._get_executor().submit(self._generate, key, width, target)
+
+    def _generate(self, key: str, width: int, target: str):
+        try:
+            if self.store.exists(target):
+                return
+            ext = key.rsplit(".", 1)[1]
+            image_format, options = SAVE_OPTIONS[ext]
+            with Image.open(io.BytesIO(self.store.read_bytes(key))) as image:
+                if image.width > width:
+                    image.thumbnail((width, image.height * width // image.width + 1))
+                if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+                    image = image.convert("RGB")
+                output = io.BytesIO()
+                image.save(output, image_format, **options)
+            self.store.write_bytes(target, output.getvalue())
+            with self._lock:
+                self.generated += 1
+        except Exception as e:
+            logger.warning("Thumbnail %s failed: %s", target, e)
+            with self._lock:
+                self.failed += 1
+        finally:
+            with self._lock:
+                self._pending.discard(target)
+
+    def pick_width(self, requested: int):
+        """Smallest configured width >= requested (largest if none is)"""
+        for width in self.widths:
+            if width >= requested:
+                return width
+        return self.widths[-1] if self.widths else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "widths": list(self.widths),
+                "workers": self.workers,
+                "pending": len(self._pending),
+                "generated": self.generated,
+                "failed": self.failed,
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+thumbnail_pool = ThumbnailPool(image_store, IMAGE_THUMBNAIL_WIDTHS, IMAGE_WORKERS)
@@ -1,17 +1,23 @@
 from fastapi import Depends, HTTPException, status
 from jose import JWTError, jwt
-from database import get_db
-from sqlalchemy.orm import Session
-from app.Models.User import User
+from database import get_request_db, DBSession
+from app.CRUD.AsyncCrud import find_user_by_id
+from app.schemas.User import UserReadSchema
+from app.core.cache import cache_io, user_cache
 from fastapi.security import OAuth2PasswordBearer
-from app.core.config import SECRET_KEY, ALGORITHM
+from app.core.config import SECRET_KEY, ALGORITHM, AUTH_TRUST_TOKEN_CLAIMS, ADMIN_EMAILS
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    """Get current user from JWT token"""
+async def get_current_user(token: str = Depends(oauth2_scheme), db: DBSession = Depends(get_request_db)) -> UserReadSchema:
+    """Get current active user from JWT token
+
+    Active users are cached by id for USER_CACHE_TTL seconds, so most
+    authenticated requests skip the users query. With AUTH_TRUST_TOKEN_CLAIMS
+    the signed claims are trusted and the database is never consulted.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -22,11 +28,35 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
-    except JWTError:
+        user_id = int(user_id)
+    except (JWTError, ValueError):
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if user is None:
+    if AUTH_TRUST_TOKEN_CLAIMS:
+        # Tokens are only issued to active users and expire quickly
+        return UserReadSchema(id=user_id, email=payload.get("email", ""), is_active=True)
+    
+    cached = await cache_io(user_cache.get, user_id)
+    if cached is not None:
+        return UserReadSchema(**cached)
+    
+    user = await find_user_by_id(db, user_id)
+    if user is None or not user.is_active:
         raise credentials_exception
     
-    return user
\ No newline at end of file
+    current_user = UserReadSchema.model_validate(user)
+    await cache_io(user_cache.set, user_id, current_user.model_dump())
+    return current_user
+
+
+async def get_admin_user(current_user: UserReadSchema = Depends(get_current_user)) -> UserReadSchema:
+    """Get the current user if they are an administrator (see ADMIN_EMAILS)
+
+    Nobody is an administrator until ADMIN_EMAILS is configured.
+    """
+    if (current_user.email or "").lower() not in ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
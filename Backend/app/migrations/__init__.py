@@ -0,0 +1,127 @@
+"""
+Versioned schema migrations.
+
+Each module in this package named ``v<NNNN>_<name>.py`` defines
+``upgrade(conn)``; applied versions are recorded in ``schema_migrations``.
+Migrations use their own frozen table definitions rather than the models,
+so later model changes never alter what an old migration does.
+
+    python -m app.migrations upgrade   # apply pending migrations
+    python -m app.migrations status    # list applied/pending versions
+"""
+import importlib
+import pkgutil
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+_version_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String(200), nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+class Migration:
+    """One migration module: version number, name and upgrade function"""
+
+    def __init__(self, version: int, name: str, upgrade):
+        self.version = version
+        self.name = name
+        self.upgrade = upgrade
+
+    def __repr__(self):
+        return f"<Migration {self.version:04d} {self.name}>"
+
+
+def load_migrations() -> list:
+    """Import every v<NNNN>_<name> module of this package, ordered by version"""
+    migrations = []
+    for module_info in pkgutil.iter_modules(__path__):
+        module_name = module_info.name
+        if not module_name.startswith("v") or "_" not in module_name:
+            continue
+        prefix, name = module_name[1:].split("_", 1)
+        if not prefix.isdigit():
+            continue
+        module = importlib.import_module(f"{__name__}.{module_name}")
+        migrations.append(Migration(int(prefix), name, module.upgrade))
+    migrations.sort(key=lambda migration: migration.version)
+    versions = [migration.version for migration in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions: {versions}")
+    return migrations
+
+
+def _lock(conn: Connection):
+    """Serialize concurrent upgrades (e.g. several workers deploying at once)"""
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(726354)"))
+
+
+def applied_versions(engine: Engine) -> set:
+    """Versions recorded in schema_migrations (empty for a fresh database)"""
+    with engine.connect() as conn:
+        if not inspect(conn).has_table("schema_migrations"):
+            return set()
+        return {row[0] for row in conn.execute(schema_migrations.select())}
+
+
+def upgrade(engine: Engine, target: int = None) -> list:
+    """Apply pending migrations in order, each in its own transaction.
+
+    Args:
+        engine: Sync engine to migrate.
+        target: Highest version to apply; all pending when None.
+
+    Returns:
+        The migrations that were applied.
+    """
+    with engine.begin() as conn:
+        _lock(conn)
+        _version_metadata.create_all(conn, checkfirst=True)
+
+    applied = []
+    for migration in load_migrations():
+        if target is not None and migration.version > target:
+            break
+        with engine.begin() as conn:
+            _lock(conn)
+            done = conn.execute(
+                schema_migrations.select().where(schema_migrations.c.version == migration.version)
+            ).first()
+            if done:
+                continue
+            start = time.perf_counter()
+            migration.upgrade(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=migration.version,
+                name=migration.name,
+                applied_at=datetime.now(timezone.utc),
+            ))
+            print(f"✓ Applied migration {migration.version:04d} {migration.name} "
+                  f"({(time.perf_counter() - start) * 1000:.1f} ms)")
+        applied.append(migration)
+    return applied
+
+
+def status(engine: Engine) -> list:
+    """(version, name, applied) for every known migration"""
+    done = applied_versions(engine)
+    return [(m.version, m.name, m.version in done) for m in load_migrations()]
+
+
+# ==================== HELPERS FOR MIGRATION MODULES ====================
+
+def has_column(conn: Connection, table: str, column: str) -> bool:
+    return column in {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def has_index(conn: Connection, table: str, index: str) -> bool:
+    return index in {i["name"] for i in inspect(conn).get_indexes(table)}
@@ -0,0 +1,24 @@
+import argparse
+
+from database import engine
+from app.migrations import status, upgrade
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Database schema migrations")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = subcommands.add_parser("upgrade", help="Apply pending migrations")
+    upgrade_parser.add_argument("--target", type=int, default=None, help="Stop after this version")
+    subcommands.add_parser("status", help="List applied and pending migrations")
+    args = parser.parse_args()
+
+    if args.command == "upgrade":
+        applied = upgrade(engine, target=args.target)
+        print(f"Database is up to date ({len(applied)} migration(s) applied)")
+    else:
+        for version, name, applied in status(engine):
+            print(f"{version:04d} {name:<40} {'applied' if applied else 'pending'}")
+
+
+if __name__ == "__main__":
+    main()
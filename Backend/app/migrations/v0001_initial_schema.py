@@ -0,0 +1,46 @@
+"""Base tables: users, products, Orders, order_items (skipped where they exist)"""
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, MetaData, String, Table
+from sqlalchemy.sql import func
+
+metadata = MetaData()
+
+Table(
+    "users", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String, unique=True),
+    Column("hashed_password", String, nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("is_active", Boolean, default=True),
+)
+
+Table(
+    "products", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String(100), nullable=False),
+    Column("description", String(150), nullable=False),
+    Column("price", Float, nullable=False),
+    Column("quantity", Integer, nullable=False),
+)
+
+Table(
+    "Orders", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+    Column("status", String),
+    Column("total_price", Float, nullable=False),
+)
+
+Table(
+    "order_items", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("order_id", Integer, ForeignKey("Orders.id"), nullable=False),
+    Column("product_id", Integer, ForeignKey("products.id"), nullable=False),
+    Column("quantity", Integer, nullable=False),
+    Column("price", Float, nullable=False),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
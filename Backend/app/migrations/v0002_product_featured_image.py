@@ -0,0 +1,12 @@
+"""products.featured and products.image_url (formerly added by migrate_db*.py)"""
+from sqlalchemy import text
+
+from app.migrations import has_column
+
+
+def upgrade(conn):
+    false = "FALSE" if conn.dialect.name == "postgresql" else "0"
+    if not has_column(conn, "products", "featured"):
+        conn.execute(text(f"ALTER TABLE products ADD COLUMN featured BOOLEAN DEFAULT {false}"))
+    if not has_column(conn, "products", "image_url"):
+        conn.execute(text("ALTER TABLE products ADD COLUMN image_url VARCHAR(500)"))
@@ -0,0 +1,26 @@
+"""Indexes for the cart lookup, order history, order lines and featured products"""
+from sqlalchemy import Column, Index, MetaData, Table
+
+from app.migrations import has_index
+
+metadata = MetaData()
+orders = Table("Orders", metadata, Column("user_id"), Column("status"), Column("created_at"))
+order_items = Table("order_items", metadata, Column("order_id"), Column("product_id"))
+products = Table("products", metadata, Column("featured"))
+
+INDEXES = [
+    # get_or_create_cart: WHERE user_id = ? AND status = 'Cart'
+    Index("ix_orders_user_status", orders.c.user_id, orders.c.status),
+    # get_orders_page: WHERE user_id = ? ORDER BY created_at DESC
+    Index("ix_orders_user_created", orders.c.user_id, orders.c.created_at),
+    # Cart/order lines by order, and the per-product line lookup; the
+    # composite also serves order_id-only lookups
+    Index("ix_order_items_order_product", order_items.c.order_id, order_items.c.product_id),
+    Index("ix_products_featured", products.c.featured),
+]
+
+
+def upgrade(conn):
+    for index in INDEXES:
+        if not has_index(conn, index.table.name, index.name):
+            index.create(conn)
@@ -0,0 +1,48 @@
+"""Partial unique index allowing at most one 'Cart' order per user"""
+from sqlalchemy import Column, Index, MetaData, Table, text
+
+from app.migrations import has_index
+
+metadata = MetaData()
+orders = Table("Orders", metadata, Column("user_id"), Column("status"))
+
+CART_INDEX = Index(
+    "uq_orders_one_cart_per_user",
+    orders.c.user_id,
+    unique=True,
+    sqlite_where=text("status = 'Cart'"),
+    postgresql_where=text("status = 'Cart'"),
+)
+
+
+def upgrade(conn):
+    if conn.dialect.name not in ("sqlite", "postgresql"):
+        # Partial indexes are unavailable (e.g. MySQL); a plain unique index
+        # on user_id would allow only one order per user
+        print(f"Skipping one-cart-per-user index: unsupported on {conn.dialect.name}")
+        return
+    if has_index(conn, "Orders", CART_INDEX.name):
+        return
+
+    # Fold duplicate carts (left by concurrent get_or_create_cart calls) into
+    # each user's newest cart before the index can be created
+    duplicates = conn.execute(text(
+        'SELECT user_id, MAX(id) FROM "Orders" WHERE status = \'Cart\' '
+        'GROUP BY user_id HAVING COUNT(*) > 1'
+    )).all()
+    for user_id, keep_id in duplicates:
+        params = {"user_id": user_id, "keep_id": keep_id}
+        conn.execute(text(
+            'UPDATE order_items SET order_id = :keep_id WHERE order_id IN '
+            '(SELECT id FROM "Orders" WHERE user_id = :user_id AND status = \'Cart\' AND id != :keep_id)'
+        ), params)
+        conn.execute(text(
+            'DELETE FROM "Orders" WHERE user_id = :user_id AND status = \'Cart\' AND id != :keep_id'
+        ), params)
+        conn.execute(text(
+            'UPDATE "Orders" SET total_price = '
+            '(SELECT COALESCE(SUM(price * quantity), 0) FROM order_items WHERE order_id = :keep_id) '
+            'WHERE id = :keep_id'
+        ), {"keep_id": keep_id})
+
+    CART_INDEX.create(conn)
@@ -0,0 +1,13 @@
+"""GIN full-text index for SEARCH_BACKEND=postgres (PostgreSQL only)"""
+from sqlalchemy import text
+
+from app.migrations import has_index
+
+SEARCH_VECTOR = "to_tsvector('english', coalesce(name, '') || ' ' || coalesce(description, ''))"
+
+
+def upgrade(conn):
+    if conn.dialect.name != "postgresql":
+        return
+    if not has_index(conn, "products", "ix_products_search"):
+        conn.execute(text(f"CREATE INDEX ix_products_search ON products USING GIN ({SEARCH_VECTOR})"))
@@ -0,0 +1,15 @@
+"""products.sku: unique external key used by the bulk import upsert"""
+from sqlalchemy import Column, Index, MetaData, Table, text
+
+from app.migrations import has_column, has_index
+
+metadata = MetaData()
+products = Table("products", metadata, Column("sku"))
+
+
+def upgrade(conn):
+    if not has_column(conn, "products", "sku"):
+        conn.execute(text("ALTER TABLE products ADD COLUMN sku VARCHAR(64)"))
+    if not has_index(conn, "products", "ix_products_sku"):
+        # Unique but NULL-tolerant: products created without a SKU are allowed
+        Index("ix_products_sku", products.c.sku, unique=True).create(conn)
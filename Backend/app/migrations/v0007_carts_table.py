@@ -0,0 +1,56 @@
+"""carts: one JSON document per user, replacing Orders rows with status 'Cart'"""
+import json
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, MetaData, Table, Text, text
+from sqlalchemy.sql import func
+
+from app.migrations import has_index
+
+metadata = MetaData()
+Table("users", metadata, Column("id", Integer, primary_key=True))
+carts = Table(
+    "carts", metadata,
+    Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
+    Column("data", Text, nullable=False),
+    Column("version", Integer, nullable=False, default=1),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+def upgrade(conn):
+    carts.create(conn, checkfirst=True)
+
+    # Move open carts over, keeping line ids so clients' item ids stay valid
+    open_carts = conn.execute(text(
+        'SELECT id, user_id, created_at FROM "Orders" WHERE status = \'Cart\''
+    )).all()
+    for order_id, user_id, created_at in open_carts:
+        # Carts now hold one line per product; fold repeats into the first
+        lines = {}
+        for line_id, product_id, quantity, price in conn.execute(text(
+            "SELECT id, product_id, quantity, price FROM order_items WHERE order_id = :order_id ORDER BY id"
+        ), {"order_id": order_id}):
+            if product_id in lines:
+                lines[product_id]["quantity"] += quantity
+            else:
+                lines[product_id] = {"id": line_id, "product_id": product_id, "quantity": quantity, "price": price}
+        lines = list(lines.values())
+        if created_at is None:
+            created_at = datetime.now(timezone.utc)
+        document = {
+            "lines": lines,
+            "next_line_id": max((line["id"] for line in lines), default=0) + 1,
+            "total_price": sum(line["price"] * line["quantity"] for line in lines),
+            "created_at": created_at.isoformat() if hasattr(created_at, "isoformat") else created_at,
+            "version": 1,
+        }
+        exists = conn.execute(carts.select().where(carts.c.user_id == user_id)).first()
+        if exists is None:
+            conn.execute(carts.insert().values(user_id=user_id, data=json.dumps(document), version=1))
+        conn.execute(text("DELETE FROM order_items WHERE order_id = :order_id"), {"order_id": order_id})
+        conn.execute(text('DELETE FROM "Orders" WHERE id = :order_id'), {"order_id": order_id})
+
+    # Only needed while carts lived in Orders (v0004)
+    if has_index(conn, "Orders", "uq_orders_one_cart_per_user"):
+        conn.execute(text("DROP INDEX uq_orders_one_cart_per_user"))
@@ -0,0 +1,78 @@
+"""Money as integer cents: products.price_cents, order_items.price_cents,
+Orders.total_cents (replacing the float columns) and cents in cart documents"""
+import json
+from decimal import ROUND_HALF_UP, Decimal
+
+from sqlalchemy import text
+
+from app.migrations import has_column
+
+# Rows converted per UPDATE batch
+BATCH_SIZE = 1000
+
+# (table, float column, cents column)
+MONEY_COLUMNS = [
+    ("products", "price", "price_cents"),
+    ("order_items", "price", "price_cents"),
+    ("Orders", "total_price", "total_cents"),
+]
+
+
+def to_cents(amount) -> int:
+    """The float -> cents conversion as of this migration (kept here so later
+    changes to app.core.money cannot change what this migration does)"""
+    if isinstance(amount, float):
+        amount = repr(amount)
+    return int(Decimal(amount).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP) * 100)
+
+
+def convert_column(conn, table: str, old: str, new: str) -> None:
+    """Fill the cents column from the float column with to_cents, like cart
+    documents below: SQL ROUND of a binary float differs between backends
+    (1.005 * 100 rounds to 100 on SQLite, while to_cents gives 101)"""
+    after_id = 0
+    while True:
+        rows = conn.execute(
+            text(f'SELECT id, {old} FROM "{table}" WHERE id > :after_id ORDER BY id LIMIT :limit'),
+            {"after_id": after_id, "limit": BATCH_SIZE},
+        ).all()
+        if not rows:
+            return
+        conn.execute(
+            text(f'UPDATE "{table}" SET {new} = :cents WHERE id = :id'),
+            [{"id": row_id, "cents": None if amount is None else to_cents(amount)} for row_id, amount in rows],
+        )
+        after_id = rows[-1][0]
+
+
+def upgrade(conn):
+    postgres = conn.dialect.name == "postgresql"
+    for table, old, new in MONEY_COLUMNS:
+        if has_column(conn, table, new):
+            continue
+        conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN {new} BIGINT'))
+        convert_column(conn, table, old, new)
+        if postgres:
+            conn.execute(text(f'ALTER TABLE "{table}" ALTER COLUMN {new} SET NOT NULL'))
+        # SQLite >= 3.35 drops columns in place; NOT NULL is left to the models there
+        conn.execute(text(f'ALTER TABLE "{table}" DROP COLUMN {old}'))
+
+    # Order totals were float sums; recompute them exactly from their lines
+    conn.execute(text(
+        'UPDATE "Orders" SET total_cents = '
+        '(SELECT COALESCE(SUM(price_cents * quantity), 0) FROM order_items WHERE order_items.order_id = "Orders".id) '
+        'WHERE EXISTS (SELECT 1 FROM order_items WHERE order_items.order_id = "Orders".id)'
+    ))
+
+    for user_id, data in conn.execute(text("SELECT user_id, data FROM carts")).all():
+        cart = json.loads(data)
+        if "total_cents" in cart:
+            continue
+        for line in cart["lines"]:
+            line["price_cents"] = to_cents(line.pop("price"))
+        cart.pop("total_price", None)
+        cart["total_cents"] = sum(line["price_cents"] * line["quantity"] for line in cart["lines"])
+        conn.execute(
+            text("UPDATE carts SET data = :data WHERE user_id = :user_id"),
+            {"data": json.dumps(cart), "user_id": user_id},
+        )
@@ -0,0 +1,34 @@
+"""jobs: the persisted background job queue; daily_product_sales: its sales rollups"""
+from sqlalchemy import BigInteger, Column, Date, DateTime, ForeignKey, Index, Integer, MetaData, String, Table, Text
+from sqlalchemy.sql import func
+
+metadata = MetaData()
+Table("products", metadata, Column("id", Integer, primary_key=True))
+jobs = Table(
+    "jobs", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("kind", String(50), nullable=False),
+    Column("payload", Text, nullable=False),
+    Column("status", String(10), nullable=False, default="pending"),
+    Column("attempts", Integer, nullable=False, default=0),
+    Column("max_attempts", Integer, nullable=False),
+    Column("run_at", DateTime(timezone=True), nullable=False),
+    Column("locked_until", DateTime(timezone=True), nullable=True),
+    Column("last_error", Text, nullable=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("finished_at", DateTime(timezone=True), nullable=True),
+    Index("ix_jobs_status_run_at", "status", "run_at"),
+)
+daily_product_sales = Table(
+    "daily_product_sales", metadata,
+    Column("day", Date, primary_key=True),
+    Column("product_id", Integer, ForeignKey("products.id"), primary_key=True),
+    Column("units", Integer, nullable=False, default=0),
+    Column("revenue_cents", BigInteger, nullable=False, default=0),
+    Column("orders", Integer, nullable=False, default=0),
+)
+
+
+def upgrade(conn):
+    jobs.create(conn, checkfirst=True)
+    daily_product_sales.create(conn, checkfirst=True)
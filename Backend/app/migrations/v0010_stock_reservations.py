@@ -0,0 +1,26 @@
+"""products.reserved and stock_reservations: TTL holds on stock taken when a checkout starts"""
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, MetaData, Table, UniqueConstraint, text
+from sqlalchemy.sql import func
+
+from app.migrations import has_column
+
+metadata = MetaData()
+Table("users", metadata, Column("id", Integer, primary_key=True))
+Table("products", metadata, Column("id", Integer, primary_key=True))
+stock_reservations = Table(
+    "stock_reservations", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("product_id", Integer, ForeignKey("products.id"), nullable=False),
+    Column("quantity", Integer, nullable=False),
+    Column("expires_at", DateTime(timezone=True), nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    UniqueConstraint("user_id", "product_id", name="uq_stock_reservations_user_product"),
+    Index("ix_stock_reservations_expires_at", "expires_at"),
+)
+
+
+def upgrade(conn):
+    if not has_column(conn, "products", "reserved"):
+        conn.execute(text("ALTER TABLE products ADD COLUMN reserved INTEGER NOT NULL DEFAULT 0"))
+    stock_reservations.create(conn, checkfirst=True)
@@ -1,7 +1,7 @@
 from fastapi import HTTPException, status
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from app.schemas.OrderItem import Read_OrderItem_Schema
-from typing import List
+from typing import List, Literal, Optional
 from datetime import datetime
 class Add_to_Cart_Schema(BaseModel):
     product_id: int
@@ -14,4 +14,25 @@ class Read_Cart_Schema(BaseModel):
 
      class Config:
         from_attributes = True
-    
\ No newline at end of file
+    
+
+class Cart_Operation_Schema(BaseModel):
+    """One step of a batch cart update: add a product, or set/remove a line"""
+    op: Literal["add", "set", "remove"]
+    product_id: Optional[int] = None  # add
+    item_id: Optional[int] = None     # set, remove
+    quantity: Optional[int] = Field(None, gt=0)  # add, set
+
+    @model_validator(mode="after")
+    def check_fields(self):
+        if self.op == "add" and self.product_id is None:
+            raise ValueError("add needs product_id")
+        if self.op in ("set", "remove") and self.item_id is None:
+            raise ValueError(f"{self.op} needs item_id")
+        if self.op in ("add", "set") and self.quantity is None:
+            raise ValueError(f"{self.op} needs quantity")
+        return self
+
+class Cart_Batch_Schema(BaseModel):
+    """Operations applied in order, all or nothing"""
+    operations: List[Cart_Operation_Schema] = Field(min_length=1, max_length=100)
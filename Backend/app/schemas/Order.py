@@ -17,4 +17,27 @@ class Read_order_Schema(BaseModel):
         from_attributes=True
     
 class Update_order_Schema(BaseModel):
-    items:Optional[List[Update_OrderItem_Schema]]=None
\ No newline at end of file
+    items:Optional[List[Update_OrderItem_Schema]]=None
+
+class Order_Line_Schema(BaseModel):
+    id: int
+    product_id: int
+    product_name: Optional[str] = None
+    quantity: int
+    price: float
+
+class Order_Summary_Schema(BaseModel):
+    """Order row for list views; items only when requested"""
+    id: int
+    user_id: int
+    status: Optional[str] = None
+    total_price: float
+    created_at: Optional[datetime] = None
+    item_count: Optional[int] = None
+    items: Optional[List[Order_Line_Schema]] = None
+
+class Order_Page_Schema(BaseModel):
+    """One page of orders plus the cursor for the next page"""
+    items: List[Order_Summary_Schema]
+    next_cursor: Optional[int] = None  # pass as after_id; None on the last page
+    limit: int
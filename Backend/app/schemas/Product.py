@@ -1,11 +1,12 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 
 class Product_Read_Schema(BaseModel):
     id: int
+    sku: Optional[str] = None
     name: str = Field(min_length=1, max_length=100)
     description: str = Field(min_length=1, max_length=150)
-    quantity: int = Field(gt=0)
+    quantity: int = Field(ge=0)  # sold-out products are still readable
     price: float = Field(gt=0)
     image_url: Optional[str] = None
     featured: Optional[bool] = False
@@ -16,17 +17,41 @@ class Product_Read_Schema(BaseModel):
         populate_by_name = True
 
 class Product_Create_Schema(BaseModel):
+    sku: Optional[str] = Field(None, min_length=1, max_length=64)
     name: str = Field(min_length=1, max_length=100)
     description: str = Field(min_length=1, max_length=150)
     quantity: int = Field(gt=0)
-    price: float = Field(gt=0)
+    price: float = Field(ge=0.01)
     image_url: Optional[str] = None
     featured: Optional[bool] = False
     
+class Product_Import_Schema(BaseModel):
+    """One row of a bulk import; rows with a known sku update that product"""
+    sku: Optional[str] = Field(None, min_length=1, max_length=64)
+    name: str = Field(min_length=1, max_length=100)
+    description: str = Field(min_length=1, max_length=150)
+    quantity: int = Field(ge=0)
+    price: float = Field(ge=0.01)
+    image_url: Optional[str] = Field(None, max_length=500)
+    featured: Optional[bool] = False
+
 class Product_Update_Schema(BaseModel):
     name: Optional[str] = Field(None, min_length=1, max_length=100)
     description: Optional[str] = Field(None, min_length=1, max_length=150)
     quantity: Optional[int] = Field(None, gt=0)
-    price: Optional[float] = Field(None, gt=0)
+    price: Optional[float] = Field(None, ge=0.01)
     image_url: Optional[str] = None
     featured: Optional[bool] = None
+
+class Product_Page_Schema(BaseModel):
+    """One page of products plus the cursor for the next page"""
+    items: List[Product_Read_Schema]
+    next_cursor: Optional[int] = None  # pass as after_id; None on the last page
+    limit: int
+
+class Product_Search_Schema(BaseModel):
+    """Ranked search results (best match first)"""
+    items: List[Product_Read_Schema]
+    total: int  # lower bound when a short prefix matches many words
+    limit: int
+    offset: int
@@ -1,16 +1,16 @@
 # Schemas package
 from .User import UserCreateSchema, UserReadSchema, UserUpdateSchema
-from .Product import Product_Create_Schema, Product_Read_Schema, Product_Update_Schema
+from .Product import Product_Create_Schema, Product_Read_Schema, Product_Update_Schema, Product_Page_Schema, Product_Search_Schema, Product_Import_Schema
 from .Login import UserLogin
-from .Order import Create_Order_Schema, Read_order_Schema, Update_order_Schema
+from .Order import Create_Order_Schema, Read_order_Schema, Update_order_Schema, Order_Summary_Schema, Order_Page_Schema
 from .OrderItem import Create_OrderItem_Schema, Read_OrderItem_Schema, Update_OrderItem_Schema
-from .Cart import Add_to_Cart_Schema, Read_Cart_Schema
+from .Cart import Add_to_Cart_Schema, Read_Cart_Schema, Cart_Operation_Schema, Cart_Batch_Schema
 
 __all__ = [
     "UserCreateSchema", "UserReadSchema", "UserUpdateSchema",
-    "Product_Create_Schema", "Product_Read_Schema", "Product_Update_Schema",
+    "Product_Create_Schema", "Product_Read_Schema", "Product_Update_Schema", "Product_Page_Schema", "Product_Search_Schema", "Product_Import_Schema",
     "UserLogin",
-    "Create_Order_Schema", "Read_order_Schema", "Update_order_Schema",
+    "Create_Order_Schema", "Read_order_Schema", "Update_order_Schema", "Order_Summary_Schema", "Order_Page_Schema",
     "Create_OrderItem_Schema", "Read_OrderItem_Schema", "Update_OrderItem_Schema",
-    "Add_to_Cart_Schema", "Read_Cart_Schema"
+    "Add_to_Cart_Schema", "Read_Cart_Schema", "Cart_Operation_Schema", "Cart_Batch_Schema"
 ]
@@ -0,0 +1,275 @@
+"""
+Benchmark harness for the E-commerce API.
+
+Seeds a dedicated database, drives the real FastAPI app in-process through
+httpx, and reports latency percentiles, throughput and SQL queries per
+request for each endpoint and concurrency level. Results are written as
+JSON so runs from different releases can be compared:
+
+    cd Backend
+    python -m benchmarks.bench_api --products 5000 --concurrency 1,10,50 --output bench.json
+    python -m benchmarks.bench_api --compare old.json bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+BENCH_DB = "sqlite:///./bench.db"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the E-commerce API")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", BENCH_DB),
+                        help="Database to seed and benchmark (it is wiped first)")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--orders", type=int, default=5, help="Orders per user")
+    parser.add_argument("--cart-lines", type=int, default=5, help="Cart lines per user")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and concurrency level")
+    parser.add_argument("--concurrency", default="1,10,50", help="Comma-separated concurrency levels")
+    parser.add_argument("--endpoints", default=None, help="Comma-separated subset of endpoints to run")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Write JSON results to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="Compare two result files instead of running")
+    return parser.parse_args(argv)
+
+
+# ==================== SEEDING ====================
+
+def seed_database(args):
+    """Recreate all tables and bulk-insert users, products, orders and carts"""
+    from database import Base, engine, SessionLocal
+    from app.Models import User, Product, Orders, OrderItem, Cart
+    from app.core.cart_store import encode_cart, new_cart
+    from app.core.security import hash_password
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    rng = random.Random(args.seed)
+    hashed = hash_password("benchmark-password")  # one argon2 hash reused by every user
+    db = SessionLocal()
+    try:
+        db.bulk_insert_mappings(User, [
+            {"id": i, "email": f"user{i}@bench.example.com", "hashed_password": hashed, "is_active": True}
+            for i in range(1, args.users + 1)
+        ])
+        db.bulk_insert_mappings(Product, [
+            {
+                "id": i,
+                "name": f"Product {i}",
+                "description": f"Benchmark product number {i}",
+                "price_cents": rng.randint(100, 50000),
+                "quantity": 1_000_000,
+                "featured": i % 10 == 0,
+            }
+            for i in range(1, args.products + 1)
+        ])
+
+        orders, items, carts = [], [], []
+        order_id = 0
+        for user_id in range(1, args.users + 1):
+            for _ in range(args.orders):
+                order_id += 1
+                total = 0
+                for product_id in rng.sample(range(1, args.products + 1), min(3, args.products)):
+                    price = rng.randint(100, 50000)
+                    items.append({"order_id": order_id, "product_id": product_id, "quantity": 1, "price_cents": price})
+                    total += price
+                orders.append({"id": order_id, "user_id": user_id, "status": "Pending", "total_cents": total})
+            cart = new_cart()
+            for product_id in rng.sample(range(1, args.products + 1), min(args.cart_lines, args.products)):
+                price = rng.randint(100, 50000)
+                cart["lines"].append({"id": cart["next_line_id"], "product_id": product_id, "quantity": 1, "price_cents": price})
+                cart["next_line_id"] += 1
+                cart["total_cents"] += price
+            cart["version"] = 1
+            carts.append({"user_id": user_id, "data": encode_cart(cart), "version": 1})
+        db.bulk_insert_mappings(Orders, orders)
+        db.bulk_insert_mappings(OrderItem, items)
+        db.bulk_insert_mappings(Cart, carts)
+        db.commit()
+    finally:
+        db.close()
+
+
+# ==================== SCENARIOS ====================
+
+def build_scenarios(args, tokens):
+    """Endpoint name -> function(rng) returning (method, url, kwargs)"""
+    def auth(rng):
+        return {"Authorization": f"Bearer {tokens[rng.randrange(len(tokens))]}"}
+
+    def product_id(rng):
+        return rng.randint(1, args.products)
+
+    return {
+        "GET /api/products": lambda rng: ("GET", "/api/products", {"params": {"limit": 20}}),
+        "GET /api/products/{id}": lambda rng: ("GET", f"/api/products/{product_id(rng)}", {}),
+        "GET /api/cart": lambda rng: ("GET", "/api/cart", {"headers": auth(rng)}),
+        "POST /api/cart/items": lambda rng: (
+            "POST", "/api/cart/items", {"headers": auth(rng), "json": {"product_id": product_id(rng), "quantity": 1}}
+        ),
+        "GET /api/orders/": lambda rng: ("GET", "/api/orders/", {"headers": auth(rng)}),
+        "POST /api/orders/": lambda rng: (
+            "POST", "/api/orders/",
+            {"headers": auth(rng), "json": {"items": [{"product_id": product_id(rng), "quantity": 1}]}}
+        ),
+        "POST /api/auth/login": lambda rng: (
+            "POST", "/api/auth/login",
+            {"json": {"email": f"user{rng.randint(1, args.users)}@bench.example.com", "password": "benchmark-password"}}
+        ),
+    }
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def run_level(client, make_request, total, concurrency, seed):
+    """Send `total` requests with `concurrency` workers; return latencies and error count"""
+    latencies, errors = [], 0
+    remaining = total
+
+    async def worker(worker_id):
+        nonlocal remaining, errors
+        rng = random.Random(seed * 1000 + worker_id)
+        while remaining > 0:
+            remaining -= 1
+            method, url, kwargs = make_request(rng)
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+async def count_queries(client, make_request, samples=5):
+    """Average SQL statements per request, measured sequentially"""
+    from app.core.query_counter import QueryCounter
+
+    rng = random.Random(0)
+    with QueryCounter() as counter:
+        for _ in range(samples):
+            method, url, kwargs = make_request(rng)
+            await client.request(method, url, **kwargs)
+    return counter.count / samples
+
+
+async def run_benchmarks(args):
+    import httpx
+    from main import app
+    from app.core.security import create_access_token
+
+    tokens = [create_access_token({"sub": str(i), "email": f"user{i}@bench.example.com"}) for i in range(1, args.users + 1)]
+    scenarios = build_scenarios(args, tokens)
+    if args.endpoints:
+        wanted = [name.strip() for name in args.endpoints.split(",")]
+        scenarios = {name: scenarios[name] for name in wanted}
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, make_request in scenarios.items():
+            queries = await count_queries(client, make_request)
+            for concurrency in levels:
+                latencies, errors, elapsed = await run_level(client, make_request, args.requests, concurrency, args.seed)
+                latencies.sort()
+                result = {
+                    "endpoint": name,
+                    "concurrency": concurrency,
+                    "requests": len(latencies),
+                    "errors": errors,
+                    "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+                    "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+                    "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+                    "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+                    "throughput_rps": round(len(latencies) / elapsed, 2),
+                    "queries_per_request": round(queries, 2),
+                }
+                results.append(result)
+                print(f"{name:<26} c={concurrency:<4} p50={result['p50_ms']:>8.2f}ms "
+                      f"p95={result['p95_ms']:>8.2f}ms p99={result['p99_ms']:>8.2f}ms "
+                      f"rps={result['throughput_rps']:>8.1f} q/req={result['queries_per_request']:.1f} "
+                      f"errors={errors}")
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ==================== COMPARISON ====================
+
+def compare(baseline_path, current_path):
+    """Print the change in p95 latency, throughput and queries per endpoint/level"""
+    with open(baseline_path) as f:
+        baseline = {(r["endpoint"], r["concurrency"]): r for r in json.load(f)["results"]}
+    with open(current_path) as f:
+        current = json.load(f)["results"]
+
+    def delta(old, new):
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"{'endpoint':<26} {'c':>4} {'p95 ms':>18} {'rps':>20} {'q/req':>12}")
+    for row in current:
+        old = baseline.get((row["endpoint"], row["concurrency"]))
+        if old is None:
+            continue
+        print(f"{row['endpoint']:<26} {row['concurrency']:>4} "
+              f"{row['p95_ms']:>9.2f} {delta(old['p95_ms'], row['p95_ms']):>8} "
+              f"{row['throughput_rps']:>10.1f} {delta(old['throughput_rps'], row['throughput_rps']):>9} "
+              f"{old['queries_per_request']:>5.1f}->{row['queries_per_request']:<5.1f}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    # database.py reads DATABASE_URL at import time
+    os.environ["DATABASE_URL"] = args.database_url
+    print(f"Seeding {args.database_url}: {args.users} users, {args.products} products, "
+          f"{args.orders} orders and {args.cart_lines} cart lines per user")
+    seed_database(args)
+
+    results = asyncio.run(run_benchmarks(args))
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
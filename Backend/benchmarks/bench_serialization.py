@@ -0,0 +1,146 @@
+"""
+Serialization benchmark for product list pages.
+
+Compares the CPU cost of turning one page of products into a JSON body:
+
+  schema     ORM objects -> product_to_dict -> Product_Read_Schema per row ->
+             Product_Page_Schema.model_dump -> FastAPI response_model
+             validation -> JSONResponse (the list_products path before the
+             fast path)
+  rows       row tuples -> rows_to_dicts -> FastJSONResponse with orjson
+             (the current list_products path)
+  rows-json  the same with the standard library encoder, i.e. without orjson
+
+No database or HTTP is involved, only the serialization work:
+
+    cd Backend
+    python -m benchmarks.bench_serialization --sizes 20,100,1000 --output serialization.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark product page serialization")
+    parser.add_argument("--sizes", default="20,100,1000", help="Comma-separated page sizes")
+    parser.add_argument("--repeat", type=int, default=200, help="Pages encoded per measurement")
+    parser.add_argument("--rounds", type=int, default=5, help="Measurements per path and size (median reported)")
+    parser.add_argument("--output", default=None, help="Write JSON results to this file")
+    return parser.parse_args(argv)
+
+
+def make_rows(count):
+    """Product row tuples in PRODUCT_ROW_FIELDS order"""
+    return [
+        (i, f"SKU-{i:06d}", f"Product {i}", f"Description of product number {i}",
+         round(1 + i * 0.37 % 500, 2), i % 50, f"/api/images/{i:064x}.jpg", i % 7 == 0)
+        for i in range(1, count + 1)
+    ]
+
+
+def build_paths():
+    """Name -> async callable(rows, products) returning the encoded body"""
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+    from app.CRUD.Crud import PRODUCT_ROW_FIELDS, product_to_dict
+    from app.core import fast_json
+    from app.core.fast_json import FastJSONResponse, rows_to_dicts
+    from app.schemas.Product import Product_Page_Schema, Product_Read_Schema
+
+    field = create_response_field(name="Response_list_products", type_=Product_Page_Schema, mode="serialization")
+
+    async def schema(rows, products):
+        items = [Product_Read_Schema(**product_to_dict(p)) for p in products]
+        page = Product_Page_Schema(items=items, next_cursor=None, limit=len(items)).model_dump()
+        content = await serialize_response(field=field, response_content=page)
+        return JSONResponse(content).body
+
+    async def fast(rows, products):
+        page = {"items": rows_to_dicts(PRODUCT_ROW_FIELDS, rows), "next_cursor": None, "limit": len(rows)}
+        return FastJSONResponse(page).body
+
+    async def fast_stdlib(rows, products):
+        encoder, fast_json.orjson = fast_json.orjson, None
+        try:
+            return await fast(rows, products)
+        finally:
+            fast_json.orjson = encoder
+
+    return {"schema": schema, "rows": fast, "rows-json": fast_stdlib}
+
+
+async def measure(path, rows, products, repeat, rounds):
+    """Median seconds per encoded page"""
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            await path(rows, products)
+        timings.append((time.perf_counter() - start) / repeat)
+    return statistics.median(timings)
+
+
+async def run(args):
+    from app.CRUD.Crud import PRODUCT_ROW_FIELDS
+    from app.Models.Product import Product
+
+    paths = build_paths()
+    results = []
+    for size in [int(s) for s in args.sizes.split(",")]:
+        rows = make_rows(size)
+        products = [Product(**dict(zip(PRODUCT_ROW_FIELDS, row))) for row in rows]
+
+        # Both paths must produce the same document
+        bodies = {name: json.loads(await path(rows, products)) for name, path in paths.items()}
+        if len({json.dumps(body, sort_keys=True) for body in bodies.values()}) != 1:
+            raise SystemExit(f"Paths disagree on the encoded page for size {size}")
+
+        baseline = None
+        for name, path in paths.items():
+            seconds = await measure(path, rows, products, args.repeat, args.rounds)
+            baseline = baseline or seconds
+            result = {
+                "path": name,
+                "page_size": size,
+                "page_us": round(seconds * 1e6, 2),
+                "row_us": round(seconds * 1e6 / size, 3),
+                "speedup": round(baseline / seconds, 2),
+            }
+            results.append(result)
+            print(f"{name:<10} size={size:<6} page={result['page_us']:>10.1f}us "
+                  f"row={result['row_us']:>7.3f}us speedup={result['speedup']:>5.2f}x")
+    return results
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    from app.core import fast_json
+    if fast_json.orjson is None:
+        print("orjson is not installed: the 'rows' path uses the standard library encoder")
+
+    results = asyncio.run(run(args))
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "orjson": getattr(fast_json.orjson, "__version__", None),
+            "config": {key: value for key, value in vars(args).items() if key != "output"},
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
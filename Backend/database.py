@@ -1,22 +1,78 @@
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from starlette.concurrency import run_in_threadpool
+from app.core.pool_metrics import (
+    InstrumentedAsyncAdaptedQueuePool, InstrumentedQueuePool, PoolMetrics, pool_metrics
+)
+from contextlib import asynccontextmanager
+from typing import Union
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Get database URL from environment or use SQLite as default
+# Get database URL from environment or use SQLite as default.
+# Naming an async driver (sqlite+aiosqlite://, postgresql+asyncpg://) switches
+# the API to non-blocking sessions; a plain URL keeps blocking sessions.
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./ecommerce.db")
 
-# Create engine with proper settings for SQLite
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-else:
-    engine = create_engine(DATABASE_URL)
+# Async driver -> blocking driver used for scripts, migrations and create_all
+SYNC_DRIVERS = {
+    "sqlite+aiosqlite": "sqlite",
+    "postgresql+asyncpg": "postgresql",
+}
+
+scheme, _, rest = DATABASE_URL.partition("://")
+USE_ASYNC = scheme in SYNC_DRIVERS
+SYNC_DATABASE_URL = f"{SYNC_DRIVERS[scheme]}://{rest}" if USE_ASYNC else DATABASE_URL
+
+# Connection pool settings. Ignored for in-memory SQLite, which keeps one
+# connection, and for aiosqlite, whose pooled connections each pin a thread.
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds; -1 disables
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("true", "1", "yes")
+
+
+def _engine_options(url: str, poolclass) -> dict:
+    """Keyword arguments for create_engine / create_async_engine"""
+    options = {}
+    if url.startswith("sqlite") and not url.startswith("sqlite+aiosqlite"):
+        options["connect_args"] = {"check_same_thread": False}
+    in_memory = ":memory:" in url or url.rstrip("/").endswith(":")
+    if url.startswith("sqlite+aiosqlite") or (url.startswith("sqlite") and in_memory):
+        return options
+    options.update(
+        poolclass=poolclass,
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+        pool_recycle=POOL_RECYCLE,
+        pool_pre_ping=POOL_PRE_PING,
+    )
+    return options
+
+
+engine = create_engine(SYNC_DATABASE_URL, **_engine_options(SYNC_DATABASE_URL, InstrumentedQueuePool))
+pool_metrics["sync"] = PoolMetrics("sync")
+pool_metrics["sync"].attach(engine.pool)
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+async_engine = None
+AsyncSessionLocal = None
+if USE_ASYNC:
+    async_engine = create_async_engine(
+        DATABASE_URL, **_engine_options(DATABASE_URL, InstrumentedAsyncAdaptedQueuePool)
+    )
+    pool_metrics["async"] = PoolMetrics("async")
+    pool_metrics["async"].attach(async_engine.sync_engine.pool)
+    # Objects stay readable after commit so responses never trigger lazy IO
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
@@ -26,4 +82,71 @@ def get_db():
         yield db
     finally:
         db.close()
-    
\ No newline at end of file
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+@asynccontextmanager
+async def open_request_session():
+    """A session of the same kind as get_request_db, for work that outlives
+    the request handler (e.g. a streaming response body)"""
+    if USE_ASYNC:
+        async with AsyncSessionLocal() as db:
+            yield db
+    else:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+# Either kind of session, as yielded by get_request_db
+DBSession = Union[Session, AsyncSession]
+
+# Session dependency for the routers: AsyncSession or Session depending on DATABASE_URL
+get_request_db = get_async_db if USE_ASYNC else get_db
+
+
+def after_commit(db: Session, fn, *args) -> None:
+    """
+    Run the non-database follow-up of a committed write (cache invalidation,
+    search index updates) for a Crud function.
+
+    Inside run_db with an AsyncSession the Crud function runs on the event
+    loop, so the call is queued and run_db makes it in the threadpool once the
+    function returns. Otherwise it runs right away.
+    """
+    deferred = db.info.get("after_commit")
+    if deferred is None:
+        fn(*args)
+    else:
+        deferred.append((fn, args))
+
+
+def _run_deferred(deferred) -> None:
+    for fn, args in deferred:
+        fn(*args)
+
+
+async def run_db(db, fn, *args, **kwargs):
+    """
+    Run a blocking Crud-style function `fn(session, *args)` without blocking the event loop.
+
+    With an AsyncSession the function runs through run_sync, so its queries go
+    over the async driver and no thread is held while waiting on the database;
+    its after_commit() work then runs in the threadpool. With a plain Session
+    the whole function runs in Starlette's threadpool.
+    """
+    if isinstance(db, AsyncSession):
+        deferred = db.sync_session.info["after_commit"] = []
+        try:
+            return await db.run_sync(fn, *args, **kwargs)
+        finally:
+            del db.sync_session.info["after_commit"]
+            if deferred:
+                await run_in_threadpool(_run_deferred, deferred)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
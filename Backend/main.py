@@ -1,95 +1,138 @@
+"""
+ASGI entry point.
+
+Importing this module is cheap: routers, engines and pools are only loaded
+when the app is built, and the schema is never touched here. Apply
+migrations with `python -m app.migrations upgrade` (or AUTO_MIGRATE=true for
+local development). `main:app` builds the app on first access;
+`uvicorn --factory main:create_app` builds a fresh one.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from app.core.startup import startup_report
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from database import Base, engine
-from app.Router import Auth, Products, Orders, Cart
-import sqlalchemy
-
-# Create tables
-try:
-    Base.metadata.create_all(bind=engine)
-    
-    # Try to add missing columns for existing databases
-    try:
-        db_url = str(engine.url).lower()
-        
-        if 'sqlite' in db_url:
-            # SQLite migration
-            with engine.connect() as conn:
-                result = conn.execute(sqlalchemy.text("PRAGMA table_info(products)"))
-                columns = [row[1] for row in result]
-                
-                if 'featured' not in columns:
-                    conn.execute(sqlalchemy.text("ALTER TABLE products ADD COLUMN featured BOOLEAN DEFAULT 0"))
-                    conn.commit()
-                
-                if 'image_url' not in columns:
-                    conn.execute(sqlalchemy.text("ALTER TABLE products ADD COLUMN image_url VARCHAR(500)"))
-                    conn.commit()
-        elif 'postgresql' in db_url or 'postgres' in db_url:
-            # PostgreSQL migration - use begin() for proper transaction handling
-            with engine.begin() as conn:
-                # Check if columns exist
-                check_query = sqlalchemy.text("""
-                    SELECT column_name 
-                    FROM information_schema.columns 
-                    WHERE table_name='products' AND column_name IN ('featured', 'image_url')
-                """)
-                result = conn.execute(check_query)
-                existing_columns = [row[0] for row in result]
-                
-                if 'featured' not in existing_columns:
-                    print("Adding 'featured' column to products table (PostgreSQL)...")
-                    conn.execute(sqlalchemy.text("ALTER TABLE products ADD COLUMN featured BOOLEAN DEFAULT FALSE"))
-                    print("✓ Added 'featured' column")
-                else:
-                    print("✓ 'featured' column already exists")
-                
-                if 'image_url' not in existing_columns:
-                    print("Adding 'image_url' column to products table (PostgreSQL)...")
-                    conn.execute(sqlalchemy.text("ALTER TABLE products ADD COLUMN image_url VARCHAR(500)"))
-                    print("✓ Added 'image_url' column")
-                else:
-                    print("✓ 'image_url' column already exists")
-    except Exception as e:
-        print(f"Note: Could not migrate existing database (this is OK if tables are new): {e}")
-        import traceback
-        traceback.print_exc()
-except Exception as e:
-    print(f"Error creating tables: {e}")
-    import traceback
-    traceback.print_exc()
-
-app = FastAPI(
-    title="E-commerce API",
-    description="E-commerce backend API",
-    version="1.0.0"
-)
-
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Change to frontend URL in production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include routers
-app.include_router(Auth.router)
-app.include_router(Products.router)
-app.include_router(Orders.router)
-app.include_router(Cart.router)
-
-
-@app.get("/")
-def read_root():
-    return {
-        "message": "Welcome to E-commerce API",
-        "docs": "/docs",
-        "openapi_schema": "/openapi.json"
-    }
-
-
-@app.get("/health")
-def health_check():
-    return {"status": "healthy"}
+from fastapi.responses import PlainTextResponse
+
+logger = logging.getLogger(__name__)
+
+
+def create_app() -> FastAPI:
+    """Build the FastAPI application"""
+    with startup_report.phase("import_modules"):
+        from fastapi.middleware.cors import CORSMiddleware
+        from database import engine, async_engine
+        from app.core.config import AUTO_MIGRATE
+        from app.core.hashing_pool import hashing_pool
+        from app.core.metrics import MetricsMiddleware, registry
+        from app.core.query_tracing import QueryTracingMiddleware, install_query_tracing
+        from app.core.thumbnails import thumbnail_pool
+        from app.core.cart_store import cart_store, flush_carts, run_cart_flusher
+        from app.core.config import CART_FLUSH_INTERVAL, JOB_WORKERS, JOB_POLL_INTERVAL, JOB_STALL_WARNING
+        from app.core.jobs import run_job_worker, watch_unattended_jobs
+        from app.core.reservations import run_reservation_sweeper
+        from app.core.config import RESERVATION_SWEEP_INTERVAL
+        from app.core import order_jobs  # noqa: F401 (registers the post-order job handlers)
+        from app.Router import Auth, Products, Orders, Cart, Admin, Images
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        """Optionally migrate (development only), start the cart flusher, job workers (or the unattended-jobs watchdog)
+        and reservation sweeper and print the startup report; on shutdown stop and await those tasks, persist pending
+        carts, then close pooled connections so workers exit promptly"""
+        if AUTO_MIGRATE:
+            from starlette.concurrency import run_in_threadpool
+            from app.migrations import upgrade as upgrade_schema
+            with startup_report.phase("migrations"):
+                await run_in_threadpool(upgrade_schema, engine)
+        tasks = []
+        if cart_store.write_behind:
+            tasks.append(asyncio.create_task(run_cart_flusher(CART_FLUSH_INTERVAL)))
+        tasks += [asyncio.create_task(run_job_worker(JOB_POLL_INTERVAL)) for _ in range(JOB_WORKERS)]
+        if not JOB_WORKERS:
+            # Jobs are only enqueued here; warn if nothing else is running them
+            logger.warning("Background jobs are not run in this process (JOB_WORKERS=0); start `python -m app.core.jobs run`")
+            tasks.append(asyncio.create_task(watch_unattended_jobs(JOB_STALL_WARNING)))
+        tasks.append(asyncio.create_task(run_reservation_sweeper(RESERVATION_SWEEP_INTERVAL)))
+        startup_report.mark_ready()
+        try:
+            yield
+        finally:
+            # A job cut off mid-run is picked up again when its lease runs out
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if cart_store.write_behind:
+                flush_carts()
+            if async_engine is not None:
+                await async_engine.dispose()
+            engine.dispose()
+            hashing_pool.shutdown()
+            thumbnail_pool.shutdown()
+
+    with startup_report.phase("create_app"):
+        app = FastAPI(
+            title="E-commerce API",
+            description="E-commerce backend API",
+            version="1.0.0",
+            lifespan=lifespan
+        )
+
+        # Per-request SQL tracing (Server-Timing header, JSON request log, slow-query log)
+        install_query_tracing(engine)
+        if async_engine is not None:
+            install_query_tracing(async_engine.sync_engine)
+        app.add_middleware(QueryTracingMiddleware)
+
+        # Request latency/status metrics, served at /metrics
+        app.add_middleware(MetricsMiddleware)
+
+        # Add CORS middleware
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=["*"],  # Change to frontend URL in production
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+
+        # Include routers
+        app.include_router(Auth.router)
+        app.include_router(Products.router)
+        app.include_router(Orders.router)
+        app.include_router(Cart.router)
+        app.include_router(Admin.router)
+        app.include_router(Images.router)
+
+    @app.get("/")
+    def read_root():
+        return {
+            "message": "Welcome to E-commerce API",
+            "docs": "/docs",
+            "openapi_schema": "/openapi.json"
+        }
+
+    @app.get("/health")
+    def health_check():
+        return {"status": "healthy"}
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def metrics():
+        """Process metrics in Prometheus text format (per worker process)"""
+        return registry.render()
+
+    return app
+
+
+_app = None
+
+
+def __getattr__(name):
+    # Build `main.app` lazily so importing main (tools, tests, the migration
+    # command) does not pay for routers, engines and pools
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
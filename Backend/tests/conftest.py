@@ -0,0 +1,97 @@
+"""
+Shared fixtures. The app reads its settings at import time, so the test
+database (a fresh SQLite file) is configured before anything from the app
+is imported.
+
+    cd Backend
+    python -m pytest -q
+"""
+import itertools
+import os
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="ecommerce-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ["IMAGE_STORE_URL"] = f"file://{os.path.join(_tmp, 'images')}"
+os.environ.setdefault("JOB_WORKERS", "0")
+os.environ.setdefault("REQUEST_LOG_ENABLED", "false")
+
+import pytest
+from jose import jwt
+
+from app.core.config import ALGORITHM, SECRET_KEY
+from app.migrations import upgrade
+from app.Models.Product import Product
+from app.Models.User import User
+from database import SessionLocal, engine
+
+upgrade(engine)
+
+_emails = itertools.count(1)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def make_product(db):
+    """Create a product row and return its id"""
+    def make(quantity: int = 10, price: float = 10.0, name: str = "Widget") -> int:
+        product = Product(name=name, description="Test product", price=price, quantity=quantity)
+        db.add(product)
+        db.commit()
+        return product.id
+    return make
+
+
+@pytest.fixture
+def make_user(db):
+    """Create an active user and return its id"""
+    def make(email: str = None) -> int:
+        user = User(email=email or f"user{next(_emails)}@example.com", hashed_password="x", is_active=True)
+        db.add(user)
+        db.commit()
+        return user.id
+    return make
+
+
+@pytest.fixture
+def auth_headers():
+    """Bearer token headers for a user id"""
+    def headers(user_id: int) -> dict:
+        token = jwt.encode({"sub": str(user_id)}, SECRET_KEY, algorithm=ALGORITHM)
+        return {"Authorization": f"Bearer {token}"}
+    return headers
+
+
+@pytest.fixture
+def admin_headers(make_user, auth_headers, monkeypatch):
+    """Bearer token headers for a new user listed in ADMIN_EMAILS"""
+    from app import dependencies
+    email = f"admin{next(_emails)}@example.com"
+    monkeypatch.setattr(dependencies, "ADMIN_EMAILS", {email})
+    return auth_headers(make_user(email))
+
+
+@pytest.fixture
+def server():
+    """The in-process RESP server (app.core.cache_server), standing in for Redis"""
+    from app.core.cache_server import CacheServer
+    server = CacheServer(port=0)
+    server.start_background()
+    yield server
+    server.stop()
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    import main
+    # Not entered as a context manager: no lifespan tasks (workers, sweepers)
+    return TestClient(main.app)
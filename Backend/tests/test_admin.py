@@ -0,0 +1,16 @@
+from app import dependencies
+
+
+def test_admin_routes_need_a_signed_in_user(client):
+    assert client.get("/api/admin/startup").status_code == 401
+
+
+def test_admin_routes_are_closed_without_admin_emails(client, make_user, auth_headers, monkeypatch):
+    monkeypatch.setattr(dependencies, "ADMIN_EMAILS", set())
+    response = client.get("/api/admin/startup", headers=auth_headers(make_user()))
+    assert response.status_code == 403
+
+
+def test_admin_routes_are_limited_to_admin_emails(client, make_user, auth_headers, admin_headers):
+    assert client.get("/api/admin/startup", headers=auth_headers(make_user())).status_code == 403
+    assert client.get("/api/admin/startup", headers=admin_headers).status_code == 200
@@ -0,0 +1,107 @@
+"""
+RedisBackend and shared cache namespaces against the in-process RESP server
+(app.core.cache_server); two backends stand in for two API workers.
+"""
+import pytest
+
+from app.core.cache import CacheNamespace, LRUCache, RedisBackend, product_cache
+
+
+def test_backend_round_trips(server):
+    backend = RedisBackend.from_url(server.url)
+
+    backend.set("product", {"id": 1, "name": "Pen"})
+    assert backend.get("product") == {"id": 1, "name": "Pen"}
+    assert backend.incr("counter") == 1 and backend.incr("counter") == 2
+    backend.delete("product")
+    assert backend.get("product", "missing") == "missing"
+
+
+def test_clear_invalidates_every_worker(server):
+    first = CacheNamespace(RedisBackend.from_url(server.url), "products:row", generation_ttl=0)
+    second = CacheNamespace(RedisBackend.from_url(server.url), "products:row", generation_ttl=0)
+
+    first.set(1, {"name": "Pen"})
+    assert second.get(1) == {"name": "Pen"}
+    second.clear()
+    assert first.get(1) is None
+
+
+def test_generation_is_reused_within_its_ttl(server):
+    backend = RedisBackend.from_url(server.url)
+    namespace = CacheNamespace(backend, "products:row", generation_ttl=60)
+    namespace.set(1, {"name": "Pen"})
+    sent = []
+    execute = backend.execute
+    backend.execute = lambda *args: sent.append(args[0]) or execute(*args)
+
+    assert namespace.get(1) == {"name": "Pen"}
+    assert sent == ["GET"]  # the data key only, no generation lookup
+
+
+def test_delete_uses_the_current_generation(server):
+    first = CacheNamespace(RedisBackend.from_url(server.url), "products:row", generation_ttl=60)
+    second = CacheNamespace(RedisBackend.from_url(server.url), "products:row", generation_ttl=60)
+    first.get(1)  # remembers generation 0
+    second.clear()
+    second.set(1, {"name": "Old"})
+
+    first.delete(1)
+
+    assert second.get(1) is None
+
+
+def test_server_going_down(server):
+    backend = RedisBackend.from_url(server.url)
+    namespace = CacheNamespace(backend, "products:row", generation_ttl=0)
+    namespace.set(1, {"name": "Pen"})
+
+    server.stop()
+
+    # Reads and writes degrade to misses...
+    assert namespace.get(1) is None
+    namespace.set(1, {"name": "Pen"})
+    assert backend.errors >= 2
+    # ...but invalidation is never silently lost
+    for fail in (lambda: namespace.delete(1), namespace.clear, lambda: backend.incr("counter"), backend.clear):
+        with pytest.raises((OSError, ConnectionError)):
+            fail()
+
+
+def test_fill_after_a_concurrent_delete_is_dropped(server):
+    reader = CacheNamespace(RedisBackend.from_url(server.url), "products:row", generation_ttl=0)
+    writer = CacheNamespace(RedisBackend.from_url(server.url), "products:row", generation_ttl=0)
+
+    token = reader.fill_token()  # the reader loads the old row ...
+    writer.delete(1)  # ... the writer commits and invalidates ...
+    assert reader.fill({1: {"price": 10}}, token) is False  # ... and the reader fills late
+    assert reader.get(1) is None
+
+    assert reader.fill({1: {"price": 12}}, reader.fill_token()) is True
+    assert writer.get(1) == {"price": 12}
+
+
+def test_local_clear_keeps_the_write_counter():
+    namespace = CacheNamespace(LRUCache(maxsize=10), "products:row")
+    token = namespace.fill_token()
+    namespace.clear()
+    assert namespace.fill({1: {"price": 10}}, token) is False
+    assert namespace.get(1) is None
+
+
+def test_read_racing_an_update_does_not_cache_the_old_row(client, db, make_product, monkeypatch):
+    from app.CRUD import Crud
+    product_id = make_product(price=10.0)
+    read_product_snapshot = Crud.read_product_snapshot
+
+    def read_then_update(db, product_id):
+        snapshot = read_product_snapshot(db, product_id)
+        # The update commits and invalidates while this reader holds the old row
+        assert client.put(f"/api/products/{product_id}", json={"price": 12.5}).status_code == 200
+        return snapshot
+    monkeypatch.setattr(Crud, "read_product_snapshot", read_then_update)
+
+    assert Crud.get_product_snapshot(db, product_id)["price"] == 10.0
+    monkeypatch.undo()
+    assert product_cache.get(product_id) is None
+    assert client.get(f"/api/products/{product_id}").json()["price"] == 12.5
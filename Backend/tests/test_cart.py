@@ -0,0 +1,158 @@
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.cart_store import DatabaseCartStore, MemoryCartStore
+from app.core.query_counter import QueryCounter
+from app.core.reservations import reserve_for_checkout
+from app.Models.Product import Product
+from database import SessionLocal
+
+
+def add(client, headers, product_id, quantity):
+    return client.post("/api/cart/items", json={"product_id": product_id, "quantity": quantity}, headers=headers)
+
+
+def test_stock_checks_read_live_unreserved_stock(client, db, make_product, make_user, auth_headers):
+    product_id = make_product(quantity=5)
+    buyer = auth_headers(make_user())
+    client.get(f"/api/products/{product_id}")  # cache a snapshot showing 5 in stock
+
+    db.get(Product, product_id).quantity = 2
+    db.commit()
+    assert add(client, buyer, product_id, 3).status_code == 400
+
+    reserve_for_checkout(db, make_user(), {product_id: 2}, ttl=60)
+    assert add(client, buyer, product_id, 1).status_code == 400
+
+
+def test_own_hold_counts_as_available(client, db, make_product, make_user, auth_headers):
+    product_id = make_product(quantity=2)
+    user_id = make_user()
+    headers = auth_headers(user_id)
+    item_id = add(client, headers, product_id, 1).json()["id"]
+    reserve_for_checkout(db, user_id, {product_id: 1}, ttl=60)
+
+    assert client.put(f"/api/cart/items/{item_id}", json={"quantity": 2}, headers=headers).status_code == 200
+
+
+def test_deleted_product_is_404_not_409(client, db, make_product, make_user, auth_headers):
+    product_id = make_product(quantity=5)
+    headers = auth_headers(make_user())
+    item_id = add(client, headers, product_id, 1).json()["id"]
+    db.delete(db.get(Product, product_id))
+    db.commit()
+
+    assert client.put(f"/api/cart/items/{item_id}", json={"quantity": 2}, headers=headers).status_code == 404
+    operations = [{"op": "set", "item_id": item_id, "quantity": 2}]
+    assert client.patch("/api/cart/items", json={"operations": operations}, headers=headers).status_code == 404
+
+
+def test_batch_patch_is_one_round_trip(client, make_product, make_user, auth_headers):
+    first, second, third = (make_product(quantity=10, price=price) for price in (1.0, 2.5, 4.0))
+    headers = auth_headers(make_user())
+    first_line = add(client, headers, first, 1).json()["id"]
+    second_line = add(client, headers, second, 1).json()["id"]
+    operations = [
+        {"op": "set", "item_id": first_line, "quantity": 4},
+        {"op": "remove", "item_id": second_line},
+        {"op": "add", "product_id": third, "quantity": 2},
+        {"op": "add", "product_id": third, "quantity": 1},
+    ]
+
+    with QueryCounter() as counter:
+        cart = client.patch("/api/cart/items", json={"operations": operations}, headers=headers).json()
+
+    assert sorted((item["product_id"], item["quantity"]) for item in cart["items"]) == [(first, 4), (third, 3)]
+    assert cart["total_price"] == 16.0
+    assert sum(statement.startswith("UPDATE carts") for statement in counter.statements) == 1
+
+
+def test_batch_patch_is_all_or_nothing(client, make_product, make_user, auth_headers):
+    product_id = make_product(quantity=2)
+    headers = auth_headers(make_user())
+    item_id = add(client, headers, product_id, 1).json()["id"]
+    operations = [{"op": "set", "item_id": item_id, "quantity": 2}, {"op": "add", "product_id": product_id, "quantity": 5}]
+
+    assert client.patch("/api/cart/items", json={"operations": operations}, headers=headers).status_code == 400
+    assert client.get("/api/cart", headers=headers).json()["items"][0]["quantity"] == 1
+
+
+def add_line(product_id):
+    return lambda cart: cart["lines"].append({"id": 1, "product_id": product_id, "quantity": 1, "price_cents": 100})
+
+
+def bump_version(user_id):
+    """A cart write by another request, which moves the cart's version on"""
+    other = SessionLocal()
+    try:
+        DatabaseCartStore().update(other, user_id, lambda cart: None)
+    finally:
+        other.close()
+
+
+def test_stale_version_is_replayed_then_409(db, make_product, make_user):
+    store = DatabaseCartStore()
+    user_id = make_user()
+    store.update(db, user_id, add_line(make_product()))
+
+    conflicts = iter([True])
+    def edit_once_raced(cart):
+        if next(conflicts, False):
+            bump_version(user_id)
+        cart["lines"][0]["quantity"] += 1
+    assert store.update(db, user_id, edit_once_raced)["lines"][0]["quantity"] == 2
+    assert store.conflicts == 1
+
+    def edit_always_raced(cart):
+        bump_version(user_id)
+    with pytest.raises(HTTPException) as raised:
+        store.update(db, user_id, edit_always_raced)
+    assert raised.value.status_code == 409
+
+
+def test_checkout_of_a_stale_cart_is_409(db, make_product, make_user):
+    store = DatabaseCartStore()
+    user_id = make_user()
+    cart = store.update(db, user_id, add_line(make_product()))
+    bump_version(user_id)
+
+    with pytest.raises(HTTPException) as raised:
+        store.stage_checkout(db, user_id, cart)
+    assert raised.value.status_code == 409
+
+
+class SlowMemoryCartStore(MemoryCartStore):
+    """A write-behind store whose backend writes take a while, like a network call"""
+
+    def _set(self, user_id, cart):
+        assert not self._claims_lock.locked(), "backend called with the lock held"
+        time.sleep(0.002)
+        super()._set(user_id, cart)
+
+
+def test_write_behind_edits_are_not_lost(make_user):
+    store = SlowMemoryCartStore()
+    user_id = make_user()
+    outcomes = []
+
+    def bump(cart):
+        cart["total_cents"] += 1
+
+    def edit():
+        try:
+            store.apply(user_id, bump)
+            outcomes.append("ok")
+        except HTTPException as e:
+            outcomes.append(e.status_code)
+
+    threads = [threading.Thread(target=edit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert set(outcomes) <= {"ok", 409}
+    assert store.cached(user_id)["total_cents"] == outcomes.count("ok") > 0
@@ -0,0 +1,74 @@
+"""
+Stress tests for the stock guard in Crud._place_order: many buyers race for
+a product with little stock, each on its own session and thread, and exactly
+the starting stock must be sold.
+"""
+import threading
+from collections import Counter
+
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from app.CRUD.Crud import checkout_cart, create_order
+from app.Models.Orderitem import OrderItem
+from app.Models.Product import Product
+from database import SessionLocal
+
+STOCK = 5
+BUYERS = 20
+
+
+def race(target, user_ids):
+    """Run target(session, user_id) for every user at once; returns outcome counts"""
+    barrier = threading.Barrier(len(user_ids))
+    outcomes = []
+
+    def buy(user_id):
+        session = SessionLocal()
+        try:
+            barrier.wait()
+            target(session, user_id)
+            outcomes.append("ok")
+        except HTTPException as e:
+            outcomes.append(e.status_code)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=buy, args=(user_id,)) for user_id in user_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return Counter(outcomes)
+
+
+def assert_sold_out(db, product_id):
+    db.expire_all()
+    product = db.get(Product, product_id)
+    orders = db.scalar(select(func.count()).select_from(OrderItem).where(OrderItem.product_id == product_id))
+    assert product.quantity >= 0
+    assert product.quantity == 0
+    assert orders == STOCK
+
+
+def test_create_order_never_oversells(db, make_product, make_user):
+    product_id = make_product(quantity=STOCK)
+    users = [make_user() for _ in range(BUYERS)]
+
+    outcomes = race(lambda session, user_id: create_order(session, user_id, [{"product_id": product_id, "quantity": 1}]), users)
+
+    assert outcomes == Counter({"ok": STOCK, 400: BUYERS - STOCK})
+    assert_sold_out(db, product_id)
+
+
+def test_checkout_cart_never_oversells(db, client, make_product, make_user, auth_headers):
+    product_id = make_product(quantity=STOCK)
+    users = [make_user() for _ in range(BUYERS)]
+    for user_id in users:
+        response = client.post("/api/cart/items", json={"product_id": product_id, "quantity": 1}, headers=auth_headers(user_id))
+        assert response.status_code == 200
+
+    outcomes = race(checkout_cart, users)
+
+    assert outcomes == Counter({"ok": STOCK, 400: BUYERS - STOCK})
+    assert_sold_out(db, product_id)
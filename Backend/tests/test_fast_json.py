@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from app.core import fast_json
+from app.core.fast_json import FastJSONResponse, dumps, rows_to_dicts
+from app.schemas.Product import Product_Page_Schema, Product_Read_Schema
+
+# Prices no other test uses, so a price filter isolates this module's products
+LOW, HIGH = 8000, 8999
+
+
+@pytest.fixture
+def products(db):
+    from app.Models.Product import Product
+    rows = [
+        Product(name="Kettle", description="Fast JSON test", price=8019.99, quantity=3, image_url="/img/kettle.jpg", featured=True),
+        Product(name="Tëapot ☕", description="Non-ASCII \"quoted\" text", price=8000.1, quantity=0),
+        Product(sku="FJ-1", name="Jug", description="Fast JSON test", price=8500, quantity=12),
+    ]
+    db.add_all(rows)
+    db.commit()
+    yield rows
+    for row in rows:
+        db.delete(row)
+    db.commit()
+
+
+def schema_page(products, limit):
+    """The same page run through the response_model, as FastAPI would render it"""
+    items = [Product_Read_Schema.model_validate(product) for product in products]
+    return json.loads(Product_Page_Schema(items=items, next_cursor=None, limit=limit).model_dump_json())
+
+
+@pytest.mark.parametrize("stdlib", [False, True])
+def test_list_page_matches_the_schema_encoding(client, products, monkeypatch, stdlib):
+    if stdlib:
+        monkeypatch.setattr(fast_json, "orjson", None)
+    from app.Router.Products import product_page_cache
+    product_page_cache.clear()  # make this request encode the rows itself
+
+    response = client.get("/api/products", params={"min_price": LOW, "max_price": HIGH, "limit": 10})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == schema_page(products, limit=10)
+
+
+def test_rows_to_dicts_keeps_field_order():
+    assert rows_to_dicts(("id", "name"), [(1, "a"), (2, "b")]) == [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}]
+    assert list(rows_to_dicts(("b", "a"), [(1, 2)])[0]) == ["b", "a"]
+
+
+def test_dumps_is_compact_utf8(monkeypatch):
+    value = {"name": "Tëa", "tags": [1, 2.5, None, True]}
+    encoded = dumps(value)
+    monkeypatch.setattr(fast_json, "orjson", None)
+
+    assert dumps(value) == encoded == '{"name":"Tëa","tags":[1,2.5,null,true]}'.encode("utf-8")
+
+
+def test_encoded_content_is_sent_as_is():
+    assert FastJSONResponse(b'{"a":1}').body == b'{"a":1}'
+    assert FastJSONResponse('{"é":1}').body == '{"é":1}'.encode("utf-8")
+    assert FastJSONResponse({"a": [1]}).body == b'{"a":[1]}'
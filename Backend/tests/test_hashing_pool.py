@@ -0,0 +1,47 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.hashing_pool import HashingPool, hash_password_async, verify_password_async
+
+
+def test_hashes_and_verifies_off_the_event_loop():
+    async def run():
+        hashed = await hash_password_async("correct horse")
+        return hashed, await verify_password_async("correct horse", hashed), await verify_password_async("wrong", hashed)
+
+    hashed, right, wrong = asyncio.run(run())
+    assert hashed != "correct horse" and right is True and wrong is False
+
+    pool = HashingPool(workers=1, max_queue=0)
+    try:
+        thread = asyncio.run(pool.run("probe", lambda: threading.current_thread().name))
+    finally:
+        pool.shutdown()
+    assert thread.startswith("hashing")
+
+
+def test_saturated_pool_rejects_with_503():
+    pool = HashingPool(workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def run():
+        # One call runs and one waits; a third is turned away at once
+        busy = [asyncio.ensure_future(pool.run("verify", release.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as error:
+            await pool.run("verify", release.wait, 5)
+        release.set()
+        await asyncio.gather(*busy)
+        return error.value
+
+    try:
+        error = asyncio.run(run())
+    finally:
+        pool.shutdown()
+    assert error.status_code == 503 and error.headers["Retry-After"] == "1"
+    stats = pool.stats()
+    assert stats["rejected"] == 1 and stats["in_flight"] == 0
+    assert stats["timings"]["verify"]["calls"] == 2
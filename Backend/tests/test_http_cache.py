@@ -0,0 +1,43 @@
+import pytest
+
+from app.core.cache import RedisBackend
+from app.core.http_cache import catalog_version
+
+
+@pytest.fixture
+def shared_version(server, monkeypatch):
+    """Catalog version kept on the shared cache server, as with a redis:// CACHE_URL"""
+    monkeypatch.setattr(catalog_version, "_backend", RedisBackend.from_url(server.url))
+
+
+def test_without_a_shared_version_catalog_responses_are_not_stored(client, make_product):
+    product_id = make_product()
+    for path in (f"/api/products/{product_id}", "/api/products?limit=1", "/api/products/search?q=widget"):
+        response = client.get(path, headers={"If-None-Match": '"catalog-0"'})
+        assert response.status_code == 200
+        assert "etag" not in response.headers
+        assert response.headers["cache-control"] == "no-store"
+
+
+def test_current_tag_gets_304_until_a_write(client, make_product, shared_version):
+    product_id = make_product(price=10.0)
+    first = client.get(f"/api/products/{product_id}")
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+
+    revalidated = client.get(f"/api/products/{product_id}", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304 and revalidated.content == b""
+    assert client.get("/api/products?limit=1", headers={"If-None-Match": etag}).status_code == 304
+
+    assert client.put(f"/api/products/{product_id}", json={"price": 11.0}).status_code == 200
+    changed = client.get(f"/api/products/{product_id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag and changed.json()["price"] == 11.0
+
+
+def test_missing_product_is_404_even_with_the_current_tag(client, make_product, shared_version):
+    product_id = make_product()
+    assert client.delete(f"/api/products/{product_id}").status_code == 200
+    etag = client.get("/api/products?limit=1").headers["etag"]
+
+    assert client.get(f"/api/products/{product_id}", headers={"If-None-Match": etag}).status_code == 404
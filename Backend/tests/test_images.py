@@ -0,0 +1,56 @@
+import os
+import uuid
+
+from app.core.image_store import image_store
+
+
+def png() -> bytes:
+    """Unique bytes with a PNG signature (stored images are content-addressed)"""
+    return b"\x89PNG\r\n\x1a\n" + os.urandom(64)
+
+
+def test_replacing_an_image_needs_an_admin(client, make_product, make_user, auth_headers, admin_headers):
+    product_id = make_product()
+    assert client.put(f"/api/products/{product_id}/image", content=png()).status_code == 401
+    customer = client.put(f"/api/products/{product_id}/image", content=png(), headers=auth_headers(make_user()))
+    assert customer.status_code == 403
+
+    response = client.put(f"/api/products/{product_id}/image", content=png(), headers=admin_headers)
+    assert response.status_code == 200
+    assert image_store.exists(response.json()["image_url"].rsplit("/", 1)[1])
+
+
+def test_creating_a_product_needs_an_admin(client, make_user, auth_headers, monkeypatch):
+    saved = []
+    monkeypatch.setattr(image_store, "save_stream", lambda chunks: saved.append(chunks))
+    form = {"name": "Lamp", "description": "Desk lamp", "price": "5", "quantity": "1", "sku": uuid.uuid4().hex[:12]}
+    files = {"image": ("lamp.png", png(), "image/png")}
+
+    assert client.post("/api/products", data=form, files=files).status_code == 401
+    assert client.post("/api/products", data=form, files=files, headers=auth_headers(make_user())).status_code == 403
+    assert saved == []  # nothing reached the image store
+
+
+def test_failed_create_removes_the_uploaded_image(client, make_product, db, monkeypatch, admin_headers):
+    from app.Router import Products
+
+    async def fail(db, product):
+        raise RuntimeError("database down")
+    monkeypatch.setattr(Products, "create_Product", fail)
+    saved = []
+    original_save = image_store.save_stream
+
+    async def save_stream(chunks):
+        saved.append(await original_save(chunks))
+        return saved[-1]
+    monkeypatch.setattr(image_store, "save_stream", save_stream)
+
+    response = client.post(
+        "/api/products",
+        data={"name": "Lamp", "description": "Desk lamp", "price": "5", "quantity": "1", "sku": uuid.uuid4().hex[:12]},
+        files={"image": ("lamp.png", png(), "image/png")},
+        headers=admin_headers,
+    )
+
+    assert response.status_code == 500
+    assert len(saved) == 1 and not image_store.exists(saved[0])
@@ -0,0 +1,63 @@
+import uuid
+
+from app.CRUD.Crud import write_import_batch
+from app.Models.Product import Product
+
+CSV_HEADER = "sku,name,description,price,quantity\n"
+
+
+def import_csv(client, headers, body: str):
+    return client.post("/api/products/import", params={"format": "csv"}, content=(CSV_HEADER + body).encode(), headers=headers)
+
+
+def test_import_needs_an_admin_user(client):
+    assert import_csv(client, {}, "S1,Phone,Test,2.50,3\n").status_code == 401
+
+
+def test_duplicate_skus_in_a_batch_are_skipped_not_failed(client, admin_headers):
+    sku = uuid.uuid4().hex[:12]
+    body = f"{sku},Phone,Old,2.50,3\n{sku},Phone,New,2.75,4\n,Broken,Test,-1,1\n"
+
+    summary = import_csv(client, admin_headers, body).json()
+
+    assert (summary["inserted"], summary["updated"], summary["skipped"], summary["failed"]) == (1, 0, 1, 1)
+    assert [error["line"] for error in summary["errors"]] == [4]
+
+
+def test_failed_batch_reports_the_offending_rows(db):
+    good = {"sku": uuid.uuid4().hex[:12], "name": "Good", "description": "Test", "price_cents": 100, "quantity": 1,
+            "image_url": None, "featured": False}
+    bad = dict(good, sku=uuid.uuid4().hex[:12], name=None)  # violates NOT NULL in the database
+
+    result = write_import_batch(db, ([], {good["sku"]: (2, good), bad["sku"]: (3, bad)}, [], 0))
+
+    assert (result["inserted"], result["failed"]) == (1, 1)
+    assert [error["line"] for error in result["errors"]] == [3]
+    assert db.query(Product).filter(Product.sku == good["sku"]).count() == 1
+
+
+def test_update_keeps_the_columns_a_row_leaves_out(client, admin_headers, db):
+    sku = uuid.uuid4().hex[:12]
+    product = Product(sku=sku, name="Lamp", description="Old", price=5, quantity=3, image_url="/img/lamp.jpg", featured=True)
+    db.add(product)
+    db.commit()
+
+    summary = import_csv(client, admin_headers, f"{sku},Lamp,New,6.00,4\n").json()
+
+    assert summary["updated"] == 1
+    db.refresh(product)
+    assert (product.description, product.quantity, product.image_url, product.featured) == ("New", 4, "/img/lamp.jpg", True)
+
+
+def test_update_cannot_drop_quantity_below_reserved(client, admin_headers, db):
+    sku = uuid.uuid4().hex[:12]
+    product = Product(sku=sku, name="Lamp", description="Old", price=5, quantity=5, reserved=3)
+    db.add(product)
+    db.commit()
+
+    summary = import_csv(client, admin_headers, f"{sku},Lamp,New,6.00,2\n").json()
+
+    assert (summary["updated"], summary["failed"]) == (0, 1)
+    assert summary["errors"][0]["line"] == 2
+    db.refresh(product)
+    assert product.quantity == 5
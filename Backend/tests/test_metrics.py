@@ -0,0 +1,41 @@
+from app.core.metrics import Histogram
+
+
+def sample(body: str, name: str) -> float:
+    """Value of one sample line (name including its labels) in a /metrics body, 0 if absent"""
+    for line in body.splitlines():
+        if line.startswith(name + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Test latency", ("route",), buckets=(0.01, 0.1, 1.0))
+    for value in (0.005, 0.05, 0.05, 30):
+        histogram.observe(value, route="/a")
+
+    assert histogram.samples() == [
+        'latency_seconds_bucket{route="/a",le="0.01"} 1',
+        'latency_seconds_bucket{route="/a",le="0.1"} 3',
+        'latency_seconds_bucket{route="/a",le="1.0"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a"} 30.105',
+        'latency_seconds_count{route="/a"} 4',
+    ]
+
+
+def test_requests_are_recorded_per_route_template(client, make_product):
+    route = 'method="GET",route="/api/products/{product_id}"'
+    before = client.get("/metrics").text
+
+    client.get(f"/api/products/{make_product()}")
+    client.get("/api/products/999999999")
+    after = client.get("/metrics").text
+
+    assert after.startswith("# HELP")
+    assert sample(after, f"http_request_duration_seconds_count{{{route}}}") == sample(before, f"http_request_duration_seconds_count{{{route}}}") + 2
+    assert sample(after, f'http_responses_total{{{route},status="200"}}') >= 1
+    not_found = f'http_errors_total{{{route},status="404"}}'
+    assert sample(after, not_found) == sample(before, not_found) + 1
+    assert "999999999" not in after  # raw paths never become labels
+    assert sample(after, 'http_requests_in_flight{method="GET"}') == 1  # the /metrics request itself
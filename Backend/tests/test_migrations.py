@@ -0,0 +1,23 @@
+import json
+
+from sqlalchemy import create_engine, text
+
+from app.migrations import upgrade
+
+
+def test_v0008_converts_columns_and_carts_alike(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    upgrade(engine, target=7)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, email, hashed_password, is_active) VALUES (1, 'a@example.com', 'x', 1)"))
+        conn.execute(text("INSERT INTO products (id, name, description, price, quantity) VALUES (1, 'Pen', 'Blue', 1.005, 3)"))
+        cart = {"lines": [{"id": 1, "product_id": 1, "quantity": 2, "price": 1.005}], "next_line_id": 2, "version": 1}
+        conn.execute(text("INSERT INTO carts (user_id, data, version) VALUES (1, :data, 1)"), {"data": json.dumps(cart)})
+
+    upgrade(engine, target=8)
+
+    with engine.connect() as conn:
+        price_cents = conn.scalar(text("SELECT price_cents FROM products WHERE id = 1"))
+        cart = json.loads(conn.scalar(text("SELECT data FROM carts WHERE user_id = 1")))
+    assert price_cents == cart["lines"][0]["price_cents"] == 101
+    assert cart["total_cents"] == 202
@@ -0,0 +1,107 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select, update
+
+from app.core.jobs import JobQueue, job_queue, report_unattended_jobs, utcnow
+from app.core.order_jobs import utc_day
+from app.Models.Job import Job
+
+
+def enqueue_first(db, queue: JobQueue, kind: str) -> int:
+    """Enqueue a job due before anything else in the table and return its id"""
+    queue.enqueue(db, kind, {"n": 1}, delay=-10 ** 7)
+    db.commit()
+    return db.scalar(select(func.max(Job.id)).where(Job.kind == kind))
+
+
+def make_due(db, job_id: int):
+    """Stand-in for waiting out the backoff"""
+    db.execute(update(Job).where(Job.id == job_id).values(run_at=utcnow() - timedelta(seconds=10 ** 7)))
+    db.commit()
+
+
+def test_rollup_day_is_the_utc_date():
+    # 23:30 on Jan 1 in UTC-5 is already Jan 2 in UTC
+    local = datetime(2026, 1, 1, 23, 30, tzinfo=timezone(timedelta(hours=-5)))
+    assert utc_day(local) == date(2026, 1, 2)
+    assert utc_day(datetime(2026, 1, 1, 23, 30)) == date(2026, 1, 1)
+
+
+def test_overdue_jobs_without_a_worker_are_reported(db, caplog):
+    before = job_queue.overdue(db, 600)
+    job_queue.enqueue(db, "order_confirmation", {"order_id": 0}, delay=-3600)
+    job_queue.enqueue(db, "order_confirmation", {"order_id": 0})  # just enqueued, not overdue yet
+    db.commit()
+
+    assert report_unattended_jobs(600) == before + 1
+    assert "overdue by more than 600s" in caplog.text
+
+
+def test_failed_job_backs_off_then_is_dead_lettered_and_retried(db):
+    queue = JobQueue(max_attempts=2, backoff_base=30, backoff_max=600)
+    calls = []
+
+    @queue.handler("flaky")
+    def flaky(db, payload):
+        calls.append(payload)
+        if len(calls) <= 2:
+            raise RuntimeError("relay down")
+
+    job_id = enqueue_first(db, queue, "flaky")
+
+    job = queue.claim(db)
+    assert (job.id, job.status, job.attempts) == (job_id, "running", 1)
+    assert queue.run(db, job) is False
+    db.expire_all()
+    job = db.get(Job, job_id)
+    assert (job.status, job.attempts, job.last_error) == ("pending", 1, "RuntimeError: relay down")
+    # Retry number 1 waits backoff_base seconds, +-20%
+    wait = (job.run_at.replace(tzinfo=timezone.utc) - utcnow()).total_seconds()
+    assert 20 < wait <= 36
+
+    make_due(db, job_id)
+    job = queue.claim(db)
+    assert (job.id, job.attempts) == (job_id, 2)
+    assert queue.run(db, job) is False
+    db.expire_all()
+    assert db.get(Job, job_id).status == "dead"
+    assert queue.retried == 1 and queue.dead == 1
+    assert job_id in [dead["id"] for dead in queue.dead_letters(db, limit=1000)]
+
+    queue.retry(db, job_id)
+    db.expire_all()
+    job = db.get(Job, job_id)
+    assert (job.status, job.attempts, job.finished_at) == ("pending", 0, None)
+    with pytest.raises(HTTPException) as error:
+        queue.retry(db, job_id)  # only dead jobs can be retried
+    assert error.value.status_code == 404
+
+    make_due(db, job_id)
+    job = queue.claim(db)
+    assert job.id == job_id and queue.run(db, job) is True
+    db.expire_all()
+    assert db.get(Job, job_id).status == "done"
+    assert len(calls) == 3 and queue.completed == 1
+
+
+def test_lease_expiry_on_the_last_attempt_dead_letters_the_job(db):
+    queue = JobQueue(max_attempts=1, lease=60)
+    job_id = enqueue_first(db, queue, "abandoned")
+    job = queue.claim(db)
+    assert job.id == job_id
+    # The worker died: its lease runs out without a result
+    db.execute(update(Job).where(Job.id == job_id).values(locked_until=utcnow() - timedelta(seconds=1)))
+    db.commit()
+
+    claimed = queue.claim(db)
+    if claimed is not None:
+        # Another test's job came next; hand it back
+        assert claimed.id != job_id
+        db.execute(update(Job).where(Job.id == claimed.id)
+                   .values(status="pending", attempts=claimed.attempts - 1, locked_until=None))
+        db.commit()
+    db.expire_all()
+    job = db.get(Job, job_id)
+    assert job.status == "dead" and "lease expired" in job.last_error
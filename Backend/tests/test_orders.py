@@ -0,0 +1,66 @@
+import pytest
+
+
+@pytest.fixture
+def shopper(make_user, auth_headers):
+    return auth_headers(make_user())
+
+
+def place_order(client, headers, *product_ids):
+    items = [{"product_id": product_id, "quantity": 1} for product_id in product_ids]
+    response = client.post("/api/orders/", json={"items": items}, headers=headers)
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def walk(client, headers, limit=2, **params):
+    """Follow next_cursor to the end; returns the orders in page order"""
+    orders, after_id = [], None
+    while True:
+        query = dict(params, limit=limit)
+        if after_id is not None:
+            query["after_id"] = after_id
+        page = client.get("/api/orders/", params=query, headers=headers).json()
+        assert len(page["items"]) <= limit
+        orders += page["items"]
+        after_id = page["next_cursor"]
+        if after_id is None:
+            return orders
+
+
+def test_cursor_walk_returns_the_users_orders_newest_first(client, make_product, shopper, auth_headers, make_user):
+    placed = [place_order(client, shopper, make_product()) for _ in range(5)]
+    place_order(client, auth_headers(make_user()), make_product())
+
+    orders = walk(client, shopper)
+
+    assert [order["id"] for order in orders] == placed[::-1]
+
+
+def test_summary_counts_items_and_include_items_loads_lines(client, make_product, shopper):
+    product_ids = [make_product(name=f"Line {n}") for n in range(3)]
+    order_id = place_order(client, shopper, *product_ids)
+
+    [summary] = client.get("/api/orders/", headers=shopper).json()["items"]
+    assert summary["id"] == order_id
+    assert summary["item_count"] == 3
+    assert summary.get("items") is None
+
+    [detail] = client.get("/api/orders/", params={"include_items": True}, headers=shopper).json()["items"]
+    assert detail["item_count"] == 3
+    lines = sorted((line["product_id"], line["product_name"], line["quantity"]) for line in detail["items"])
+    assert lines == [(product_id, f"Line {n}", 1) for n, product_id in enumerate(product_ids)]
+
+
+def test_status_filter(client, make_product, shopper):
+    pending, shipped, delivered = (place_order(client, shopper, make_product()) for _ in range(3))
+    client.put(f"/api/orders/{shipped}/status", json={"status": "Shipped"}, headers=shopper)
+    client.put(f"/api/orders/{delivered}/status", json={"status": "Delivered"}, headers=shopper)
+
+    assert [order["id"] for order in walk(client, shopper, status="Pending")] == [pending]
+    orders = walk(client, shopper, limit=1, status=["Shipped", "Delivered"])
+    assert [(order["id"], order["status"]) for order in orders] == [(delivered, "Delivered"), (shipped, "Shipped")]
+
+
+def test_invalid_status_is_rejected(client, shopper):
+    assert client.get("/api/orders/", params={"status": "Lost"}, headers=shopper).status_code == 400
@@ -0,0 +1,58 @@
+import pytest
+
+# Prices no other test uses, so a price filter isolates this module's products
+LOW, HIGH = 7000, 7999
+
+
+@pytest.fixture(scope="module")
+def catalog(client):
+    """Products with repeated prices and names, to exercise the id tie-break"""
+    from database import SessionLocal
+    from app.Models.Product import Product
+    db = SessionLocal()
+    try:
+        rows = [("Mug", 7001), ("Anvil", 7005), ("Mug", 7003), ("Bowl", 7003), ("Anvil", 7001), ("Cup", 7010), ("Bowl", 7002)]
+        products = [Product(name=name, description="Pagination test", price=price, quantity=1) for name, price in rows]
+        db.add_all(products)
+        db.commit()
+        return [{"id": product.id, "name": product.name, "price": product.price} for product in products]
+    finally:
+        db.close()
+
+
+def walk(client, sort, limit=2):
+    """Follow next_cursor to the end; returns the ids in page order"""
+    ids, after_id = [], None
+    while True:
+        params = {"sort": sort, "limit": limit, "min_price": LOW, "max_price": HIGH}
+        if after_id is not None:
+            params["after_id"] = after_id
+        page = client.get("/api/products", params=params).json()
+        assert len(page["items"]) <= limit
+        ids += [item["id"] for item in page["items"]]
+        after_id = page["next_cursor"]
+        if after_id is None:
+            return ids
+
+
+@pytest.mark.parametrize("sort", ["id", "-id", "price", "-price", "name", "-name"])
+def test_cursor_walk_returns_every_product_once_in_order(client, catalog, sort):
+    key = sort.lstrip("-")
+    descending = sort.startswith("-")
+    expected = sorted(catalog, key=lambda product: (product[key], product["id"]), reverse=descending)
+
+    assert walk(client, sort) == [product["id"] for product in expected]
+
+
+def test_filters_apply_before_paging(client, catalog):
+    page = client.get("/api/products", params={"min_price": 7003, "max_price": 7005, "sort": "price", "limit": 10}).json()
+    assert [item["price"] for item in page["items"]] == [7003, 7003, 7005]
+    assert page["next_cursor"] is None
+
+
+def test_invalid_sort_and_cursor_are_rejected(client, catalog):
+    assert client.get("/api/products", params={"sort": "stock"}).status_code == 400
+    # Sorting by a column needs the cursor row to read its value from
+    response = client.get("/api/products", params={"sort": "price", "after_id": 10 ** 9})
+    assert response.status_code == 400 and "Invalid cursor" in response.json()["detail"]
+    assert client.get("/api/products", params={"after_id": "abc"}).status_code == 422
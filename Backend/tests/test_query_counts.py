@@ -0,0 +1,67 @@
+"""
+Query budgets for the hot endpoints: each is wrapped in assert_max_queries,
+which fails with the executed statements when a change adds queries (an
+N+1 over cart lines, order items or list rows shows up here first).
+"""
+import pytest
+
+from app.core.query_counter import assert_max_queries
+
+
+@pytest.fixture
+def shopper(client, make_user, auth_headers):
+    headers = auth_headers(make_user())
+    client.get("/api/cart", headers=headers)  # warm the user cache, as for any signed-in session
+    return headers
+
+
+def test_cart_endpoints(client, make_product, shopper):
+    product_ids = [make_product(quantity=50) for _ in range(5)]
+
+    for product_id in product_ids:
+        with assert_max_queries(3):
+            assert client.post("/api/cart/items", json={"product_id": product_id, "quantity": 1}, headers=shopper).status_code == 200
+
+    # The cart document plus one query for product snapshots not cached yet
+    with assert_max_queries(2):
+        cart = client.get("/api/cart", headers=shopper).json()
+    assert len(cart["items"]) == 5
+    with assert_max_queries(1):
+        client.get("/api/cart", headers=shopper)
+
+    item_id = cart["items"][0]["id"]
+    # Line lookup, live stock read, then the versioned read-modify-write
+    with assert_max_queries(4):
+        assert client.put(f"/api/cart/items/{item_id}", json={"quantity": 2}, headers=shopper).status_code == 200
+
+    operations = [{"op": "set", "item_id": item_id, "quantity": 3}, {"op": "remove", "item_id": cart["items"][1]["id"]}]
+    with assert_max_queries(5):
+        assert client.patch("/api/cart/items", json={"operations": operations}, headers=shopper).status_code == 200
+
+
+@pytest.mark.parametrize("lines", [1, 3, 10])
+def test_create_order(client, make_product, shopper, lines):
+    items = [{"product_id": make_product(quantity=50), "quantity": 1} for _ in range(lines)]
+
+    # Fixed cost plus one INSERT per order item (SQLite cannot batch INSERT ... RETURNING)
+    with assert_max_queries(8 + lines):
+        assert client.post("/api/orders/", json={"items": items}, headers=shopper).status_code == 201
+
+
+def test_list_orders(client, make_product, shopper):
+    for _ in range(3):
+        client.post("/api/orders/", json={"items": [{"product_id": make_product(), "quantity": 1}]}, headers=shopper)
+
+    with assert_max_queries(1):
+        page = client.get("/api/orders/", headers=shopper).json()
+    assert len(page["items"]) == 3
+
+
+def test_list_products(client, make_product):
+    for _ in range(25):
+        make_product()
+
+    with assert_max_queries(1):
+        assert len(client.get("/api/products", params={"limit": 20, "sort": "-price"}).json()["items"]) == 20
+    with assert_max_queries(0):  # served from the page cache
+        client.get("/api/products", params={"limit": 20, "sort": "-price"})
@@ -0,0 +1,50 @@
+import logging
+import re
+
+from sqlalchemy import text
+
+from app.core import query_tracing
+from database import engine
+
+
+class Records(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.fields = []
+
+    def emit(self, record):
+        self.fields.append(record.fields)
+
+
+def capture(logger, monkeypatch) -> Records:
+    """Send the logger's records to a list instead of its JSON handler, for one test"""
+    handler = Records()
+    monkeypatch.setattr(logger, "handlers", [handler])
+    return handler
+
+
+def test_server_timing_counts_the_request_queries(client, make_product, monkeypatch):
+    product_id = make_product()
+    monkeypatch.setattr(query_tracing, "REQUEST_LOG_ENABLED", True)
+    logged = capture(query_tracing.request_logger, monkeypatch)
+
+    response = client.get(f"/api/products/{product_id}")  # not cached yet, so it reads the row
+
+    match = re.fullmatch(r'app;dur=[\d.]+, db;dur=[\d.]+;desc="(\d+) queries"', response.headers["server-timing"])
+    assert match and int(match.group(1)) >= 1
+    entry = logged.fields[-1]
+    assert entry["path"] == f"/api/products/{product_id}" and entry["status"] == 200
+    assert entry["db_queries"] == int(match.group(1)) and entry["slowest_query"]
+
+
+def test_statements_over_the_threshold_are_logged(monkeypatch):
+    monkeypatch.setattr(query_tracing, "SLOW_QUERY_MS", 0)
+    logged = capture(query_tracing.slow_query_logger, monkeypatch)
+    query_tracing.install_query_tracing(engine)
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 42"))
+
+    entry = logged.fields[-1]
+    assert entry["event"] == "slow_query" and "SELECT 42" in entry["statement"]
+    assert entry["duration_ms"] >= 0
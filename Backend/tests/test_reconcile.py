@@ -0,0 +1,32 @@
+import json
+import sys
+
+from app.core import reconcile
+from app.core.cart_store import MemoryCartStore, new_cart
+from app.Models.Cart import Cart
+from database import SessionLocal
+
+
+def test_fix_persists_cart_totals_through_a_write_behind_store(db, make_user, monkeypatch, capsys):
+    user_id = make_user()
+    cart = new_cart()
+    cart["lines"] = [{"id": 1, "product_id": 1, "quantity": 3, "price_cents": 250}]
+    cart["total_cents"] = 100  # drifted
+    cart["version"] = 1
+    db.add(Cart(user_id=user_id, data=json.dumps(cart), version=1))
+    db.commit()
+    store = MemoryCartStore()
+    monkeypatch.setattr(reconcile, "cart_store", store)
+    monkeypatch.setattr(sys, "argv", ["reconcile", "--fix"])
+
+    reconcile.main()
+
+    assert "Totals corrected" in capsys.readouterr().out
+    assert store.stats()["pending_flush"] == 0
+    fresh = SessionLocal()
+    try:
+        row = fresh.get(Cart, user_id)
+        assert json.loads(row.data)["total_cents"] == 750
+        assert row.version == 2
+    finally:
+        fresh.close()
@@ -0,0 +1,69 @@
+from sqlalchemy import func, select
+
+from app.core.reservations import get_holds, reserve_for_checkout, sweep_expired
+from app.Models.Product import Product
+from app.Models.Reservation import StockReservation
+
+
+def stock(db, product_id):
+    db.expire_all()
+    product = db.get(Product, product_id)
+    return product.quantity, product.reserved
+
+
+def test_expired_hold_is_swept(db, make_product, make_user):
+    product_id = make_product(quantity=5)
+    user_id = make_user()
+
+    reserve_for_checkout(db, user_id, {product_id: 3}, ttl=-1)  # already expired
+    assert stock(db, product_id) == (5, 3)
+    assert get_holds(db, user_id)["items"][0]["expired"] is True
+
+    assert sweep_expired() >= 1
+    assert stock(db, product_id) == (5, 0)
+    assert db.scalar(select(func.count()).select_from(StockReservation).where(StockReservation.user_id == user_id)) == 0
+    assert sweep_expired() == 0
+
+
+def test_live_hold_is_kept_and_blocks_other_buyers(client, db, make_product, make_user, auth_headers):
+    product_id = make_product(quantity=2)
+    reserve_for_checkout(db, make_user(), {product_id: 2}, ttl=600)
+
+    sweep_expired()
+    assert stock(db, product_id) == (2, 2)
+    response = client.post("/api/orders/", json={"items": [{"product_id": product_id, "quantity": 1}]},
+                           headers=auth_headers(make_user()))
+    assert response.status_code == 400
+
+
+def test_expired_hold_does_not_block_an_order_before_the_sweep(client, db, make_product, make_user, auth_headers):
+    product_id = make_product(quantity=2)
+    reserve_for_checkout(db, make_user(), {product_id: 2}, ttl=-1)  # expired, not yet swept
+
+    response = client.post("/api/orders/", json={"items": [{"product_id": product_id, "quantity": 2}]},
+                           headers=auth_headers(make_user()))
+
+    assert response.status_code in (200, 201)
+    assert stock(db, product_id) == (0, 0)
+
+
+def test_product_quantity_cannot_drop_below_held_stock(client, db, make_product, make_user):
+    product_id = make_product(quantity=5)
+    reserve_for_checkout(db, make_user(), {product_id: 3}, ttl=600)
+
+    response = client.put(f"/api/products/{product_id}", json={"quantity": 2})
+    assert response.status_code == 400
+    assert stock(db, product_id) == (5, 3)
+
+    assert client.put(f"/api/products/{product_id}", json={"quantity": 3}).status_code == 200
+    assert stock(db, product_id) == (3, 3)
+
+
+def test_deleting_a_product_deletes_its_holds(client, db, make_product, make_user):
+    product_id = make_product(quantity=5)
+    reserve_for_checkout(db, make_user(), {product_id: 3}, ttl=600)
+    reserve_for_checkout(db, make_user(), {product_id: 1}, ttl=-1)
+
+    assert client.delete(f"/api/products/{product_id}").status_code == 200
+    assert db.scalar(select(func.count()).select_from(StockReservation).where(StockReservation.product_id == product_id)) == 0
+    sweep_expired()  # nothing left pointing at the deleted row
@@ -0,0 +1,32 @@
+import threading
+import time
+
+from app.core.search import ProductSearch, SearchIndex
+
+
+def test_rebuild_indexes_terms_in_sorted_order():
+    index = SearchIndex()
+    index.rebuild([(1, "Laptop", "Fast"), (2, "Lamp", "Desk lamp"), (3, "Apple", None)])
+
+    assert index._terms == sorted(index._terms)
+    ranked, total = index.search("la")
+    assert {doc_id for doc_id, _ in ranked} == {1, 2} and total == 2
+
+
+def test_concurrent_stale_searches_rebuild_once():
+    search = ProductSearch()
+    loads = []
+
+    def load_documents():
+        loads.append(1)
+        time.sleep(0.05)
+        return [(1, "Laptop", "Fast")]
+
+    threads = [threading.Thread(target=search.ensure_fresh, args=(load_documents,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert search.search("lap", 10, 0)[1] == 1
@@ -0,0 +1,14 @@
+from app.CRUD import Crud
+from app.Models.User import User
+
+
+def test_deactivation_survives_a_cache_outage(db, make_user, monkeypatch):
+    user_id = make_user()
+
+    def fail(key):
+        raise ConnectionError("cache down")
+    monkeypatch.setattr(Crud.user_cache, "delete", fail)
+
+    assert Crud.set_user_active(db, user_id, False).is_active is False
+    db.expire_all()
+    assert db.get(User, user_id).is_active is False
@@ -1,6 +1,7 @@
 import React from 'react';
 import { Link } from 'react-router-dom';
 import { useCart } from '../context/CartContext';
+import { imageUrl } from '../services/api';
 
 const ProductCard = ({ product }) => {
   const { addToCart, loading } = useCart();
@@ -19,7 +20,7 @@ const ProductCard = ({ product }) => {
       <Link to={`/product/${product.id}`}>
         <div className="aspect-w-1 aspect-h-1 w-full overflow-hidden bg-gray-200">
           <img
-            src={product.image_url || product.image || 'https://via.placeholder.com/300x300?text=Product'}
+            src={imageUrl(product.image_url || product.image, 400) || 'https://via.placeholder.com/300x300?text=Product'}
             alt={product.name}
             className="h-48 w-full object-cover object-center group-hover:opacity-75"
           />
@@ -59,39 +59,58 @@ export const CartProvider = ({ children }) => {
     }
   };
 
-  const updateCartItem = async (itemId, quantity) => {
+  // Applies several add/set/remove operations in one request; the response is the new cart
+  const applyCartOperations = async (operations) => {
     try {
       setLoading(true);
-      await cartAPI.updateCartItem(itemId, quantity);
-      await fetchCart(); // Refresh cart data
+      const response = await cartAPI.applyCartOperations(operations);
+      setCart(response.data.items || []);
     } catch (error) {
-      console.error('Error updating cart item:', error);
+      console.error('Error updating cart:', error);
       throw error;
     } finally {
       setLoading(false);
     }
   };
 
-  const removeFromCart = async (itemId) => {
+  const updateCartItem = async (itemId, quantity) =>
+    applyCartOperations([{ op: 'set', item_id: itemId, quantity }]);
+
+  const removeFromCart = async (itemId) =>
+    applyCartOperations([{ op: 'remove', item_id: itemId }]);
+
+  const clearCart = async () => {
     try {
       setLoading(true);
-      await cartAPI.removeFromCart(itemId);
-      await fetchCart(); // Refresh cart data
+      await cartAPI.clearCart();
+      setCart([]);
     } catch (error) {
-      console.error('Error removing from cart:', error);
+      console.error('Error clearing cart:', error);
       throw error;
     } finally {
       setLoading(false);
     }
   };
 
-  const clearCart = async () => {
+  // Reserves the cart's stock until checkout (or until the hold expires)
+  const startCheckout = async () => {
+    try {
+      return await cartAPI.startCheckout();
+    } catch (error) {
+      console.error('Error starting checkout:', error);
+      throw error;
+    }
+  };
+
+  // Places an order for the server-side cart and empties it in one step
+  const checkout = async () => {
     try {
       setLoading(true);
-      await cartAPI.clearCart();
+      const response = await cartAPI.checkout();
       setCart([]);
+      return response;
     } catch (error) {
-      console.error('Error clearing cart:', error);
+      console.error('Error during checkout:', error);
       throw error;
     } finally {
       setLoading(false);
@@ -116,7 +135,10 @@ export const CartProvider = ({ children }) => {
     addToCart,
     updateCartItem,
     removeFromCart,
+    applyCartOperations,
     clearCart,
+    startCheckout,
+    checkout,
     fetchCart,
     getCartTotal,
     getCartItemCount,
@@ -1,6 +1,7 @@
 import React from 'react';
 import { Link } from 'react-router-dom';
 import { useCart } from '../context/CartContext';
+import { imageUrl } from '../services/api';
 import LoadingSpinner from '../components/LoadingSpinner';
 
 const CartPage = () => {
@@ -78,7 +79,7 @@ const CartPage = () => {
                     {cart.map((item) => (
                       <div key={item.id} className="flex items-center space-x-4 p-4 border border-gray-200 rounded-lg">
                         <img
-                          src={item.image || item.image_url || 'https://via.placeholder.com/80x80?text=Product'}
+                          src={imageUrl(item.image || item.image_url, 200) || 'https://via.placeholder.com/80x80?text=Product'}
                           alt={item.name}
                           className="w-20 h-20 object-cover rounded-md"
                         />
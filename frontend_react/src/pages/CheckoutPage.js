@@ -1,12 +1,12 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
-import { ordersAPI } from '../services/api';
+import { imageUrl } from '../services/api';
 import { useCart } from '../context/CartContext';
 import { useAuth } from '../context/AuthContext';
 
 const CheckoutPage = () => {
   const navigate = useNavigate();
-  const { cart, getCartTotal, clearCart } = useCart();
+  const { cart, getCartTotal, startCheckout, checkout } = useCart();
   const { isAuthenticated } = useAuth();
   
   const [formData, setFormData] = useState({
@@ -23,6 +23,15 @@ const CheckoutPage = () => {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
 
+  // Hold the cart's stock while the form is filled in, so placing the order cannot fail on stock
+  useEffect(() => {
+    if (!isAuthenticated || cart.length === 0) return;
+    startCheckout().catch((error) => {
+      setError(error.response?.data?.detail || 'Some items are no longer available in the requested quantity.');
+    });
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [isAuthenticated, cart.length]);
+
   const handleChange = (e) => {
     setFormData({
       ...formData,
@@ -42,17 +51,8 @@ const CheckoutPage = () => {
     }
 
     try {
-      const orderData = {
-        items: cart.map(item => ({
-          productId: item.product_id || item.id, // Use product_id from backend
-          quantity: item.quantity,
-        })),
-      };
-
-      const response = await ordersAPI.createOrder(orderData);
-      
-      // Clear cart after successful order
-      await clearCart();
+      // The server orders what is in the cart and empties it in one transaction
+      const response = await checkout();
       
       // Redirect to order confirmation
       navigate(`/order-confirmation/${response.data.id}`);
@@ -258,7 +258,7 @@ const CheckoutPage = () => {
                   <div key={item.id} className="flex justify-between items-center">
                     <div className="flex items-center space-x-3">
                       <img
-                        src={item.image || item.image_url || 'https://via.placeholder.com/40x40?text=Product'}
+                        src={imageUrl(item.image || item.image_url, 200) || 'https://via.placeholder.com/40x40?text=Product'}
                         alt={item.name}
                         className="w-10 h-10 object-cover rounded"
                       />
@@ -14,7 +14,7 @@ const HomePage = () => {
       try {
         setLoading(true);
         const response = await productsAPI.getFeaturedProducts();
-        setFeaturedProducts(response.data.slice(0, 6)); // Show only 6 featured products
+        setFeaturedProducts(response.data.items); // Show only 6 featured products
       } catch (error) {
         console.error('Error fetching featured products:', error);
         setError('Failed to load featured products');
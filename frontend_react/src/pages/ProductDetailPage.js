@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import { productsAPI } from '../services/api';
+import { productsAPI, imageUrl } from '../services/api';
 import { useCart } from '../context/CartContext';
 import LoadingSpinner from '../components/LoadingSpinner';
 
@@ -72,7 +72,7 @@ const ProductDetailPage = () => {
           <div className="grid grid-cols-1 lg:grid-cols-2 gap-8">
             <div className="p-8">
               <img
-                src={product.image_url || product.image || 'https://via.placeholder.com/600x600?text=Product'}
+                src={imageUrl(product.image_url || product.image) || 'https://via.placeholder.com/600x600?text=Product'}
                 alt={product.name}
                 className="w-full h-96 object-cover object-center rounded-lg"
               />
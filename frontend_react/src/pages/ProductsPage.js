@@ -3,38 +3,107 @@ import { productsAPI } from '../services/api';
 import ProductCard from '../components/ProductCard';
 import LoadingSpinner from '../components/LoadingSpinner';
 
+// Products fetched per request
+const PAGE_SIZE = 48;
+
+// Sort dropdown value -> server-side sort key of GET /api/products
+const SORT_PARAMS = {
+  name: 'name',
+  'price-low': 'price',
+  'price-high': '-price',
+};
+
 const ProductsPage = () => {
   const [products, setProducts] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [filteredProducts, setFilteredProducts] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState(null);
   const [searchTerm, setSearchTerm] = useState('');
+  const [searchResults, setSearchResults] = useState(null);
+  const [searchTotal, setSearchTotal] = useState(0);
   const [sortBy, setSortBy] = useState('name');
 
+  // The catalog is sorted on the server and read one keyset page at a time
   useEffect(() => {
+    let cancelled = false;
     const fetchProducts = async () => {
       try {
-        setLoading(true);
-        const response = await productsAPI.getAllProducts();
-        setProducts(response.data);
-        setFilteredProducts(response.data);
+        const response = await productsAPI.getAllProducts({ sort: SORT_PARAMS[sortBy], limit: PAGE_SIZE });
+        if (cancelled) return;
+        setProducts(response.data.items);
+        setNextCursor(response.data.next_cursor);
       } catch (error) {
         console.error('Error fetching products:', error);
-        setError('Failed to load products');
+        if (!cancelled) setError('Failed to load products');
       } finally {
-        setLoading(false);
+        if (!cancelled) setLoading(false);
       }
     };
 
     fetchProducts();
-  }, []);
+    return () => {
+      cancelled = true;
+    };
+  }, [sortBy]);
 
-  // Filter and sort products
+  // Search on the server (debounced) instead of filtering the catalog locally
   useEffect(() => {
-    let filtered = products.filter(product =>
-      product.name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      product.description.toLowerCase().includes(searchTerm.toLowerCase())
-    );
+    const term = searchTerm.trim();
+    if (!term) {
+      setSearchResults(null);
+      return undefined;
+    }
+    const timer = setTimeout(async () => {
+      try {
+        const response = await productsAPI.searchProducts(term, { limit: PAGE_SIZE });
+        setSearchResults(response.data.items);
+        setSearchTotal(response.data.total);
+      } catch (error) {
+        console.error('Error searching products:', error);
+        setSearchResults([]);
+        setSearchTotal(0);
+      }
+    }, 250);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
+
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      if (searchResults) {
+        const response = await productsAPI.searchProducts(searchTerm.trim(), {
+          limit: PAGE_SIZE,
+          offset: searchResults.length,
+        });
+        setSearchResults((current) => [...current, ...response.data.items]);
+        setSearchTotal(response.data.total);
+      } else {
+        const response = await productsAPI.getAllProducts({
+          sort: SORT_PARAMS[sortBy],
+          limit: PAGE_SIZE,
+          after_id: nextCursor,
+        });
+        setProducts((current) => [...current, ...response.data.items]);
+        setNextCursor(response.data.next_cursor);
+      }
+    } catch (error) {
+      console.error('Error loading more products:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const hasMore = searchResults ? searchResults.length < searchTotal : nextCursor !== null;
+
+  // Sort search results (catalog pages already arrive sorted)
+  useEffect(() => {
+    if (!searchResults) {
+      setFilteredProducts(products);
+      return;
+    }
+    let filtered = [...searchResults];
 
     // Sort products
     filtered.sort((a, b) => {
@@ -51,7 +120,7 @@ const ProductsPage = () => {
     });
 
     setFilteredProducts(filtered);
-  }, [products, searchTerm, sortBy]);
+  }, [products, searchResults, sortBy]);
 
   if (loading) {
     return (
@@ -127,17 +196,32 @@ const ProductsPage = () => {
         {/* Results Count */}
         <div className="mb-6">
           <p className="text-gray-600">
-            Showing {filteredProducts.length} of {products.length} products
+            {searchResults
+              ? `Showing ${filteredProducts.length} of ${searchTotal} matching products`
+              : `Showing ${filteredProducts.length} products`}
           </p>
         </div>
 
         {/* Products Grid */}
         {filteredProducts.length > 0 ? (
-          <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 xl:grid-cols-4 gap-6">
-            {filteredProducts.map((product) => (
-              <ProductCard key={product.id} product={product} />
-            ))}
-          </div>
+          <>
+            <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 xl:grid-cols-4 gap-6">
+              {filteredProducts.map((product) => (
+                <ProductCard key={product.id} product={product} />
+              ))}
+            </div>
+            {hasMore && (
+              <div className="mt-8 text-center">
+                <button
+                  onClick={loadMore}
+                  disabled={loadingMore}
+                  className="bg-primary-600 text-white px-6 py-2 rounded-md hover:bg-primary-700 transition-colors disabled:opacity-50"
+                >
+                  {loadingMore ? 'Loading...' : 'Load More'}
+                </button>
+              </div>
+            )}
+          </>
         ) : (
           <div className="text-center py-12">
             <div className="bg-white rounded-lg shadow-md p-8">
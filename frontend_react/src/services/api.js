@@ -9,6 +9,13 @@ const api = axios.create({
   },
 });
 
+// Uploaded images are served by the API under relative URLs (/api/images/<hash>.jpg);
+// `width` picks the nearest pre-generated thumbnail
+export const imageUrl = (url, width) => {
+  if (!url || !url.startsWith('/')) return url;
+  return `${api.defaults.baseURL}${url}${width ? `?w=${width}` : ''}`;
+};
+
 // Request interceptor to add auth token
 api.interceptors.request.use(
   (config) => {
@@ -49,9 +56,13 @@ export const authAPI = {
 
 // Products API calls
 export const productsAPI = {
-  getAllProducts: () => api.get('/api/products'),
+  // List endpoint is keyset-paginated: { items, next_cursor, limit }; pass
+  // next_cursor back as after_id (with the same sort) for the following page
+  getAllProducts: (params = {}) => api.get('/api/products', { params: { limit: 100, ...params } }),
   getProductById: (id) => api.get(`/api/products/${id}`),
-  getFeaturedProducts: () => api.get('/api/products?featured=true'),
+  // Ranked full-text search: { items, total, limit, offset }; page with offset
+  searchProducts: (q, params = {}) => api.get('/api/products/search', { params: { q, limit: 100, ...params } }),
+  getFeaturedProducts: () => api.get('/api/products', { params: { featured: true, limit: 6 } }),
   // Create product with optional image upload (multipart/form-data)
   createProduct: (product) => {
     const formData = new FormData();
@@ -83,7 +94,12 @@ export const cartAPI = {
   updateCartItem: (itemId, quantity) => 
     api.put(`/api/cart/items/${itemId}`, { quantity }),
   removeFromCart: (itemId) => api.delete(`/api/cart/items/${itemId}`),
+  // operations: [{ op: 'add', product_id, quantity } | { op: 'set', item_id, quantity } | { op: 'remove', item_id }]
+  applyCartOperations: (operations) => api.patch('/api/cart/items', { operations }),
   clearCart: () => api.delete('/api/cart'),
+  // Holds the cart's stock for a few minutes while the user fills in the checkout form
+  startCheckout: () => api.post('/api/cart/checkout/start'),
+  checkout: () => api.post('/api/cart/checkout'),
 };
 
 // Orders API calls